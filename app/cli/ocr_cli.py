@@ -84,13 +84,21 @@ def process_batch(ocr_service: OCRService, batch_size: Optional[int] = None, max
     Returns:
         处理是否成功
     """
-    total, success = ocr_service.process_images_batch(batch_size, max_workers)
+    failed_files = []
+    
+    def on_result(image_path: str, output_file: Optional[str]) -> None:
+        if output_file is None:
+            failed_files.append(image_path)
+    
+    total, success = ocr_service.process_images_batch(batch_size, max_workers, on_result)
     
     if total == 0:
         logger.warning("没有找到需要处理的文件")
         return False
         
     logger.info(f"批量处理完成，总计: {total}，成功: {success}")
+    for image_path in failed_files:
+        logger.warning(f"处理失败: {image_path}")
     return success > 0
 
 def list_unprocessed(ocr_service: OCRService) -> bool:
@@ -132,6 +140,7 @@ def main(args: Optional[List[str]] = None) -> int:
         parser.print_help()
         return 1
     
+    ocr_service = None
     try:
         # 创建配置管理器
         config = ConfigManager(parsed_args.config) if parsed_args.config else ConfigManager()
@@ -157,6 +166,10 @@ def main(args: Optional[List[str]] = None) -> int:
         return 1
         
     finally:
+        # 释放OCR连接池
+        if ocr_service is not None:
+            ocr_service.close()
+        
         # 关闭日志
         close_logger(__name__)
 
@@ -12,24 +12,76 @@ DEFAULT_CONFIG = {
         'timeout': '30',
         'max_retries': '3',
         'retry_delay': '2',
-        'api_url': 'https://aip.baidubce.com/rest/2.0/ocr/v1/table'
+        'api_url': 'https://aip.baidubce.com/rest/2.0/ocr/v1/table',
+        'qps': '2',  # 表格识别QPS配额，0表示不限速
+        'burst': '2',  # 允许的瞬时突发请求数
+        'qps_shared': 'false',  # 是否通过锁文件在多个进程间共享QPS配额
+        'qps_lock_file': 'data/temp/ocr_qps.lock',
+        'max_throttle_requeues': '10',  # QPS超限时重新排队的最大次数
+        'token_cache_file': 'data/token_cache.json',  # 访问令牌缓存文件，留空则不缓存
+        'poll_initial_interval': '1',  # 两阶段引擎首次查询结果前的等待秒数
+        'poll_backoff': '1.5',  # 每次查询未完成后等待时间的放大倍数
+        'poll_max_interval': '10',  # 查询间隔上限（秒）
+        'poll_timeout': '300'  # 单个任务的最长等待秒数
     },
     'Paths': {
         'input_folder': 'data/input',
         'output_folder': 'data/output',
         'temp_folder': 'data/temp',
         'template_folder': 'templates',
-        'processed_record': 'data/processed_files.json'
+        'processed_record': 'data/processed_files.json',
+        'ocr_job_journal': 'data/ocr_jobs.jsonl'  # 识别任务日志，中断后从此恢复
     },
     'Performance': {
         'max_workers': '4',
         'batch_size': '5',
-        'skip_existing': 'true'
+        'skip_existing': 'true',
+        'pool_connections': '2',  # 缓存的主机连接池数量
+        'pool_maxsize': '0',  # 每主机最大连接数，0表示与max_workers一致
+        'pool_block': 'false',
+        'keep_alive': 'true',
+        'ocr_engine': 'thread',  # 批量识别引擎: thread、async 或 two_phase
+        'max_concurrency': '0',  # 异步引擎最大在途请求数，0表示与max_workers一致
+        'max_in_flight': '0',  # 线程池引擎在途任务上限，0表示取batch_size与max_workers的较大值
+        'schedule_order': 'fifo',  # 线程池引擎调度顺序: fifo、smallest（小文件优先）或 oldest（最早修改优先）
+        'excel_workers': '0',  # 批量生成采购单的进程数，0表示CPU核数
+        'merge_workers': '0'  # 合并时并行读取采购单的进程数，0表示CPU核数
     },
     'File': {
         'allowed_extensions': '.jpg,.jpeg,.png,.bmp',
         'excel_extension': '.xlsx',
-        'max_file_size_mb': '4'
+        'max_file_size_mb': '4',
+        'save_raw_workbook': 'true',  # 直接使用OCR表格结构生成采购单时是否仍保存原始Excel
+        'excel_reader': 'auto'  # Excel读取引擎: auto、calamine、openpyxl 或 pandas，不可用时依次回退
+    },
+    'Preprocess': {
+        'enabled': 'true',  # 上传前缩放并重编码图片（需要Pillow）
+        'max_workers': '0',  # 预处理进程数，0表示CPU核数
+        'max_edge': '3000',  # 图片长边最大像素
+        'max_upload_mb': '3',  # 上传图片体积预算，Base64编码后需小于4MB
+        'max_quality': '90',
+        'min_quality': '50',
+        'quality_step': '10',
+        'grayscale': 'false'
+    },
+    'Cache': {
+        'ocr_cache_enabled': 'true',  # 按图片内容哈希缓存OCR结果
+        'ocr_cache_folder': 'data/ocr_cache',
+        'ocr_cache_max_size_mb': '500',
+        'ocr_cache_max_age_days': '90',
+        'spec_memo_size': '4096',  # 规格推断、单位提取结果的记忆化缓存条目数，0表示关闭
+        'spec_memo_file': 'data/spec_memo.json',  # 记忆化缓存预热文件，留空则不保存
+        'merge_store_file': 'data/merge_store.db'  # 采购单汇总库，合并时只读取新增或变化的采购单
+    },
+    'Watch': {
+        'poll_interval': '2',  # 未安装watchdog时扫描输入目录的间隔（秒）
+        'stable_seconds': '2',  # 文件大小和修改时间保持不变多少秒后视为复制完成
+        'use_watchdog': 'true',  # 安装了watchdog时使用文件系统事件
+        'merge_orders': 'false'  # 每批新采购单生成后是否自动合并
+    },
+    'Merge': {
+        'output_format': 'xls',  # 合并采购单的输出格式: xls 或 xlsx（只写模式，内存占用与行数无关）
+        'max_rows_per_file': '0'  # 每个合并采购单文件最多的数据行数，超过时拆分为多个文件，0表示只受文件格式的行数限制
     },
     'Templates': {
         'purchase_order': '银豹-采购单模板.xls'
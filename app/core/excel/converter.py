@@ -9,9 +9,14 @@ import logging
 from typing import Dict, Tuple, Optional, Any, List, Union
 
 from ..utils.log_utils import get_logger
+from ..utils import spec_parser
+from ..utils.memo import get_memo
 
 logger = get_logger(__name__)
 
+# 数量字符串 -> (数量, 单位)；修改单位解析规则时需递增 memo.WARM_CACHE_VERSION
+_unit_memo = get_memo('extract_unit_from_quantity', encode=list, decode=tuple)
+
 class UnitConverter:
     """
     单位转换器：处理不同单位之间的转换，支持从商品名称推断规格
@@ -75,24 +80,6 @@ class UnitConverter:
             }
             # 可以添加更多特殊条码的配置	
         }
-        
-        # 规格推断的正则表达式模式
-        self.spec_patterns = [
-            # 1*6、1x12、1X20等格式
-            (r'(\d+)[*xX×](\d+)', r'\1*\2'),
-            # 1*5*12和1x5x12等三级格式
-            (r'(\d+)[*xX×](\d+)[*xX×](\d+)', r'\1*\2*\3'),
-            # "xx入"格式，如"12入"、"24入"
-            (r'(\d+)入', r'1*\1'),
-            # "xxL*1"或"xx升*1"格式
-            (r'([\d\.]+)[L升][*xX×]?(\d+)?', r'\1L*\2' if r'\2' else r'\1L*1'),
-            # "xxkg*1"或"xx公斤*1"格式
-            (r'([\d\.]+)(?:kg|公斤)[*xX×]?(\d+)?', r'\1kg*\2' if r'\2' else r'\1kg*1'),
-            # "xxg*1"或"xx克*1"格式
-            (r'([\d\.]+)(?:g|克)[*xX×]?(\d+)?', r'\1g*\2' if r'\2' else r'\1g*1'),
-            # "xxmL*1"或"xx毫升*1"格式
-            (r'([\d\.]+)(?:mL|毫升)[*xX×]?(\d+)?', r'\1mL*\2' if r'\2' else r'\1mL*1'),
-        ]
     
     def extract_unit_from_quantity(self, quantity_str: str) -> Tuple[Optional[float], Optional[str]]:
         """
@@ -111,6 +98,10 @@ class UnitConverter:
         Returns:
             (数量, 单位)的元组，如果无法提取则返回(None, None)
         """
+        return _unit_memo.get(quantity_str, lambda: self._extract_unit_from_quantity(quantity_str))
+    
+    def _extract_unit_from_quantity(self, quantity_str: str) -> Tuple[Optional[float], Optional[str]]:
+        """从数量字符串中提取单位（未缓存）"""
         if not quantity_str or not isinstance(quantity_str, str):
             return None, None
         
@@ -153,38 +144,10 @@ class UnitConverter:
         Returns:
             提取的规格字符串，如果无法提取则返回None
         """
-        if not text or not isinstance(text, str):
-            return None
-        
-        # 处理XX入白膜格式，如"550纯净水24入白膜"
-        match = re.search(r'.*?(\d+)入白膜', text)
-        if match:
-            result = f"1*{match.group(1)}"
-            logger.info(f"提取规格(入白膜): {text} -> {result}")
-            return result
-            
-        # 尝试所有模式
-        for pattern, replacement in self.spec_patterns:
-            match = re.search(pattern, text)
-            if match:
-                # 特殊处理三级格式，确保正确显示为1*5*12
-                if '*' in replacement and replacement.count('*') == 1 and len(match.groups()) >= 2:
-                    result = f"{match.group(1)}*{match.group(2)}"
-                    logger.info(f"提取规格: {text} -> {result}")
-                    return result
-                # 特殊处理三级规格格式
-                elif '*' in replacement and replacement.count('*') == 2 and len(match.groups()) >= 3:
-                    result = f"{match.group(1)}*{match.group(2)}*{match.group(3)}"
-                    logger.info(f"提取三级规格: {text} -> {result}")
-                    return result
-                # 一般情况
-                else:
-                    result = re.sub(pattern, replacement, text)
-                    logger.info(f"提取规格: {text} -> {result}")
-                    return result
-                
-        # 没有匹配任何模式
-        return None
+        result = spec_parser.extract_specification(text)
+        if result:
+            logger.info(f"提取规格: {text} -> {result}")
+        return result
     
     def infer_specification_from_name(self, name: str) -> Optional[str]:
         """
@@ -204,86 +167,10 @@ class UnitConverter:
         Returns:
             推断的规格，如果无法推断则返回None
         """
-        if not name or not isinstance(name, str):
-            return None
-        
-        # 记录原始商品名称，用于日志
-        original_name = name
-        
-        # 新增模式: 处理重量/容量*数字格式，如"450g*15", "450ml*15"
-        # 忽略重量/容量值，只提取后面的数量作为规格
-        weight_volume_pattern = r'.*?\d+(?:g|ml|毫升|克)[*xX×](\d+)'
-        match = re.search(weight_volume_pattern, name)
-        if match:
-            inferred_spec = f"1*{match.group(1)}"
-            logger.info(f"从名称推断规格(重量/容量*数量): {original_name} -> {inferred_spec}")
-            return inferred_spec
-        
-        # 特殊模式1.1: "xx入白膜" 格式，如"550纯净水24入白膜" -> "1*24"
-        pattern1_1 = r'.*?(\d+)入白膜'
-        match = re.search(pattern1_1, name)
-        if match:
-            inferred_spec = f"1*{match.group(1)}"
-            logger.info(f"从名称推断规格(入白膜): {original_name} -> {inferred_spec}")
-            return inferred_spec
-        
-        # 特殊模式1: "xx入纸箱" 格式，如"445水溶C血橙15入纸箱" -> "1*15"
-        pattern1 = r'.*?(\d+)入纸箱'
-        match = re.search(pattern1, name)
-        if match:
-            inferred_spec = f"1*{match.group(1)}"
-            logger.info(f"从名称推断规格(入纸箱): {original_name} -> {inferred_spec}")
-            return inferred_spec
-        
-        # 特殊模式2: 直接包含规格，如"500-东方树叶-乌龙茶1*15-纸箱装" -> "1*15"
-        pattern2 = r'.*?(\d+)[*xX×](\d+).*'
-        match = re.search(pattern2, name)
-        if match:
-            inferred_spec = f"{match.group(1)}*{match.group(2)}"
-            logger.info(f"从名称推断规格(直接格式): {original_name} -> {inferred_spec}")
-            return inferred_spec
-        
-        # 特殊模式3: "xx纸箱" 格式，如"500茶π蜜桃乌龙15纸箱" -> "1*15"
-        pattern3 = r'.*?(\d+)纸箱'
-        match = re.search(pattern3, name)
-        if match:
-            inferred_spec = f"1*{match.group(1)}"
-            logger.info(f"从名称推断规格(纸箱): {original_name} -> {inferred_spec}")
-            return inferred_spec
-        
-        # 特殊模式4: "xx白膜" 格式，如"1.5L水12白膜" 或 "550水24白膜" -> "1*12" 或 "1*24"
-        pattern4 = r'.*?(\d+)白膜'
-        match = re.search(pattern4, name)
-        if match:
-            inferred_spec = f"1*{match.group(1)}"
-            logger.info(f"从名称推断规格(白膜): {original_name} -> {inferred_spec}")
-            return inferred_spec
-        
-        # 特殊模式5: 容量单位带数量格式 "1.8L*8瓶" -> "1.8L*8"
-        volume_count_pattern = r'.*?([\d\.]+)[Ll升][*×xX](\d+).*'
-        match = re.search(volume_count_pattern, name)
-        if match:
-            volume = match.group(1)
-            count = match.group(2)
-            inferred_spec = f"{volume}L*{count}"
-            logger.info(f"从名称推断规格(容量*数量): {original_name} -> {inferred_spec}")
-            return inferred_spec
-            
-        # 特殊模式6: 简单容量单位如"12.9L桶装水" -> "12.9L*1"
-        simple_volume_pattern = r'.*?([\d\.]+)[Ll升].*'
-        match = re.search(simple_volume_pattern, name)
-        if match:
-            inferred_spec = f"{match.group(1)}L*1"
-            logger.info(f"从名称推断规格(简单容量): {original_name} -> {inferred_spec}")
-            return inferred_spec
-        
-        # 尝试通用模式匹配
-        spec = self.extract_specification(name)
-        if spec:
-            logger.info(f"从名称推断规格(通用模式): {original_name} -> {spec}")
-            return spec
-            
-        return None
+        inferred_spec = spec_parser.infer_spec(name)
+        if inferred_spec:
+            logger.info(f"从名称推断规格: {name} -> {inferred_spec}")
+        return inferred_spec
         
     def parse_specification(self, spec: str) -> Tuple[int, int, Optional[int]]:
         """
@@ -297,76 +184,13 @@ class UnitConverter:
         """
         if not spec or not isinstance(spec, str):
             return 1, 1, None
-            
-        try:
-            # 清理规格字符串，确保格式统一
-            spec = re.sub(r'\s+', '', spec)  # 移除所有空白
-            spec = re.sub(r'[xX×]', '*', spec)  # 统一分隔符为*
-            
-            logger.debug(f"解析规格: {spec}")
-            
-            # 处理三级包装，如1*5*12
-            three_level_match = re.match(r'(\d+)[*](\d+)[*](\d+)', spec)
-            if three_level_match:
-                try:
-                    level1 = int(three_level_match.group(1))
-                    level2 = int(three_level_match.group(2))
-                    level3 = int(three_level_match.group(3))
-                    logger.info(f"解析三级规格: {spec} -> {level1}*{level2}*{level3}")
-                    return level1, level2, level3
-                except ValueError:
-                    pass
-            
-            # 处理带容量单位的规格，如500ml*15, 1L*12等
-            ml_match = re.match(r'(\d+)(?:ml|毫升)[*](\d+)', spec, re.IGNORECASE)
-            if ml_match:
-                try:
-                    # 对于ml单位，使用1作为一级包装，后面的数字作为二级包装
-                    level2 = int(ml_match.group(2))
-                    logger.info(f"解析容量(ml)规格: {spec} -> 1*{level2}")
-                    return 1, level2, None
-                except ValueError:
-                    pass
-            
-            # 处理带L单位的规格，如1L*12等
-            l_match = re.match(r'(\d+(?:\.\d+)?)[Ll升][*](\d+)', spec)
-            if l_match:
-                try:
-                    # 对于L单位，正确提取第二部分作为包装数量
-                    level2 = int(l_match.group(2))
-                    logger.info(f"解析容量(L)规格: {spec} -> 1*{level2}")
-                    return 1, level2, None
-                except ValueError:
-                    pass
-            
-            # 处理二级包装，如1*12
-            two_level_match = re.match(r'(\d+)[*](\d+)', spec)
-            if two_level_match:
-                try:
-                    level1 = int(two_level_match.group(1))
-                    level2 = int(two_level_match.group(2))
-                    logger.info(f"解析二级规格: {spec} -> {level1}*{level2}")
-                    return level1, level2, None
-                except ValueError:
-                    pass
-                
-            # 特殊处理L/升为单位的规格，如12.5L*1
-            volume_match = re.match(r'([\d\.]+)[L升][*xX×](\d+)', spec)
-            if volume_match:
-                try:
-                    volume = float(volume_match.group(1))
-                    quantity = int(volume_match.group(2))
-                    logger.info(f"解析容量规格: {spec} -> {volume}L*{quantity}")
-                    return 1, quantity, None
-                except ValueError:
-                    pass
-            
-            # 默认值
+        
+        result = spec_parser.parse_spec(spec)
+        if result.confidence < spec_parser.CONFIDENCE_EXPLICIT:
             logger.warning(f"无法解析规格: {spec}，使用默认值1*1")
-            return 1, 1, None
-        except Exception as e:
-            logger.error(f"解析规格时出错: {e}")
-            return 1, 1, None
+        else:
+            logger.debug(f"解析规格: {spec} -> {result.levels}")
+        return result.levels
         
     def _process_standard_unit_conversion(self, product: Dict) -> Dict:
         """
@@ -0,0 +1,174 @@
+"""
+采购单汇总库模块
+-------------
+在SQLite数据库中保存每个采购单规范化后的行（条码、采购量、采购单价、赠送量），
+按文件路径、修改时间和内容哈希判断文件是否变化。合并时只需读取新增或变化的采购单，
+其余采购单直接从汇总库取出。
+"""
+
+import os
+import time
+import atexit
+import sqlite3
+import threading
+from typing import Callable, Optional
+
+import pandas as pd
+
+from ..utils.log_utils import get_logger
+from ..utils.file_utils import ensure_dir, get_file_hash
+
+logger = get_logger(__name__)
+
+# 规范化后的采购单列
+COLUMNS = ['条码', '采购量', '采购单价', '赠送量']
+
+# 汇总库版本，表结构或采购单规范化规则（PurchaseOrderMerger._normalize_purchase_order）变化时加1，
+# 与数据库中的版本不一致时清空汇总库，所有采购单重新读取
+STORE_VERSION = 1
+
+class MergeStore:
+    """
+    采购单汇总库
+
+    文件大小和修改时间不变时直接使用已保存的行；修改时间变化但内容哈希相同时只更新修改时间。
+    """
+
+    def __init__(self, db_file: str, hash_func: Optional[Callable[[str], Optional[str]]] = None):
+        """
+        初始化汇总库
+
+        Args:
+            db_file: 数据库文件路径
+            hash_func: 计算文件内容哈希的函数，为None则每次读取文件计算
+        """
+        self.db_file = db_file
+        self.hash_func = hash_func or get_file_hash
+
+        self._lock = threading.RLock()
+        self._conn = self._connect()
+
+        # 进程退出前关闭数据库
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        打开数据库并创建表结构
+
+        Returns:
+            数据库连接
+        """
+        ensure_dir(os.path.dirname(os.path.abspath(self.db_file)))
+        conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS files ('
+            'path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime REAL NOT NULL, '
+            'hash TEXT NOT NULL, row_count INTEGER NOT NULL, ingested_at REAL NOT NULL)'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS rows ('
+            'path TEXT NOT NULL, seq INTEGER NOT NULL, barcode TEXT NOT NULL, '
+            'quantity REAL NOT NULL, price REAL NOT NULL, gift REAL NOT NULL, '
+            'PRIMARY KEY (path, seq))'
+        )
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        if version != STORE_VERSION:
+            if version:
+                logger.info(f"汇总库版本已变化({version} -> {STORE_VERSION})，清空后重新读取采购单")
+            conn.execute('DELETE FROM rows')
+            conn.execute('DELETE FROM files')
+            conn.execute(f'PRAGMA user_version = {STORE_VERSION}')
+        conn.commit()
+        return conn
+
+    def close(self) -> None:
+        """关闭数据库"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get(self, file_path: str) -> Optional[pd.DataFrame]:
+        """
+        获取采购单已保存的规范化行
+
+        Args:
+            file_path: 采购单文件路径
+
+        Returns:
+            规范化行的数据帧，文件未入库、已变化或不存在时返回None
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT size, mtime, hash FROM files WHERE path = ?', (file_path,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            size, mtime, file_hash = row
+            if size != stat.st_size:
+                return None
+            if mtime != stat.st_mtime:
+                # 修改时间变化（例如文件被复制或重新保存），内容相同时仍可使用
+                if self.hash_func(file_path) != file_hash:
+                    return None
+                self._conn.execute('UPDATE files SET mtime = ? WHERE path = ?', (stat.st_mtime, file_path))
+                self._conn.commit()
+
+            rows = self._conn.execute(
+                'SELECT barcode, quantity, price, gift FROM rows WHERE path = ? ORDER BY seq', (file_path,)
+            ).fetchall()
+
+        return pd.DataFrame(rows, columns=COLUMNS)
+
+    def put(self, file_path: str, df: pd.DataFrame) -> None:
+        """
+        保存采购单的规范化行，替换该文件以前的数据
+
+        Args:
+            file_path: 采购单文件路径
+            df: 规范化行，列为 COLUMNS
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return
+        file_hash = self.hash_func(file_path)
+        if file_hash is None:
+            return
+
+        records = [
+            (file_path, seq, barcode, float(quantity), float(price), float(gift))
+            for seq, (barcode, quantity, price, gift) in enumerate(df[COLUMNS].itertuples(index=False))
+        ]
+        with self._lock:
+            with self._conn:
+                self._conn.execute('DELETE FROM rows WHERE path = ?', (file_path,))
+                self._conn.executemany('INSERT INTO rows VALUES (?, ?, ?, ?, ?, ?)', records)
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)',
+                    (file_path, stat.st_size, stat.st_mtime, file_hash, len(records), time.time())
+                )
+
+    def prune(self) -> int:
+        """
+        删除磁盘上已不存在的文件的数据
+
+        Returns:
+            删除的文件数
+        """
+        with self._lock:
+            paths = [row[0] for row in self._conn.execute('SELECT path FROM files')]
+            removed = [path for path in paths if not os.path.exists(path)]
+            if removed:
+                with self._conn:
+                    self._conn.executemany('DELETE FROM rows WHERE path = ?', [(path,) for path in removed])
+                    self._conn.executemany('DELETE FROM files WHERE path = ?', [(path,) for path in removed])
+        return len(removed)
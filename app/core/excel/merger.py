@@ -8,9 +8,7 @@ import os
 import re
 import pandas as pd
 import numpy as np
-import xlrd
-import xlwt
-from xlutils.copy import copy as xlcopy
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Optional, Tuple, Union, Any
 from datetime import datetime
 
@@ -19,14 +17,28 @@ from ..utils.log_utils import get_logger
 from ..utils.file_utils import (
     ensure_dir,
     get_file_extension,
-    get_files_by_extensions,
+    get_file_hash,
     load_json,
     save_json
 )
+from ..utils.dir_index import MERGED_ORDER_PREFIX, DirectoryIndex
 from ..utils.string_utils import (
     clean_string,
     clean_barcode,
-    format_barcode
+    format_barcode,
+    format_barcode_series
+)
+from .reader import read_sheet
+from .table_frame import promote_header
+from .merge_store import COLUMNS as MERGE_COLUMNS, MergeStore
+from .template import (
+    PRICE_FORMAT,
+    QUANTITY_FORMAT,
+    XLS_MAX_ROWS,
+    XLSX_MAX_ROWS,
+    PurchaseOrderTemplate,
+    get_style,
+    write_columns
 )
 
 logger = get_logger(__name__)
@@ -60,6 +72,30 @@ class PurchaseOrderMerger:
             logger.error(f"模板文件不存在: {self.template_path}")
             raise FileNotFoundError(f"模板文件不存在: {self.template_path}")
         
+        # 模板只解析一次，文件修改后自动重新解析
+        self.template = PurchaseOrderTemplate.for_path(self.template_path)
+        
+        # 首选的Excel读取引擎，不可用时自动回退
+        self.excel_reader = self.config.get('File', 'excel_reader', 'auto')
+        
+        # 并行读取采购单的进程数
+        self.max_workers = self.config.getint('Performance', 'merge_workers', 0) or os.cpu_count() or 1
+        
+        # 输出格式（xls或xlsx）和每个文件最多的数据行数，超过时拆分为多个文件
+        self.output_format = self.config.get('Merge', 'output_format', 'xls').strip().lower()
+        if self.output_format not in ('xls', 'xlsx'):
+            logger.warning(f"未知的合并采购单输出格式: {self.output_format}，使用xls")
+            self.output_format = 'xls'
+        self.max_rows_per_file = self.config.getint('Merge', 'max_rows_per_file', 0)
+        
+        # 输出目录索引，增量扫描代替每次完整列目录
+        temp_dir = self.config.get_path('Paths', 'temp_folder', 'data/temp', create=True)
+        self.output_index = DirectoryIndex.for_directory(self.output_dir, os.path.join(temp_dir, 'dir_index'))
+        
+        # 每个采购单规范化后的行保存在汇总库中，合并时只读取新增或变化的文件
+        store_file = self.config.get_path('Cache', 'merge_store_file', 'data/merge_store.db')
+        self.store = MergeStore(store_file, self._file_hash)
+        
         # 用于记录已合并的文件
         self.cache_file = os.path.join(self.output_dir, "merged_files.json")
         self.merged_files = self._load_merged_files()
@@ -88,129 +124,158 @@ class PurchaseOrderMerger:
         """
         logger.info(f"搜索目录 {self.output_dir} 中的采购单Excel文件")
         
-        # 获取所有Excel文件
-        all_files = get_files_by_extensions(self.output_dir, ['.xls', '.xlsx'])
-        
-        # 筛选采购单文件
-        purchase_orders = [
-            file for file in all_files 
-            if os.path.basename(file).startswith('采购单_')
-        ]
+        # 从目录索引获取采购单文件
+        entries = self.output_index.entries('purchase_order')
         
-        if not purchase_orders:
+        if not entries:
             logger.warning(f"未在 {self.output_dir} 目录下找到采购单Excel文件")
             return []
         
         # 按修改时间排序，最新的在前
-        purchase_orders.sort(key=lambda x: os.path.getmtime(x), reverse=True)
+        entries.sort(key=lambda entry: entry.mtime, reverse=True)
+        purchase_orders = [entry.path for entry in entries]
         
         logger.info(f"找到 {len(purchase_orders)} 个采购单Excel文件")
         return purchase_orders
     
-    def read_purchase_order(self, file_path: str) -> Optional[pd.DataFrame]:
+    def _find_header_row(self, raw: pd.DataFrame) -> Optional[int]:
         """
-        读取采购单Excel文件
+        检查第2-6行是否是真正的标题行（第一行为标题等非表头内容时）
         
         Args:
-            file_path: 采购单文件路径
+            raw: 以 header=None 读取的数据
             
         Returns:
-            数据帧，如果读取失败则返回None
+            标题行在以第一行为表头的数据中的行号，第一行就是标题行时返回None
         """
-        try:
-            # 读取Excel文件
-            df = pd.read_excel(file_path)
-            logger.info(f"成功读取采购单文件: {file_path}")
+        header_keywords = ['条码', '条形码', '商品条码', '商品名称', '规格', '单价', '数量', '金额', '单位', '必填']
+        for header_row_idx in range(5):  # 检查前5行
+            if len(raw) - 1 <= header_row_idx:
+                continue
             
-            # 打印列名，用于调试
-            logger.debug(f"Excel文件的列名: {df.columns.tolist()}")
+            potential_header = raw.iloc[header_row_idx + 1]
+            matches = sum(1 for keyword in header_keywords if any(keyword in str(val) for val in potential_header.values))
             
-            # 处理特殊情况：检查是否需要读取指定行作为标题行
-            for header_row_idx in range(5):  # 检查前5行
-                if len(df) <= header_row_idx:
-                    continue
-                
-                potential_header = df.iloc[header_row_idx].astype(str)
-                header_keywords = ['条码', '条形码', '商品条码', '商品名称', '规格', '单价', '数量', '金额', '单位', '必填']
-                matches = sum(1 for keyword in header_keywords if any(keyword in str(val) for val in potential_header.values))
+            if matches >= 3:  # 如果至少匹配3个关键词，认为是表头
+                return header_row_idx
+        
+        return None
+    
+    def _map_columns(self, all_columns: List[Any]) -> Dict[str, Any]:
+        """
+        把实际的列名映射为标准列名
+        
+        Args:
+            all_columns: 实际的列名列表
+            
+        Returns:
+            标准列名 -> 实际列名的字典
+        """
+        # 定义可能的列名映射
+        column_mapping = {
+            '条码': ['条码', '条形码', '商品条码', 'barcode', '商品条形码', '条形码', '商品条码', '商品编码', '商品编号', '条形码', '条码（必填）'],
+            '采购量': ['数量', '采购数量', '购买数量', '采购数量', '订单数量', '采购数量', '采购量（必填）', '采购量', '数量（必填）'],
+            '采购单价': ['单价', '价格', '采购单价', '销售价', '采购单价（必填）', '单价（必填）', '价格（必填）'],
+            '赠送量': ['赠送量', '赠品数量', '赠送数量', '赠品']
+        }
+        
+        # 显示所有列名，用于调试
+        logger.info(f"列名: {all_columns}")
+        
+        # 映射实际的列名
+        mapped_columns = {}
+        for target_col, possible_names in column_mapping.items():
+            for col in all_columns:
+                # 清理列名以进行匹配
+                col_str = str(col).strip()
                 
-                if matches >= 3:  # 如果至少匹配3个关键词，认为是表头
-                    logger.info(f"检测到表头在第 {header_row_idx+1} 行")
-                    
-                    # 使用此行作为列名，数据从下一行开始
-                    header_row = potential_header
-                    data_rows = df.iloc[header_row_idx+1:].reset_index(drop=True)
-                    
-                    # 为每一列分配名称（避免重复的列名）
-                    new_columns = []
-                    for i, col in enumerate(header_row):
-                        col_str = str(col)
-                        if col_str == 'nan' or col_str == 'None' or pd.isna(col):
-                            new_columns.append(f"Col_{i}")
-                        else:
-                            new_columns.append(col_str)
-                    
-                    # 使用新列名创建新的DataFrame
-                    data_rows.columns = new_columns
-                    df = data_rows
-                    logger.debug(f"重新构建的数据帧列名: {df.columns.tolist()}")
+                # 直接匹配整个列名
+                if col_str in possible_names:
+                    mapped_columns[target_col] = col
+                    logger.info(f"直接匹配列名: {col_str} -> {target_col}")
                     break
-            
-            # 定义可能的列名映射
-            column_mapping = {
-                '条码': ['条码', '条形码', '商品条码', 'barcode', '商品条形码', '条形码', '商品条码', '商品编码', '商品编号', '条形码', '条码（必填）'],
-                '采购量': ['数量', '采购数量', '购买数量', '采购数量', '订单数量', '采购数量', '采购量（必填）', '采购量', '数量（必填）'],
-                '采购单价': ['单价', '价格', '采购单价', '销售价', '采购单价（必填）', '单价（必填）', '价格（必填）'],
-                '赠送量': ['赠送量', '赠品数量', '赠送数量', '赠品']
-            }
-            
-            # 显示所有列名，用于调试
-            all_columns = df.columns.tolist()
-            logger.info(f"列名: {all_columns}")
-            
-            # 映射实际的列名
-            mapped_columns = {}
-            for target_col, possible_names in column_mapping.items():
-                for col in all_columns:
-                    # 清理列名以进行匹配
-                    col_str = str(col).strip()
                     
-                    # 直接匹配整个列名
-                    if col_str in possible_names:
+                # 移除列名中的空白字符进行比较
+                clean_col = re.sub(r'\s+', '', col_str)
+                for name in possible_names:
+                    clean_name = re.sub(r'\s+', '', name)
+                    # 完全匹配
+                    if clean_col == clean_name:
                         mapped_columns[target_col] = col
-                        logger.info(f"直接匹配列名: {col_str} -> {target_col}")
+                        logger.info(f"清理后匹配列名: {col_str} -> {target_col}")
                         break
-                        
-                    # 移除列名中的空白字符进行比较
-                    clean_col = re.sub(r'\s+', '', col_str)
+                    # 部分匹配（列名包含关键词）
+                    elif clean_name in clean_col:
+                        mapped_columns[target_col] = col
+                        logger.info(f"部分匹配列名: {col_str} -> {target_col}")
+                        break
+            
+                if target_col in mapped_columns:
+                    break
+                    
+            # 如果没有找到匹配，尝试模糊匹配
+            if target_col not in mapped_columns:
+                for col in all_columns:
+                    col_str = str(col).strip().lower()
                     for name in possible_names:
-                        clean_name = re.sub(r'\s+', '', name)
-                        # 完全匹配
-                        if clean_col == clean_name:
+                        name_lower = name.lower()
+                        if name_lower in col_str:
                             mapped_columns[target_col] = col
-                            logger.info(f"清理后匹配列名: {col_str} -> {target_col}")
+                            logger.info(f"模糊匹配列名: {col} -> {target_col}")
                             break
-                        # 部分匹配（列名包含关键词）
-                        elif clean_name in clean_col:
-                            mapped_columns[target_col] = col
-                            logger.info(f"部分匹配列名: {col_str} -> {target_col}")
-                            break
-                
                     if target_col in mapped_columns:
                         break
-                        
-                # 如果没有找到匹配，尝试模糊匹配
-                if target_col not in mapped_columns:
-                    for col in all_columns:
-                        col_str = str(col).strip().lower()
-                        for name in possible_names:
-                            name_lower = name.lower()
-                            if name_lower in col_str:
-                                mapped_columns[target_col] = col
-                                logger.info(f"模糊匹配列名: {col} -> {target_col}")
-                                break
-                        if target_col in mapped_columns:
-                            break
+        
+        return mapped_columns
+    
+    def read_purchase_order(self, file_path: str) -> Optional[pd.DataFrame]:
+        """
+        读取采购单Excel文件
+        
+        Args:
+            file_path: 采购单文件路径
+            
+        Returns:
+            数据帧，如果读取失败则返回None
+        """
+        try:
+            # 只解析一次工作簿，表头行在内存中提升为列名
+            raw = read_sheet(file_path, self.excel_reader)
+            logger.info(f"成功读取采购单文件: {file_path}")
+            
+            # 处理特殊情况：检查第2-6行是否才是真正的标题行
+            header_row_idx = self._find_header_row(raw)
+            
+            if header_row_idx is None:
+                # 标题行在第一行：按列名确定需要的列，只解析这些列
+                columns = promote_header(raw.iloc[:1], 0).columns.tolist()
+                logger.debug(f"Excel文件的列名: {columns}")
+                mapped_columns = self._map_columns(columns)
+                
+                used_columns = set(mapped_columns.values())
+                df = promote_header(raw, 0, usecols=(lambda col: col in used_columns) if used_columns else None)
+            else:
+                logger.info(f"检测到表头在第 {header_row_idx+1} 行")
+                df = promote_header(raw, 0)
+                
+                # 使用此行作为列名，数据从下一行开始
+                header_row = df.iloc[header_row_idx].astype(str)
+                data_rows = df.iloc[header_row_idx+1:].reset_index(drop=True)
+                
+                # 为每一列分配名称（避免重复的列名）
+                new_columns = []
+                for i, col in enumerate(header_row):
+                    col_str = str(col)
+                    if col_str == 'nan' or col_str == 'None' or pd.isna(col):
+                        new_columns.append(f"Col_{i}")
+                    else:
+                        new_columns.append(col_str)
+                
+                # 使用新列名创建新的DataFrame
+                data_rows.columns = new_columns
+                df = data_rows
+                logger.debug(f"重新构建的数据帧列名: {df.columns.tolist()}")
+                mapped_columns = self._map_columns(df.columns.tolist())
             
             # 如果找到了必要的列，重命名列
             if mapped_columns:
@@ -227,6 +292,105 @@ class PurchaseOrderMerger:
             logger.error(f"读取采购单文件失败: {file_path}, 错误: {str(e)}")
             return None
     
+    def _normalize_purchase_order(self, df: pd.DataFrame, index: int) -> pd.DataFrame:
+        """
+        整理采购单数据：只保留条码、采购量、采购单价、赠送量四列，过滤无效行
+        
+        Args:
+            df: 采购单数据帧
+            index: 文件序号，用于日志
+            
+        Returns:
+            有效行的数据帧，缺少必要的列时返回空数据帧
+        """
+        # 确保必要的列存在
+        required_columns = ['条码', '采购量', '采购单价']
+        missing_columns = [col for col in required_columns if col not in df.columns]
+        
+        if missing_columns:
+            logger.warning(f"数据帧 {index} 缺少必要的列: {missing_columns}")
+            return pd.DataFrame(columns=MERGE_COLUMNS)
+        
+        # 处理赠送量列不存在的情况
+        if '赠送量' not in df.columns:
+            df['赠送量'] = 0
+        
+        # 选择并清理需要的列
+        cleaned_df = pd.DataFrame()
+        
+        # 清理条码 - 确保是字符串且无小数点
+        cleaned_df['条码'] = format_barcode_series(df['条码']).where(df['条码'].notna(), '')
+        
+        # 清理采购量 - 确保是数字
+        cleaned_df['采购量'] = pd.to_numeric(df['采购量'], errors='coerce').fillna(0)
+        
+        # 清理单价 - 确保是数字并保留4位小数
+        cleaned_df['采购单价'] = pd.to_numeric(df['采购单价'], errors='coerce').fillna(0).round(4)
+        
+        # 清理赠送量 - 确保是数字
+        cleaned_df['赠送量'] = pd.to_numeric(df['赠送量'], errors='coerce').fillna(0)
+        
+        # 过滤无效行 - 条码为空或采购量为0的行跳过
+        return cleaned_df[(cleaned_df['条码'] != '') & (cleaned_df['采购量'] > 0)]
+    
+    def _read_normalized_order(self, file_path: str, index: int) -> Optional[pd.DataFrame]:
+        """
+        读取并整理单个采购单
+        
+        Args:
+            file_path: 采购单文件路径
+            index: 文件序号，用于日志
+            
+        Returns:
+            有效行的数据帧，读取失败则返回None
+        """
+        df = self.read_purchase_order(file_path)
+        if df is None:
+            return None
+        return self._normalize_purchase_order(df, index)
+    
+    def read_normalized_orders(self, file_paths: List[str], indexes: Optional[List[int]] = None,
+                               max_workers: Optional[int] = None) -> List[Optional[pd.DataFrame]]:
+        """
+        读取并整理多个采购单，多个文件时在进程池中并行读取
+        
+        子进程只返回整理后的四列数据（条码为字符串，数量、单价、赠送量为数字），
+        原始表格留在子进程中，主进程的内存占用与文件大小无关。
+        
+        Args:
+            file_paths: 采购单文件路径列表
+            indexes: 各文件的序号，用于日志，为None则按列表顺序编号
+            max_workers: 最大进程数，为None则使用配置（默认CPU核数）
+            
+        Returns:
+            有效行的数据帧列表，顺序与输入一致，读取失败的文件为None
+        """
+        if not file_paths:
+            return []
+        if indexes is None:
+            indexes = list(range(len(file_paths)))
+        
+        workers = min(max_workers or self.max_workers, len(file_paths))
+        if workers <= 1:
+            return [self._read_normalized_order(path, i) for path, i in zip(file_paths, indexes)]
+        
+        logger.info(f"并行读取 {len(file_paths)} 个采购单，进程数: {workers}")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(_read_order_in_worker, file_paths, indexes,
+                                     [self.config.config_file] * len(file_paths)))
+    
+    def _file_hash(self, file_path: str) -> Optional[str]:
+        """
+        获取文件内容哈希，输出目录中的文件使用目录索引中已计算的哈希
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            十六进制哈希，读取失败时返回None
+        """
+        return self.output_index.get_hash(file_path) or get_file_hash(file_path)
+    
     def merge_purchase_orders(self, file_paths: List[str]) -> Optional[pd.DataFrame]:
         """
         合并多个采购单文件
@@ -241,59 +405,31 @@ class PurchaseOrderMerger:
             logger.warning("没有需要合并的采购单文件")
             return None
         
-        # 读取所有采购单文件
-        dfs = []
-        for file_path in file_paths:
-            df = self.read_purchase_order(file_path)
-            if df is not None:
-                dfs.append(df)
+        # 已入库且未变化的采购单直接使用汇总库中的行，只读取新增或变化的文件
+        valid_dfs = [self.store.get(file_path) for file_path in file_paths]
+        pending = [i for i, valid_df in enumerate(valid_dfs) if valid_df is None]
         
-        if not dfs:
-            logger.warning("没有成功读取的采购单文件")
-            return None
+        ingested = 0
+        for i, valid_df in zip(pending, self.read_normalized_orders([file_paths[i] for i in pending], pending)):
+            if valid_df is not None:
+                self.store.put(file_paths[i], valid_df)
+                ingested += 1
+            valid_dfs[i] = valid_df
+        # 保存本次计算的内容哈希，下次运行不必重新读取文件
+        self.output_index.save()
         
-        # 合并数据
-        logger.info(f"开始合并 {len(dfs)} 个采购单文件")
-        
-        # 首先，整理每个数据帧以确保它们有相同的结构
         processed_dfs = []
-        for i, df in enumerate(dfs):
-            # 确保必要的列存在
-            required_columns = ['条码', '采购量', '采购单价']
-            missing_columns = [col for col in required_columns if col not in df.columns]
-            
-            if missing_columns:
-                logger.warning(f"数据帧 {i} 缺少必要的列: {missing_columns}")
+        for i, valid_df in enumerate(valid_dfs):
+            if valid_df is None:
                 continue
-            
-            # 处理赠送量列不存在的情况
-            if '赠送量' not in df.columns:
-                df['赠送量'] = 0
-            
-            # 选择并清理需要的列
-            cleaned_df = pd.DataFrame()
-            
-            # 清理条码 - 确保是字符串且无小数点
-            cleaned_df['条码'] = df['条码'].apply(lambda x: format_barcode(x) if pd.notna(x) else '')
-            
-            # 清理采购量 - 确保是数字
-            cleaned_df['采购量'] = pd.to_numeric(df['采购量'], errors='coerce').fillna(0)
-            
-            # 清理单价 - 确保是数字并保留4位小数
-            cleaned_df['采购单价'] = pd.to_numeric(df['采购单价'], errors='coerce').fillna(0).round(4)
-            
-            # 清理赠送量 - 确保是数字
-            cleaned_df['赠送量'] = pd.to_numeric(df['赠送量'], errors='coerce').fillna(0)
-            
-            # 过滤无效行 - 条码为空或采购量为0的行跳过
-            valid_df = cleaned_df[(cleaned_df['条码'] != '') & (cleaned_df['采购量'] > 0)]
-            
             if len(valid_df) > 0:
                 processed_dfs.append(valid_df)
                 logger.info(f"处理文件 {i+1}: 有效记录 {len(valid_df)} 行")
             else:
                 logger.warning(f"处理文件 {i+1}: 没有有效记录")
         
+        logger.info(f"开始合并 {len(file_paths)} 个采购单文件，其中新读取 {ingested} 个")
+        
         if not processed_dfs:
             logger.warning("没有有效的数据帧用于合并")
             return None
@@ -324,16 +460,49 @@ class PurchaseOrderMerger:
         """
         创建合并的采购单文件，完全按照银豹格式要求
         
+        行数超过单个文件的上限时按条码顺序拆分为多个分片文件，分片列表保存在同名的清单文件中。
+        
         Args:
             df: 合并后的数据帧
             
         Returns:
-            输出文件路径，如果创建失败则返回None
+            输出文件路径（拆分时为第一个分片），如果创建失败则返回None
+        """
+        manifest = self.write_merged_shards(df)
+        if manifest is None:
+            return None
+        return manifest['shards'][0]['file']
+    
+    def _shard_rows(self, data_start_row: int) -> int:
+        """
+        获取每个输出文件最多的数据行数
+        
+        Args:
+            data_start_row: 第一行数据的行号
+            
+        Returns:
+            配置的上限与输出格式行数上限中较小的一个
+        """
+        format_limit = (XLSX_MAX_ROWS if self.output_format == 'xlsx' else XLS_MAX_ROWS) - data_start_row
+        if self.max_rows_per_file > 0:
+            return min(self.max_rows_per_file, format_limit)
+        return format_limit
+    
+    def write_merged_shards(self, df: pd.DataFrame) -> Optional[Dict[str, Any]]:
+        """
+        按银豹格式输出合并的采购单，超过行数上限时拆分为多个有序的分片，并保存分片清单
+        
+        Args:
+            df: 合并后的数据帧（已按条码排序）
+            
+        Returns:
+            分片清单：{created_at: 创建时间, format: 输出格式, rows: 总行数, max_rows_per_file: 每个文件最多行数,
+            shards: [{file: 文件路径, rows: 行数, first_barcode: 第一个条码, last_barcode: 最后一个条码}]}，
+            如果创建失败则返回None
         """
         try:
-            # 打开模板文件
-            template_workbook = xlrd.open_workbook(self.template_path, formatting_info=True)
-            template_sheet = template_workbook.sheet_by_index(0)
+            # 已解析的模板
+            template_sheet = self.template.sheet
             
             # 首先分析模板结构，确定关键列的位置
             logger.info(f"分析模板结构")
@@ -354,45 +523,73 @@ class PurchaseOrderMerger:
             # 找到数据开始行 - 通常是第二行(索引1)
             data_start_row = 1
             
-            # 创建可写的副本
-            output_workbook = xlcopy(template_workbook)
-            output_sheet = output_workbook.get_sheet(0)
-            
-            # 设置单价的格式样式（保留4位小数）
-            price_style = xlwt.XFStyle()
-            price_style.num_format_str = '0.0000'
+            # 单价的格式样式（保留4位小数）
+            price_style = get_style(PRICE_FORMAT)
             
             # 数量格式
-            quantity_style = xlwt.XFStyle()
-            quantity_style.num_format_str = '0'
+            quantity_style = get_style(QUANTITY_FORMAT)
             
-            # 遍历数据并填充到Excel
-            for i, (_, row) in enumerate(df.iterrows()):
-                r = data_start_row + i
-                
-                # 只填充银豹采购单格式要求的4个列：条码、采购量、赠送量、采购单价
-                
-                # 条码（必填）- B列(1)
-                output_sheet.write(r, barcode_col, row['条码'])
-                
-                # 采购量（必填）- C列(2)
-                output_sheet.write(r, quantity_col, float(row['采购量']), quantity_style)
-                
-                # 赠送量 - D列(3)
-                if pd.notna(row['赠送量']) and float(row['赠送量']) > 0:
-                    output_sheet.write(r, gift_col, float(row['赠送量']), quantity_style)
-                
-                # 采购单价（必填）- E列(4)
-                output_sheet.write(r, price_col, float(row['采购单价']), price_style)
+            # 只填充银豹采购单格式要求的4个列：条码、采购量、赠送量、采购单价；赠送量只填大于0的值
+            barcodes = df['条码'].to_numpy(dtype=object)
+            gifts = pd.to_numeric(df['赠送量'], errors='coerce').to_numpy(dtype=float)
+            columns = [
+                (barcode_col, barcodes, None),
+                (quantity_col, df['采购量'].to_numpy(dtype=float), quantity_style),
+                (gift_col, np.where(gifts > 0, gifts, np.nan), quantity_style),
+                (price_col, df['采购单价'].to_numpy(dtype=float), price_style)
+            ]
+            
+            # 按行数上限拆分，数据行数为0时也输出一个文件
+            shard_rows = self._shard_rows(data_start_row)
+            total = len(df)
+            starts = list(range(0, total, shard_rows)) or [0]
+            if len(starts) > 1:
+                logger.info(f"合并采购单共 {total} 行，超过每个文件 {shard_rows} 行的上限，拆分为 {len(starts)} 个文件")
             
             # 生成输出文件名
             timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-            output_file = os.path.join(self.output_dir, f"合并采购单_{timestamp}.xls")
+            base_name = os.path.join(self.output_dir, f"{MERGED_ORDER_PREFIX}{timestamp}")
+            extension = '.xlsx' if self.output_format == 'xlsx' else '.xls'
             
-            # 保存文件
-            output_workbook.save(output_file)
-            logger.info(f"合并采购单已保存到: {output_file}，共{len(df)}条记录")
-            return output_file
+            shards = []
+            for number, begin in enumerate(starts, 1):
+                end = min(begin + shard_rows, total)
+                shard_columns = [(col_index, values[begin:end], style) for col_index, values, style in columns]
+                if len(starts) == 1:
+                    output_file = f"{base_name}{extension}"
+                else:
+                    output_file = f"{base_name}_{number:0{len(str(len(starts)))}d}{extension}"
+                
+                # 保存文件
+                if self.output_format == 'xlsx':
+                    stats = self.template.save_xlsx(output_file, shard_columns, start_row=data_start_row)
+                else:
+                    # 创建可写的副本
+                    output_workbook, output_sheet = self.template.new_workbook()
+                    stats = write_columns(output_sheet, shard_columns, start_row=data_start_row)
+                    output_workbook.save(output_file)
+                logger.info(f"合并采购单已保存到: {output_file}，共{end - begin}条记录，"
+                            f"写入耗时 {stats['seconds']:.3f} 秒，{stats['rows_per_second']:.0f} 行/秒")
+                
+                shards.append({
+                    'file': output_file,
+                    'rows': end - begin,
+                    'first_barcode': barcodes[begin] if end > begin else None,
+                    'last_barcode': barcodes[end - 1] if end > begin else None
+                })
+            
+            # 保存分片清单
+            manifest = {
+                'created_at': datetime.now().isoformat(timespec='seconds'),
+                'format': self.output_format,
+                'rows': total,
+                'max_rows_per_file': shard_rows,
+                'shards': shards
+            }
+            manifest_file = f"{base_name}.json"
+            if save_json(manifest, manifest_file):
+                logger.info(f"分片清单已保存到: {manifest_file}")
+            return manifest
             
         except Exception as e:
             logger.error(f"创建合并采购单时出错: {e}")
@@ -411,6 +608,10 @@ class PurchaseOrderMerger:
         # 如果未指定文件路径，则获取所有采购单文件
         if file_paths is None:
             file_paths = self.get_purchase_orders()
+            # 删除汇总库中已不存在的采购单
+            removed = self.store.prune()
+            if removed:
+                logger.info(f"已从汇总库删除 {removed} 个不存在的采购单")
         
         # 检查是否有文件需要合并
         if not file_paths:
@@ -434,4 +635,24 @@ class PurchaseOrderMerger:
             self.merged_files[file_path] = output_file
         self._save_merged_files()
         
-        return output_file 
\ No newline at end of file
+        return output_file
+
+# 子进程中复用的合并器，每个进程只初始化一次
+_worker_merger: Optional[PurchaseOrderMerger] = None
+
+def _read_order_in_worker(file_path: str, index: int, config_file: str) -> Optional[pd.DataFrame]:
+    """
+    在进程池的子进程中读取并整理单个采购单
+    
+    Args:
+        file_path: 采购单文件路径
+        index: 文件序号，用于日志
+        config_file: 配置文件路径
+        
+    Returns:
+        有效行的数据帧，读取失败则返回None
+    """
+    global _worker_merger
+    if _worker_merger is None:
+        _worker_merger = PurchaseOrderMerger(ConfigManager(config_file))
+    return _worker_merger._read_normalized_order(file_path, index)
@@ -6,30 +6,42 @@ Excel处理核心模块
 
 import os
 import re
+import time
 import pandas as pd
 import numpy as np
-import xlrd
-import xlwt
-from xlutils.copy import copy as xlcopy
 from typing import Dict, List, Optional, Tuple, Union, Any
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 
 from ...config.settings import ConfigManager
 from ..utils.log_utils import get_logger
 from ..utils.file_utils import (
     ensure_dir,
     get_file_extension,
-    get_latest_file,
     load_json,
     save_json
 )
+from ..utils.dir_index import MERGED_ORDER_PREFIX, PURCHASE_ORDER_PREFIX, DirectoryIndex
+from ..utils import memo
+from ..utils.spec_parser import (
+    CONTAINER_COUNT,
+    SIMPLE_COUNT,
+    VOLUME_COUNT,
+    WEIGHT_COUNT,
+    guess_spec,
+    parse_spec
+)
 from ..utils.string_utils import (
     clean_string,
     clean_barcode,
     extract_number,
-    format_barcode
+    format_barcode,
+    format_barcode_series
 )
 from .converter import UnitConverter
+from .reader import read_sheet
+from .table_frame import promote_header, tables_to_dataframe
+from .template import PRICE_FORMAT, PurchaseOrderTemplate, get_style, write_columns
 
 logger = get_logger(__name__)
 
@@ -64,9 +76,29 @@ class ExcelProcessor:
             logger.error(f"模板文件不存在: {self.template_path}")
             raise FileNotFoundError(f"模板文件不存在: {self.template_path}")
         
+        # 模板只解析一次，文件修改后自动重新解析
+        self.template = PurchaseOrderTemplate.for_path(self.template_path)
+        
+        # 首选的Excel读取引擎，不可用时自动回退
+        self.excel_reader = self.config.get('File', 'excel_reader', 'auto')
+        
+        # 规格推断和单位提取的记忆化缓存，并从上次运行保存的预热文件加载
+        memo.configure(
+            self.config.getint('Cache', 'spec_memo_size', memo.DEFAULT_MAXSIZE),
+            self.config.get('Cache', 'spec_memo_file', 'data/spec_memo.json').strip() or None
+        )
+        
+        # 输出目录索引，增量扫描代替每次完整列目录
+        self.output_index = DirectoryIndex.for_directory(self.output_dir, os.path.join(self.temp_dir, 'dir_index'))
+        
         # 用于记录已处理的文件
         self.cache_file = os.path.join(self.output_dir, "processed_files.json")
         self.processed_files = self._load_processed_files()
+        # 批量处理的子进程不写处理记录，由主进程汇总后统一保存
+        self.record_processed = True
+        
+        # 批量处理的进程数，0表示CPU核数
+        self.max_workers = self.config.getint('Performance', 'excel_workers', 0) or os.cpu_count() or 1
         
         # 创建单位转换器
         self.unit_converter = UnitConverter()
@@ -95,21 +127,18 @@ class ExcelProcessor:
         """
         logger.info(f"搜索目录 {self.output_dir} 中的Excel文件")
         
-        # 使用文件工具获取最新文件
-        latest_file = get_latest_file(
-            self.output_dir,
-            pattern="",  # 不限制文件名
-            extensions=['.xlsx', '.xls']  # 限制为Excel文件
-        )
+        # 从目录索引获取最新的Excel文件（包括采购单）
+        latest_entry = self.output_index.latest(extensions=['.xlsx', '.xls'])
         
         # 如果没有找到文件
-        if not latest_file:
+        if not latest_entry:
             logger.warning(f"未在 {self.output_dir} 目录下找到未处理的Excel文件")
             return None
         
+        latest_file = latest_entry.path
+        
         # 检查是否是采购单（以"采购单_"开头的文件）
-        file_name = os.path.basename(latest_file)
-        if file_name.startswith('采购单_'):
+        if latest_entry.kind == 'purchase_order':
             logger.warning(f"找到的最新文件是采购单，不作处理: {latest_file}")
             return None
         
@@ -208,163 +237,389 @@ class ExcelProcessor:
         
         return found_columns
     
-    def extract_product_info(self, df: pd.DataFrame) -> List[Dict]:
+    def extract_product_info(self, df: pd.DataFrame, column_mapping: Optional[Dict[str, str]] = None) -> List[Dict]:
         """
         从处理后的数据框中提取商品信息
         支持处理不同格式的Excel文件
         
+        条码、数量、单价、单位和规格按整列处理；需要复杂回退逻辑的少数行
+        （从数量中提取单位、特殊条码、无法直接转换的数值等）逐行处理，结果与逐行处理一致。
+        
         Args:
             df: 数据框
+            column_mapping: 已按表头识别的列名映射，为None则从数据框中检测
             
         Returns:
             商品信息列表，每个商品为一个字典
         """
-        products = []
-        
         # 检测表头位置和数据格式
-        column_mapping = self._detect_column_mapping(df)
-        logger.info(f"列名映射结果: {column_mapping}")
+        if column_mapping is None:
+            column_mapping = self._detect_column_mapping(df)
+            logger.info(f"列名映射结果: {column_mapping}")
         
         # 检查是否有规格列
         has_specification_column = '规格' in df.columns
         logger.info(f"是否存在规格列: {has_specification_column}")
         
-        # 处理每一行数据
-        for idx, row in df.iterrows():
+        if not column_mapping.get('barcode') or df.empty:
+            logger.info("提取到 0 个商品信息")
+            return []
+        
+        n = len(df)
+        
+        # 条码：跳过空值，数值和科学计数法转换为不带小数点的字符串
+        barcode_values = df[column_mapping['barcode']]
+        barcode_text = self._column_text(barcode_values)
+        skip = (
+            barcode_values.isna().to_numpy()
+            | (barcode_values.astype(object) == '').to_numpy()
+            | barcode_text.str.strip().isin(['nan', 'None']).to_numpy()
+        )
+        barcode = format_barcode_series(barcode_values).reset_index(drop=True)
+        residual = np.zeros(n, dtype=bool)
+        
+        # 数量：提取第一个数字，没有数字时为0
+        quantity_str = pd.Series([''] * n, dtype=object)
+        quantity = np.zeros(n)
+        has_quantity = np.zeros(n, dtype=bool)
+        if column_mapping.get('quantity'):
+            values = df[column_mapping['quantity']]
+            quantity_str = self._column_text(values).where(values.notna().to_numpy(), '')
+            numbers = quantity_str.str.extract(r'(-?\d+(?:\.\d+)?)', expand=False)
+            has_quantity = numbers.notna().to_numpy()
+            quantity[has_quantity] = numbers[has_quantity].to_numpy(dtype=object).astype(np.float64)
+        
+        name = self._column_text(df[column_mapping['name']]) if column_mapping.get('name') else pd.Series([''] * n, dtype=object)
+        
+        unit = pd.Series([''] * n, dtype=object)
+        if column_mapping.get('unit'):
+            values = df[column_mapping['unit']]
+            unit = self._column_text(values).where(values.notna().to_numpy(), '')
+            unit = unit.where(~unit.isin(['nan', 'None']), '')
+        
+        # 单价：清理换行符、空格并替换逗号，float无法直接转换的留给逐行处理
+        price = np.zeros(n)
+        has_price = np.zeros(n, dtype=bool)
+        if column_mapping.get('price'):
+            values = df[column_mapping['price']]
+            present = values.notna().to_numpy()
+            cleaned = (self._column_text(values).str.replace('\n', '', regex=False)
+                       .str.replace(' ', '', regex=False).str.replace(',', '.', regex=False))
+            has_price = present & pd.to_numeric(cleaned, errors='coerce').notna().to_numpy()
             try:
-                # 条码处理 - 确保条码总是字符串格式且不带小数点
-                barcode_raw = row[column_mapping['barcode']] if column_mapping.get('barcode') else ''
-                if pd.isna(barcode_raw) or barcode_raw == '' or str(barcode_raw).strip() in ['nan', 'None']:
-                    continue
-                
-                # 使用format_barcode函数处理条码，确保无小数点
-                barcode = format_barcode(barcode_raw)
-                
-                # 处理数量字段，先提取数字部分再转换为浮点数
-                quantity_value = 0
-                quantity_str = ""
-                if column_mapping.get('quantity') and not pd.isna(row[column_mapping['quantity']]):
-                    quantity_str = str(row[column_mapping['quantity']])
-                    # 使用提取数字的函数
-                    quantity_num = extract_number(quantity_str)
-                    if quantity_num is not None:
-                        quantity_value = quantity_num
-                
-                # 基础信息
-                product = {
-                    'barcode': barcode,
-                    'name': str(row[column_mapping['name']]) if column_mapping.get('name') else '',
-                    'quantity': quantity_value,
-                    'price': 0,
-                    'unit': str(row[column_mapping['unit']]) if column_mapping.get('unit') and not pd.isna(row[column_mapping['unit']]) else '',
-                    'specification': '',
-                    'package_quantity': None
-                }
-                
-                # 处理价格字段 - 清理可能的换行符和空格
-                if column_mapping.get('price') and not pd.isna(row[column_mapping['price']]):
-                    price_str = str(row[column_mapping['price']])
-                    # 清理换行符、空格并替换逗号
-                    price_str = price_str.replace('\n', '').replace(' ', '').replace(',', '.')
-                    try:
-                        product['price'] = float(price_str)
-                    except ValueError:
-                        logger.warning(f"价格转换失败，原始值: '{price_str}'，使用默认值0")
-                
-                # 清理单位
-                if product['unit'] == 'nan' or product['unit'] == 'None':
-                    product['unit'] = ''
-                
-                # 打印每行提取出的信息
-                logger.info(f"第{idx+1}行: 提取商品信息 条码={product['barcode']}, 名称={product['name']}, 规格={product['specification']}, 数量={product['quantity']}, 单位={product['unit']}, 单价={product['price']}")
-                
-                # 从数量字段中提取单位（如果单位字段为空）
-                if not product['unit'] and quantity_str:
-                    num, unit = self.unit_converter.extract_unit_from_quantity(quantity_str)
-                    if unit:
-                        product['unit'] = unit
-                        logger.info(f"从数量提取单位: {quantity_str} -> {unit}")
-                        # 如果数量被提取出来，更新数量
-                        if num is not None:
-                            product['quantity'] = num
-                
-                # 提取规格并解析包装数量
-                if '规格' in df.columns and not pd.isna(row['规格']):
-                    product['specification'] = str(row['规格'])
-                    package_quantity = self.parse_specification(product['specification'])
-                    if package_quantity:
-                        product['package_quantity'] = package_quantity
-                        logger.info(f"解析规格: {product['specification']} -> 包装数量={package_quantity}")
-                else:
-                    # 逻辑1: 如果规格为空，尝试从商品名称推断规格
-                    if product['name']:
-                        # 特殊处理：优先检查名称中是否包含"容量*数量"格式
-                        container_pattern = r'.*?(\d+(?:\.\d+)?)\s*(?:ml|[mM][lL]|[lL]|升|毫升)[*×xX](\d+).*'
-                        match = re.search(container_pattern, product['name'])
+                price[has_price] = cleaned[has_price].to_numpy(dtype=object).astype(np.float64)
+            except ValueError:
+                has_price[:] = False
+            residual |= present & ~has_price
+        
+        # 单位为空且数量中带有非数字字符时，可能需要从数量中提取单位
+        residual |= ((unit == '') & quantity_str.str.contains(r'[^\d\s.]', regex=True)).to_numpy()
+        
+        # 特殊条码有各自的换算规则
+        residual |= barcode.isin(list(self.unit_converter.special_barcodes)).to_numpy()
+        
+        specification, package_quantity = self._infer_specification_column(df, name, has_specification_column)
+        
+        # 根据规格推断单位为"件"
+        has_spec = (specification != '').to_numpy()
+        infer_piece = (unit == '').to_numpy() & (barcode != '').to_numpy() & has_spec & (quantity != 0)
+        piece_spec = (specification.str.contains(VOLUME_COUNT.pattern, regex=True)
+                      | specification.str.contains(SIMPLE_COUNT.pattern, regex=True)).to_numpy()
+        unit = unit.where(~(infer_piece & piece_spec), '件')
+        
+        # 应用单位转换规则：件/箱按包装数量换算为瓶，提/盒仅三级规格换算
+        convert_candidates = (barcode != '').to_numpy() & (quantity != 0) & has_spec
+        packaging = np.ones(n)
+        convert = np.zeros(n, dtype=bool)
+        if convert_candidates.any():
+            levels = self._map_unique(specification[convert_candidates], self.unit_converter.parse_specification)
+            level2 = np.array([level[1] for level in levels], dtype=np.float64)
+            level3 = np.array([level[2] or 0 for level in levels], dtype=np.float64)
+            has_level3 = np.array([level[2] is not None for level in levels], dtype=bool)
+            
+            candidate_unit = unit[convert_candidates].to_numpy()
+            is_case = np.isin(candidate_unit, ['件', '箱'])
+            is_pack = np.isin(candidate_unit, ['提', '盒']) & has_level3
+            
+            packaging[convert_candidates] = np.where(is_case, level2 * np.where(level3 != 0, level3, 1), level3)
+            convert[convert_candidates] = is_case | is_pack
+        
+        # 包装数量为0时单价换算会出错，保持原有的逐行处理结果
+        residual |= convert & (packaging == 0)
+        
+        converted_quantity = np.where(convert, quantity * packaging, quantity)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            converted_price = np.where(convert, price / packaging, price)
+        # 未提供单价，或换算时单价为0，结果为整数0
+        price_zero = ~has_price | (convert & (price == 0))
+        unit = unit.where(~convert, '瓶')
+        
+        rows = zip(
+            df.index, barcode.tolist(), name.tolist(), converted_quantity.tolist(), has_quantity.tolist(),
+            converted_price.tolist(), price_zero.tolist(), unit.tolist(),
+            specification.tolist(), package_quantity.tolist(), skip.tolist(), residual.tolist()
+        )
+        # 逐行处理的行与 df.iterrows() 取值方式一致
+        row_values = df.values if residual.any() else None
+        products = []
+        residual_count = 0
+        for pos, (idx, row_barcode, row_name, row_quantity, row_has_quantity, row_price, row_price_zero,
+                  row_unit, row_spec, row_package_quantity, row_skip, row_residual) in enumerate(rows):
+            if row_skip:
+                continue
+            
+            if row_residual:
+                residual_count += 1
+                row = pd.Series(row_values[pos], index=df.columns, name=idx)
+                product = self._extract_product_from_row(idx, row, column_mapping, has_specification_column)
+                if product is not None:
+                    products.append(product)
+                continue
+            
+            products.append({
+                'barcode': row_barcode,
+                'name': row_name,
+                'quantity': row_quantity if row_has_quantity else 0,
+                'price': 0 if row_price_zero else row_price,
+                'unit': row_unit,
+                'specification': row_spec,
+                'package_quantity': row_package_quantity
+            })
+        
+        logger.info(f"提取到 {len(products)} 个商品信息（其中逐行处理 {residual_count} 行）")
+        return products
+    
+    @staticmethod
+    def _column_text(values: pd.Series) -> pd.Series:
+        """
+        把一列数据转换为字符串，与逐个调用 str() 的结果一致（空值为"nan"）
+        
+        Args:
+            values: 数据列
+            
+        Returns:
+            字符串列，索引为从0开始的位置
+        """
+        return pd.Series(np.asarray(values, dtype=object).astype(str), dtype=object)
+    
+    @staticmethod
+    def _map_unique(values: pd.Series, func) -> List[Any]:
+        """
+        对一列中的每个不同取值只调用一次函数，再按位置展开结果
+        
+        Args:
+            values: 数据列
+            func: 处理单个取值的函数
+            
+        Returns:
+            与数据列等长的结果列表
+        """
+        codes, uniques = pd.factorize(values)
+        results = [func(value) for value in uniques]
+        return [results[code] for code in codes]
+    
+    def _infer_specification_column(self, df: pd.DataFrame, name: pd.Series,
+                                     has_specification_column: bool) -> Tuple[pd.Series, pd.Series]:
+        """
+        整列确定规格和包装数量：有规格列时使用规格列，否则从商品名称推断
+        
+        Args:
+            df: 数据框
+            name: 商品名称列的字符串形式
+            has_specification_column: 是否存在规格列
+            
+        Returns:
+            (规格列, 包装数量列)元组，规格为空时为空字符串，包装数量无法确定时为None
+        """
+        n = len(df)
+        specification = pd.Series([''] * n, dtype=object)
+        package_quantity = pd.Series([None] * n, dtype=object)
+        
+        def parse(spec: str) -> Optional[int]:
+            return self.parse_specification(spec) or None
+        
+        from_column = np.zeros(n, dtype=bool)
+        if has_specification_column:
+            from_column = df['规格'].notna().to_numpy()
+            if from_column.any():
+                specification[from_column] = self._column_text(df['规格'])[from_column]
+                package_quantity[from_column] = self._map_unique(specification[from_column], parse)
+        
+        # 逻辑1: 如果规格为空，尝试从商品名称推断规格
+        from_name = ~from_column & (name != '').to_numpy()
+        if from_name.any():
+            names = name[from_name]
+            
+            # 容量单位*数量格式，如"1.8L*8瓶"，取数量部分作为包装数量
+            container = names.str.extract(CONTAINER_COUNT.pattern)
+            matched = container[1].notna()
+            index = matched[matched].index
+            specification[index] = container[0][matched] + 'L*' + container[1][matched]
+            package_quantity[index] = container[1][matched].map(int)
+            
+            # 重量/容量*数字格式
+            rest = names[~matched]
+            weight = rest.str.extract(WEIGHT_COUNT.pattern, expand=False)
+            matched = weight.notna()
+            index = matched[matched].index
+            specification[index] = '1*' + weight[matched]
+            package_quantity[index] = weight[matched].map(int)
+            
+            # 一般情况的规格推断
+            rest = rest[~matched]
+            if len(rest):
+                inferred = pd.Series(
+                    self._map_unique(rest, self.unit_converter.infer_specification_from_name),
+                    index=rest.index, dtype=object
+                )
+                inferred = inferred[inferred.map(bool)]
+                if len(inferred):
+                    specification[inferred.index] = inferred
+                    package_quantity[inferred.index] = self._map_unique(inferred, parse)
+        
+        # 检查已设置的规格但未设置包装数量的情况
+        missing = (specification != '') & ~package_quantity.map(bool)
+        if missing.any():
+            reparsed = pd.Series(self._map_unique(specification[missing], parse),
+                                 index=specification[missing].index, dtype=object)
+            reparsed = reparsed[reparsed.notna()]
+            package_quantity[reparsed.index] = reparsed
+        
+        return specification, package_quantity
+    
+    def _extract_product_from_row(self, idx: Any, row: pd.Series, column_mapping: Dict[str, str],
+                                  has_specification_column: bool) -> Optional[Dict]:
+        """
+        逐行提取单个商品信息，用于需要复杂回退逻辑的行
+        
+        Args:
+            idx: 行索引
+            row: 行数据
+            column_mapping: 列名映射
+            has_specification_column: 是否存在规格列
+            
+        Returns:
+            商品信息字典，条码为空或处理出错时返回None
+        """
+        try:
+            # 条码处理 - 确保条码总是字符串格式且不带小数点
+            barcode_raw = row[column_mapping['barcode']] if column_mapping.get('barcode') else ''
+            if pd.isna(barcode_raw) or barcode_raw == '' or str(barcode_raw).strip() in ['nan', 'None']:
+                return None
+            
+            # 使用format_barcode函数处理条码，确保无小数点
+            barcode = format_barcode(barcode_raw)
+            
+            # 处理数量字段，先提取数字部分再转换为浮点数
+            quantity_value = 0
+            quantity_str = ""
+            if column_mapping.get('quantity') and not pd.isna(row[column_mapping['quantity']]):
+                quantity_str = str(row[column_mapping['quantity']])
+                # 使用提取数字的函数
+                quantity_num = extract_number(quantity_str)
+                if quantity_num is not None:
+                    quantity_value = quantity_num
+            
+            # 基础信息
+            product = {
+                'barcode': barcode,
+                'name': str(row[column_mapping['name']]) if column_mapping.get('name') else '',
+                'quantity': quantity_value,
+                'price': 0,
+                'unit': str(row[column_mapping['unit']]) if column_mapping.get('unit') and not pd.isna(row[column_mapping['unit']]) else '',
+                'specification': '',
+                'package_quantity': None
+            }
+            
+            # 处理价格字段 - 清理可能的换行符和空格
+            if column_mapping.get('price') and not pd.isna(row[column_mapping['price']]):
+                price_str = str(row[column_mapping['price']])
+                # 清理换行符、空格并替换逗号
+                price_str = price_str.replace('\n', '').replace(' ', '').replace(',', '.')
+                try:
+                    product['price'] = float(price_str)
+                except ValueError:
+                    logger.warning(f"价格转换失败，原始值: '{price_str}'，使用默认值0")
+            
+            # 清理单位
+            if product['unit'] == 'nan' or product['unit'] == 'None':
+                product['unit'] = ''
+            
+            # 打印每行提取出的信息
+            logger.debug(f"第{idx+1}行: 提取商品信息 条码={product['barcode']}, 名称={product['name']}, 规格={product['specification']}, 数量={product['quantity']}, 单位={product['unit']}, 单价={product['price']}")
+            
+            # 从数量字段中提取单位（如果单位字段为空）
+            if not product['unit'] and quantity_str:
+                num, unit = self.unit_converter.extract_unit_from_quantity(quantity_str)
+                if unit:
+                    product['unit'] = unit
+                    logger.info(f"从数量提取单位: {quantity_str} -> {unit}")
+                    # 如果数量被提取出来，更新数量
+                    if num is not None:
+                        product['quantity'] = num
+            
+            # 提取规格并解析包装数量
+            if has_specification_column and not pd.isna(row['规格']):
+                product['specification'] = str(row['规格'])
+                package_quantity = self.parse_specification(product['specification'])
+                if package_quantity:
+                    product['package_quantity'] = package_quantity
+                    logger.info(f"解析规格: {product['specification']} -> 包装数量={package_quantity}")
+            else:
+                # 逻辑1: 如果规格为空，尝试从商品名称推断规格
+                if product['name']:
+                    # 特殊处理：优先检查名称中是否包含"容量*数量"格式
+                    match = CONTAINER_COUNT.search(product['name'])
+                    if match:
+                        # 容量单位*数量格式，如"1.8L*8瓶"，取数量部分作为包装数量
+                        volume = match.group(1)
+                        count = match.group(2)
+                        inferred_spec = f"{volume}L*{count}"
+                        inferred_qty = int(count)
+                        product['specification'] = inferred_spec
+                        product['package_quantity'] = inferred_qty
+                        logger.info(f"从商品名称提取容量*数量格式: {product['name']} -> {inferred_spec}, 包装数量={inferred_qty}")
+                    # 原来的重量/容量*数字格式处理逻辑
+                    else:
+                        match = WEIGHT_COUNT.search(product['name'])
                         if match:
-                            # 容量单位*数量格式，如"1.8L*8瓶"，取数量部分作为包装数量
-                            volume = match.group(1)
-                            count = match.group(2)
-                            inferred_spec = f"{volume}L*{count}"
-                            inferred_qty = int(count)
+                            inferred_spec = f"1*{match.group(1)}"
+                            inferred_qty = int(match.group(1))
                             product['specification'] = inferred_spec
                             product['package_quantity'] = inferred_qty
-                            logger.info(f"从商品名称提取容量*数量格式: {product['name']} -> {inferred_spec}, 包装数量={inferred_qty}")
-                        # 原来的重量/容量*数字格式处理逻辑
+                            logger.info(f"从商品名称提取重量/容量规格: {product['name']} -> {inferred_spec}, 包装数量={inferred_qty}")
                         else:
-                            weight_volume_pattern = r'.*?\d+(?:g|ml|毫升|克)[*xX×](\d+)'
-                            match = re.search(weight_volume_pattern, product['name'])
-                            if match:
-                                inferred_spec = f"1*{match.group(1)}"
-                                inferred_qty = int(match.group(1))
+                            # 一般情况的规格推断
+                            inferred_spec = self.unit_converter.infer_specification_from_name(product['name'])
+                            if inferred_spec:
                                 product['specification'] = inferred_spec
-                                product['package_quantity'] = inferred_qty
-                                logger.info(f"从商品名称提取重量/容量规格: {product['name']} -> {inferred_spec}, 包装数量={inferred_qty}")
-                            else:
-                                # 一般情况的规格推断
-                                inferred_spec = self.unit_converter.infer_specification_from_name(product['name'])
-                                if inferred_spec:
-                                    product['specification'] = inferred_spec
-                                    package_quantity = self.parse_specification(inferred_spec)
-                                    if package_quantity:
-                                        product['package_quantity'] = package_quantity
-                                    logger.info(f"从商品名称推断规格: {product['name']} -> {inferred_spec}, 包装数量={package_quantity}")
-                
-                # 检查已设置的规格但未设置包装数量的情况
-                if product.get('specification') and not product.get('package_quantity'):
-                    package_quantity = self.parse_specification(product['specification'])
-                    if package_quantity:
-                        product['package_quantity'] = package_quantity
-                        logger.info(f"解析已设置的规格: {product['specification']} -> 包装数量={package_quantity}")
-                
-                # 新增逻辑：根据规格推断单位为"件"
-                if not product['unit'] and product.get('barcode') and product.get('specification') and product.get('quantity') and product.get('price') is not None:
-                    # 检查规格是否符合容量*数量格式
-                    volume_pattern = r'(\d+(?:\.\d+)?)\s*(?:ml|[mL]L|l|L|升|毫升)[*×xX](\d+)'
-                    match = re.search(volume_pattern, product['specification'])
-                    
-                    # 判断是否需要推断单位为"件"
-                    if match:
-                        product['unit'] = '件'
-                        logger.info(f"根据规格推断单位: {product['specification']} -> 单位=件")
-                    else:
-                        # 检查简单的数量*数量格式
-                        simple_pattern = r'(\d+)[*×xX](\d+)'
-                        match = re.search(simple_pattern, product['specification'])
-                        if match:
-                            product['unit'] = '件'
-                            logger.info(f"根据规格推断单位: {product['specification']} -> 单位=件")
-                
-                # 应用单位转换规则
-                product = self.unit_converter.process_unit_conversion(product)
-                
-                products.append(product)
-            except Exception as e:
-                logger.error(f"提取第{idx+1}行商品信息时出错: {e}", exc_info=True)
-                continue
-                
-        logger.info(f"提取到 {len(products)} 个商品信息")
-        return products
+                                package_quantity = self.parse_specification(inferred_spec)
+                                if package_quantity:
+                                    product['package_quantity'] = package_quantity
+                                logger.info(f"从商品名称推断规格: {product['name']} -> {inferred_spec}, 包装数量={package_quantity}")
+            
+            # 检查已设置的规格但未设置包装数量的情况
+            if product.get('specification') and not product.get('package_quantity'):
+                package_quantity = self.parse_specification(product['specification'])
+                if package_quantity:
+                    product['package_quantity'] = package_quantity
+                    logger.info(f"解析已设置的规格: {product['specification']} -> 包装数量={package_quantity}")
+            
+            # 新增逻辑：根据规格推断单位为"件"
+            if not product['unit'] and product.get('barcode') and product.get('specification') and product.get('quantity') and product.get('price') is not None:
+                # 检查规格是否符合容量*数量格式
+                # 或简单的数量*数量格式
+                if VOLUME_COUNT.search(product['specification']) or SIMPLE_COUNT.search(product['specification']):
+                    product['unit'] = '件'
+                    logger.info(f"根据规格推断单位: {product['specification']} -> 单位=件")
+            
+            # 应用单位转换规则
+            product = self.unit_converter.process_unit_conversion(product)
+            
+            return product
+        except Exception as e:
+            logger.error(f"提取第{idx+1}行商品信息时出错: {e}", exc_info=True)
+            return None
     
     def fill_template(self, products: List[Dict], output_file_path: str) -> bool:
         """
@@ -378,13 +633,8 @@ class ExcelProcessor:
             是否成功填充
         """
         try:
-            # 打开模板文件
-            template_workbook = xlrd.open_workbook(self.template_path, formatting_info=True)
-            template_sheet = template_workbook.sheet_by_index(0)
-            
-            # 创建可写的副本
-            output_workbook = xlcopy(template_workbook)
-            output_sheet = output_workbook.get_sheet(0)
+            # 从已解析的模板创建可写的副本
+            output_workbook, output_sheet = self.template.new_workbook()
             
             # 先对产品按条码分组，区分正常商品和赠品
             barcode_groups = {}
@@ -447,42 +697,41 @@ class ExcelProcessor:
                 else:
                     logger.info(f"条码 {barcode} 处理结果：只有赠品，数量={group['gift_quantity']}")
             
-            # 准备填充数据
-            row_index = 1  # 从第2行开始填充（索引从0开始）
-            
+            # 准备填充数据：列B(1)条码、列C(2)采购量、列D(3)赠送量、列E(4)采购单价
+            barcodes, quantities, gift_quantities, prices, gift_only_prices = [], [], [], [], []
             for barcode, group in barcode_groups.items():
-                # 1. 列B(1): 条码（必填）
-                output_sheet.write(row_index, 1, barcode)
+                barcodes.append(barcode)
                 
                 if group['normal'] is not None:
-                    # 有正常商品
-                    product = group['normal']['product']
-                    
-                    # 2. 列C(2): 采购量（必填） 使用正常商品的采购量
+                    # 有正常商品：使用正常商品的采购量和单价，赠送量只填大于0的赠品数量
                     normal_quantity = group['normal']['quantity']
-                    output_sheet.write(row_index, 2, normal_quantity)
-                    
-                    # 3. 列D(3): 赠送量 - 添加赠品数量
+                    quantities.append(normal_quantity)
                     if group['gift_quantity'] > 0:
-                        output_sheet.write(row_index, 3, group['gift_quantity'])
+                        gift_quantities.append(group['gift_quantity'])
                         logger.info(f"条码 {barcode} 填充：采购量={normal_quantity}，赠品数量{group['gift_quantity']}")
-                    
-                    # 4. 列E(4): 采购单价（必填）
-                    purchase_price = group['normal']['price']
-                    style = xlwt.XFStyle()
-                    style.num_format_str = '0.0000'
-                    output_sheet.write(row_index, 4, round(purchase_price, 4), style)
+                    else:
+                        gift_quantities.append(np.nan)
+                    prices.append(round(group['normal']['price'], 4))
+                    gift_only_prices.append(np.nan)
                 else:
-                    # 只有赠品，没有正常商品
-                    # 采购量填0，赠送量填赠品数量
-                    output_sheet.write(row_index, 2, 0)  # 采购量为0
-                    output_sheet.write(row_index, 3, group['gift_quantity'])  # 赠送量
-                    output_sheet.write(row_index, 4, 0)  # 单价为0
+                    # 只有赠品，没有正常商品：采购量填0，赠送量填赠品数量，单价为0
+                    quantities.append(0)
+                    gift_quantities.append(group['gift_quantity'])
+                    prices.append(np.nan)
+                    gift_only_prices.append(0)
                     
                     logger.info(f"条码 {barcode} 填充：仅有赠品，采购量=0，赠品数量={group['gift_quantity']}")
-                
-                # 移到下一行
-                row_index += 1
+            
+            # 从第2行开始填充（索引从0开始）；正常商品的单价保留4位小数，仅有赠品的单价0不带格式
+            price_style = get_style(PRICE_FORMAT)
+            stats = write_columns(output_sheet, [
+                (1, np.array(barcodes, dtype=object), None),
+                (2, np.array(quantities, dtype=float), None),
+                (3, np.array(gift_quantities, dtype=float), None),
+                (4, np.array(prices, dtype=float), price_style),
+                (4, np.array(gift_only_prices, dtype=float), None)
+            ], start_row=1)
+            logger.info(f"写入 {stats['rows']} 行，耗时 {stats['seconds']:.3f} 秒，{stats['rows_per_second']:.0f} 行/秒")
             
             # 保存文件
             output_workbook.save(output_file_path)
@@ -581,49 +830,123 @@ class ExcelProcessor:
             return None
         
         try:
-            # 读取Excel文件时不立即指定表头
-            df = pd.read_excel(file_path, header=None)
+            # 只解析一次工作簿，表头行在内存中提升为列名
+            df = read_sheet(file_path, self.excel_reader)
             logger.info(f"成功读取Excel文件: {file_path}, 共 {len(df)} 行")
             
-            # 自动识别表头行
-            header_row = self._find_header_row(df)
-            if header_row is None:
-                logger.error("无法识别表头行")
+            table = self._prepare_table(df)
+            if table is None:
                 return None
-                
-            logger.info(f"识别到表头在第 {header_row+1} 行")
             
-            # 重新读取Excel，正确指定表头行
-            df = pd.read_excel(file_path, header=header_row)
-            logger.info(f"使用表头行重新读取数据，共 {len(df)} 行有效数据")
+            return self._generate_purchase_order(*table, file_path)
+            
+        except Exception as e:
+            logger.error(f"处理Excel文件时出错: {file_path}, 错误: {e}")
+            return None
+    
+    def process_ocr_result(self, image_path: str, ocr_result: Dict) -> Optional[str]:
+        """
+        直接用OCR结果中的表格单元格结构生成采购单，不经过Excel文件
+        
+        Args:
+            image_path: 原始图片路径，用于生成输出文件名
+            ocr_result: 含 tables_result 的OCR识别结果
             
-            # 提取商品信息
-            products = self.extract_product_info(df)
+        Returns:
+            输出文件路径，如果处理失败则返回None
+        """
+        logger.info(f"开始处理OCR表格结构: {image_path}")
+        
+        try:
+            df = tables_to_dataframe(ocr_result)
+            if df is None:
+                logger.error(f"OCR结果中没有表格结构: {image_path}")
+                return None
+            logger.info(f"成功构建表格: {image_path}, 共 {len(df)} 行")
             
-            if not products:
-                logger.warning("未提取到有效商品信息")
+            table = self._prepare_table(df)
+            if table is None:
                 return None
             
-            # 生成输出文件名
-            file_name = os.path.splitext(os.path.basename(file_path))[0]
-            output_file = os.path.join(self.output_dir, f"采购单_{file_name}.xls")
+            return self._generate_purchase_order(*table, image_path)
             
-            # 填充模板并保存
-            if self.fill_template(products, output_file):
-                # 记录已处理文件
-                self.processed_files[file_path] = output_file
-                self._save_processed_files()
-                
-                # 不再自动打开输出目录
-                logger.info(f"采购单已保存到: {output_file}")
-                
-                return output_file
+        except Exception as e:
+            logger.error(f"处理OCR表格结构时出错: {image_path}, 错误: {e}")
+            return None
+    
+    def _prepare_table(self, df: pd.DataFrame) -> Optional[Tuple[pd.DataFrame, Optional[Dict[str, str]]]]:
+        """
+        识别表头行并在内存中把它提升为列名，结果与按表头行重新读取Excel一致
+        
+        按列名能识别出条码列时只保留商品信息用到的列（条码列与 pd.read_excel 一样推断类型，提取时再格式化）；
+        否则保留所有列，由 extract_product_info 按数据特征识别条码列。
+        
+        Args:
+            df: 以 header=None、dtype=object 读取的数据
             
+        Returns:
+            (以表头行为列名的数据, 列名映射)元组，列名映射为None表示需按数据检测；无法识别表头时返回None
+        """
+        header_row = self._find_header_row(df)
+        if header_row is None:
+            logger.error("无法识别表头行")
             return None
+        
+        logger.info(f"识别到表头在第 {header_row+1} 行")
+        
+        # 先只解析表头行，按列名确定需要的列
+        header = promote_header(df.iloc[:header_row + 1], header_row)
+        barcode_cols = self.extract_barcode(header)
+        
+        if barcode_cols:
+            column_mapping = self._detect_column_mapping(header, barcode_cols)
+            logger.info(f"列名映射结果: {column_mapping}")
             
-        except Exception as e:
-            logger.error(f"处理Excel文件时出错: {file_path}, 错误: {e}")
+            used_columns = set(column_mapping.values()) | {'规格'}
+            df = promote_header(df, header_row, usecols=lambda col: col in used_columns)
+        else:
+            column_mapping = None
+            df = promote_header(df, header_row)
+        
+        logger.info(f"使用表头行整理数据，共 {len(df)} 行有效数据")
+        return df, column_mapping
+    
+    def _generate_purchase_order(self, df: pd.DataFrame, column_mapping: Optional[Dict[str, str]],
+                                 source_path: str) -> Optional[str]:
+        """
+        从已整理好表头的数据中提取商品信息并生成采购单
+        
+        Args:
+            df: 以表头行为列名的数据
+            column_mapping: 列名映射，为None则从数据中检测
+            source_path: 来源文件路径，用于生成输出文件名和处理记录
+            
+        Returns:
+            输出文件路径，如果处理失败则返回None
+        """
+        # 提取商品信息
+        products = self.extract_product_info(df, column_mapping)
+        
+        if not products:
+            logger.warning("未提取到有效商品信息")
             return None
+        
+        # 生成输出文件名
+        output_file = self.get_output_path(source_path)
+        
+        # 填充模板并保存
+        if self.fill_template(products, output_file):
+            # 记录已处理文件
+            if self.record_processed:
+                self.processed_files[source_path] = output_file
+                self._save_processed_files()
+            
+            # 不再自动打开输出目录
+            logger.info(f"采购单已保存到: {output_file}")
+            
+            return output_file
+        
+        return None
     
     def process_latest_file(self) -> Optional[str]:
         """
@@ -641,18 +964,98 @@ class ExcelProcessor:
         # 处理文件
         return self.process_specific_file(latest_file)
     
-    def _detect_column_mapping(self, df: pd.DataFrame) -> Dict[str, str]:
+    def get_output_path(self, file_path: str) -> str:
+        """
+        获取Excel文件对应的采购单路径
+        
+        Args:
+            file_path: Excel文件路径
+            
+        Returns:
+            采购单文件路径
+        """
+        file_name = os.path.splitext(os.path.basename(file_path))[0]
+        return os.path.join(self.output_dir, f"{PURCHASE_ORDER_PREFIX}{file_name}.xls")
+    
+    def get_pending_files(self) -> List[str]:
+        """
+        获取output目录下还没有对应采购单的OCR结果Excel文件
+        
+        Returns:
+            Excel文件路径列表，按文件名排序
+        """
+        entries = self.output_index.entries('excel')
+        purchase_orders = {entry.name for entry in self.output_index.entries('purchase_order', refresh=False)}
+        
+        pending = [
+            entry.path for entry in entries
+            if not entry.name.startswith(MERGED_ORDER_PREFIX)
+            and os.path.basename(self.get_output_path(entry.path)) not in purchase_orders
+        ]
+        logger.info(f"找到 {len(pending)} 个待处理的Excel文件")
+        return pending
+    
+    def _process_file_summary(self, file_path: str) -> Dict[str, Any]:
+        """处理单个文件，返回结果摘要"""
+        start = time.perf_counter()
+        output_file = self.process_specific_file(file_path)
+        return {
+            'file': file_path,
+            'output': output_file,
+            'success': output_file is not None,
+            'seconds': time.perf_counter() - start
+        }
+    
+    def process_files(self, file_paths: List[str], max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        批量处理Excel文件，多个文件时在进程池中并行处理
+        
+        Args:
+            file_paths: Excel文件路径列表
+            max_workers: 最大进程数，为None则使用配置（默认CPU核数）
+            
+        Returns:
+            每个文件的结果摘要列表，顺序与输入一致：
+            {file: 输入文件, output: 采购单路径或None, success: 是否成功, seconds: 处理耗时}
+        """
+        if not file_paths:
+            return []
+        
+        workers = min(max_workers or self.max_workers, len(file_paths))
+        logger.info(f"开始批量处理 {len(file_paths)} 个Excel文件，进程数: {workers}")
+        
+        start = time.perf_counter()
+        if workers <= 1:
+            results = [self._process_file_summary(path) for path in file_paths]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_process_file_in_worker, file_paths,
+                                            [self.config.config_file] * len(file_paths)))
+            
+            # 子进程不写处理记录，在这里统一保存
+            for result in results:
+                if result['success']:
+                    self.processed_files[result['file']] = result['output']
+            self._save_processed_files()
+        
+        success = sum(1 for result in results if result['success'])
+        logger.info(f"批量处理完成: 成功 {success}/{len(results)}，耗时 {time.perf_counter() - start:.2f} 秒")
+        return results
+    
+    def _detect_column_mapping(self, df: pd.DataFrame, barcode_cols: Optional[List[str]] = None) -> Dict[str, str]:
         """
         检测和映射Excel表头列名
         
         Args:
             df: 数据框
+            barcode_cols: 已识别的条码列，为None则从数据框中提取
             
         Returns:
             列名映射字典，键为标准列名，值为实际列名
         """
         # 提取有用的列
-        barcode_cols = self.extract_barcode(df)
+        if barcode_cols is None:
+            barcode_cols = self.extract_barcode(df)
         
         # 如果没有找到条码列，无法继续处理
         if not barcode_cols:
@@ -713,86 +1116,14 @@ class ExcelProcessor:
         if not product_name or not isinstance(product_name, str):
             logger.warning(f"无效的商品名: {product_name}")
             return None, None
-            
-        product_name = product_name.strip()
         
-        # 特殊处理：重量/容量*数字格式
-        weight_volume_pattern = r'.*?\d+(?:g|ml|毫升|克)[*xX×](\d+)'
-        match = re.search(weight_volume_pattern, product_name)
-        if match:
-            inferred_spec = f"1*{match.group(1)}"
-            inferred_qty = int(match.group(1))
-            logger.info(f"从商品名称提取重量/容量规格: {product_name} -> {inferred_spec}, 包装数量={inferred_qty}")
-            return inferred_spec, inferred_qty
-        
-        # 使用单位转换器推断规格
-        inferred_spec = self.unit_converter.infer_specification_from_name(product_name)
-        if inferred_spec:
-            # 解析规格中的包装数量
-            package_quantity = self.parse_specification(inferred_spec)
-            if package_quantity:
-                logger.info(f"从商品名称推断规格: {product_name} -> {inferred_spec}, 包装数量={package_quantity}")
-                return inferred_spec, package_quantity
-        
-        # 特定商品规则匹配
-        spec_rules = [
-            # XX入白膜格式，如"550纯净水24入白膜"
-            (r'.*?(\d+)入白膜', lambda m: (f"1*{m.group(1)}", int(m.group(1)))),
-            
-            # 白膜格式，如"550水24白膜"
-            (r'.*?(\d+)白膜', lambda m: (f"1*{m.group(1)}", int(m.group(1)))),
-            
-            # 445水溶C系列
-            (r'445水溶C.*?(\d+)[入个]纸箱', lambda m: (f"1*{m.group(1)}", int(m.group(1)))),
-            
-            # 东方树叶系列
-            (r'东方树叶.*?(\d+\*\d+).*纸箱', lambda m: (m.group(1), int(m.group(1).split('*')[1]))),
-            
-            # 桶装
-            (r'(\d+\.?\d*L)桶装', lambda m: (f"{m.group(1)}*1", 1)),
-            
-            # 树叶茶系
-            (r'树叶.*?(\d+)[入个]纸箱', lambda m: (f"1*{m.group(1)}", int(m.group(1)))),
-            
-            # 茶π系列
-            (r'茶[πΠπ].*?(\d+)纸箱', lambda m: (f"1*{m.group(1)}", int(m.group(1)))),
-            
-            # 通用入数匹配
-            (r'.*?(\d+)[入个](?:纸箱|箱装|白膜)', lambda m: (f"1*{m.group(1)}", int(m.group(1)))),
-            
-            # 通用数字+纸箱格式
-            (r'.*?(\d+)纸箱', lambda m: (f"1*{m.group(1)}", int(m.group(1))))
-        ]
+        result = guess_spec(product_name)
+        if result.spec is None:
+            logger.warning(f"无法从商品名'{product_name.strip()}' 推断规格")
+            return None, None
         
-        # 尝试所有规则
-        for pattern, formatter in spec_rules:
-            match = re.search(pattern, product_name)
-            if match:
-                spec, qty = formatter(match)
-                logger.info(f"根据特定规则推断规格: {product_name} -> {spec}, 包装数量={qty}")
-                return spec, qty
-        
-        # 尝试直接从名称中提取数字*数字格式
-        match = re.search(r'(\d+\*\d+)', product_name)
-        if match:
-            spec = match.group(1)
-            package_quantity = self.parse_specification(spec)
-            if package_quantity:
-                logger.info(f"从名称中直接提取规格: {spec}, 包装数量={package_quantity}")
-                return spec, package_quantity
-        
-        # 最后尝试提取任何位置的数字，默认典型件装数
-        numbers = re.findall(r'\d+', product_name)
-        if numbers:
-            for num in numbers:
-                # 检查是否为典型的件装数(12/15/24/30)
-                if num in ['12', '15', '24', '30']:
-                    spec = f"1*{num}"
-                    logger.info(f"从名称中提取可能的件装数: {spec}, 包装数量={int(num)}")
-                    return spec, int(num)
-            
-        logger.warning(f"无法从商品名'{product_name}' 推断规格")
-        return None, None 
+        logger.info(f"从商品名称推断规格: {product_name.strip()} -> {result.spec}, 包装数量={result.package_quantity}")
+        return result.spec, result.package_quantity
     
     def parse_specification(self, spec_str: str) -> Optional[int]:
         """
@@ -805,43 +1136,24 @@ class ExcelProcessor:
         Returns:
             包装数量，如果无法解析则返回None
         """
-        if not spec_str or not isinstance(spec_str, str):
-            return None
+        return parse_spec(spec_str).package_quantity
+
+# 子进程中复用的处理器，每个进程只初始化一次
+_worker_processor: Optional[ExcelProcessor] = None
+
+def _process_file_in_worker(file_path: str, config_file: str) -> Dict[str, Any]:
+    """
+    在进程池的子进程中处理单个Excel文件
+    
+    Args:
+        file_path: Excel文件路径
+        config_file: 配置文件路径
         
-        try:
-            # 清理规格字符串
-            spec_str = clean_string(spec_str)
-            
-            # 匹配重量/容量格式，如"450g*15"、"450ml*15"
-            match = re.search(r'\d+(?:g|ml|毫升|克)[*xX×](\d+)', spec_str)
-            if match:
-                # 返回后面的数量
-                return int(match.group(1))
-            
-            # 匹配1*5*10 格式的三级规格
-            match = re.search(r'(\d+)[\*xX×](\d+)[\*xX×](\d+)', spec_str)
-            if match:
-                # 取最后一个数字作为袋数量
-                return int(match.group(3))
-            
-            # 匹配1*15, 1x15 格式
-            match = re.search(r'(\d+)[\*xX×](\d+)', spec_str)
-            if match:
-                # 取第二个数字作为包装数量
-                return int(match.group(2))
-                
-            # 匹配24瓶/件等格式
-            match = re.search(r'(\d+)[瓶个支袋][/／](件|箱)', spec_str)
-            if match:
-                return int(match.group(1))
-                
-            # 匹配4L格式
-            match = re.search(r'(\d+(?:\.\d+)?)\s*[Ll升][*×]?(\d+)?', spec_str)
-            if match:
-                # 如果有第二个数字，返回它；否则返回1
-                return int(match.group(2)) if match.group(2) else 1
-                
-        except Exception as e:
-            logger.warning(f"解析规格'{spec_str}'时出错: {e}")
-            
-        return None 
\ No newline at end of file
+    Returns:
+        结果摘要
+    """
+    global _worker_processor
+    if _worker_processor is None:
+        _worker_processor = ExcelProcessor(ConfigManager(config_file))
+        _worker_processor.record_processed = False
+    return _worker_processor._process_file_summary(file_path)
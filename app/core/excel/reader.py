@@ -0,0 +1,182 @@
+"""
+Excel读取模块
+----------
+把Excel文件的第一个工作表读取为 header=None、dtype=object 的数据帧，结果与 pd.read_excel 一致。
+支持多种读取引擎，按配置选择，不可用或读取失败时依次回退到后面的引擎：
+calamine（python-calamine，Rust实现）、openpyxl（只读模式流式读取单元格的值，只支持xlsx）、
+pandas（pd.read_excel 的默认引擎，xlsx用openpyxl，xls用xlrd）。
+"""
+
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+from ..utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+# calamine引擎为可选依赖
+try:
+    import python_calamine
+except ImportError:
+    python_calamine = None
+
+# 按回退顺序排列的读取引擎
+ENGINES = ['calamine', 'openpyxl', 'pandas']
+
+OPENPYXL_EXTENSIONS = ('.xlsx', '.xlsm')
+
+# openpyxl 只取值时错误单元格返回错误码文本，pd.read_excel 将其读为空值
+ERROR_CODES = ('#NULL!', '#DIV/0!', '#VALUE!', '#REF!', '#NAME?', '#NUM!', '#N/A')
+
+class EngineUnavailable(Exception):
+    """读取引擎未安装或不支持该文件类型"""
+
+def _read_calamine(file_path: str) -> pd.DataFrame:
+    if python_calamine is None:
+        raise EngineUnavailable("未安装python-calamine")
+    return pd.read_excel(file_path, header=None, dtype=object, engine='calamine')
+
+def _read_openpyxl(file_path: str) -> pd.DataFrame:
+    if os.path.splitext(file_path)[1].lower() not in OPENPYXL_EXTENSIONS:
+        raise EngineUnavailable("openpyxl只支持xlsx文件")
+
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = workbook.worksheets[0]
+        sheet.reset_dimensions()
+
+        # 单元格转换与 pd.read_excel 的openpyxl引擎一致，但只取值，不创建单元格对象
+        data: List[List[Any]] = []
+        last_row_with_data = -1
+        for row_number, values in enumerate(sheet.iter_rows(values_only=True)):
+            row = []
+            for value in values:
+                if value is None:
+                    value = ''
+                elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                    number = int(value)
+                    value = number if number == value else float(value)
+                elif isinstance(value, str) and value in ERROR_CODES:
+                    value = np.nan
+                row.append(value)
+            while row and row[-1] == '':
+                # 去掉行尾的空单元格
+                row.pop()
+            if row:
+                last_row_with_data = row_number
+            data.append(row)
+    finally:
+        workbook.close()
+
+    # 去掉末尾的空行，各行补齐到相同宽度
+    data = data[:last_row_with_data + 1]
+    if not data:
+        return pd.DataFrame()
+    width = max(len(row) for row in data)
+    data = [row + [''] * (width - len(row)) for row in data]
+
+    return TextParser(data, header=None, dtype=object, skip_blank_lines=False).read()
+
+def _read_pandas(file_path: str) -> pd.DataFrame:
+    return pd.read_excel(file_path, header=None, dtype=object)
+
+_READERS = {
+    'calamine': _read_calamine,
+    'openpyxl': _read_openpyxl,
+    'pandas': _read_pandas
+}
+
+def engine_order(engine: str = 'auto') -> List[str]:
+    """
+    获取读取时依次尝试的引擎
+
+    Args:
+        engine: 首选引擎，auto表示按默认顺序
+
+    Returns:
+        引擎名称列表
+    """
+    engine = (engine or 'auto').strip().lower()
+    if engine == 'auto':
+        return list(ENGINES)
+    if engine not in _READERS:
+        logger.warning(f"未知的Excel读取引擎: {engine}，使用自动选择")
+        return list(ENGINES)
+    return [engine] + [name for name in ENGINES if name != engine]
+
+def read_sheet(file_path: str, engine: str = 'auto') -> pd.DataFrame:
+    """
+    读取Excel文件的第一个工作表，不指定表头，单元格保持原始值
+
+    Args:
+        file_path: Excel文件路径
+        engine: 首选读取引擎：auto、calamine、openpyxl 或 pandas
+
+    Returns:
+        数据帧，列名为列号
+    """
+    error: Optional[Exception] = None
+    for name in engine_order(engine):
+        try:
+            df = _READERS[name](file_path)
+            logger.debug(f"使用 {name} 引擎读取Excel: {file_path}")
+            return df
+        except EngineUnavailable:
+            continue
+        except Exception as e:
+            logger.warning(f"{name} 引擎读取Excel失败: {file_path}, 错误: {e}")
+            error = e
+
+    raise error if error is not None else EngineUnavailable(f"没有可用的Excel读取引擎: {file_path}")
+
+def benchmark(file_paths: List[str], repeat: int = 3) -> Dict[str, Dict[str, Any]]:
+    """
+    比较各引擎读取同一批文件的耗时，并检查结果是否与pandas引擎一致
+
+    Args:
+        file_paths: Excel文件路径列表
+        repeat: 每个文件重复读取的次数
+
+    Returns:
+        引擎名称 -> {files: 读取成功的文件数, seconds: 总耗时, per_file_ms: 平均每个文件的毫秒数,
+        mismatches: 结果与pandas引擎不一致的文件列表, skipped: 不支持或读取失败的文件数}
+    """
+    expected = {}
+    for file_path in file_paths:
+        try:
+            expected[file_path] = _read_pandas(file_path)
+        except Exception as e:
+            logger.warning(f"读取Excel失败，跳过: {file_path}, 错误: {e}")
+
+    results = {}
+    for name in ENGINES:
+        reader = _READERS[name]
+        files, seconds, skipped, mismatches = 0, 0.0, 0, []
+        for file_path, reference in expected.items():
+            try:
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    df = reader(file_path)
+                seconds += time.perf_counter() - start
+            except Exception:
+                skipped += 1
+                continue
+            files += 1
+            if not df.equals(reference):
+                mismatches.append(file_path)
+
+        results[name] = {
+            'files': files,
+            'seconds': seconds,
+            'per_file_ms': seconds / (files * repeat) * 1000 if files else None,
+            'mismatches': mismatches,
+            'skipped': skipped
+        }
+    return results
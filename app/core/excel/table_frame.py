@@ -0,0 +1,91 @@
+"""
+表格数据帧模块
+-----------
+在内存中构建与 pd.read_excel 结果一致的数据帧：
+从OCR返回的单元格结构直接生成表格，以及在只读取一次的工作表中把表头行提升为列名。
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+from ..utils.log_utils import get_logger
+from ..ocr.table_result import find_tables
+
+logger = get_logger(__name__)
+
+def tables_to_dataframe(ocr_result: Dict) -> Optional[pd.DataFrame]:
+    """
+    将OCR返回的表格单元格结构转换为数据帧，等价于 pd.read_excel(导出的Excel, header=None)
+
+    表头文字（标题）和表尾文字各占一行放在表格上方和下方，合并单元格的内容只出现在左上角。
+    只使用第一个包含表体的表格，与读取Excel第一个工作表一致。
+
+    Args:
+        ocr_result: OCR识别结果
+
+    Returns:
+        数据帧，识别结果中没有单元格结构时返回None
+    """
+    table = next((t for t in find_tables(ocr_result) if isinstance(t, dict) and t.get('body')), None)
+    if table is None:
+        return None
+
+    try:
+        cells = table['body']
+        n_rows = max(int(cell['row_end']) for cell in cells)
+        n_cols = max(int(cell['col_end']) for cell in cells)
+
+        grid = np.full((n_rows, n_cols), np.nan, dtype=object)
+        for cell in cells:
+            words = str(cell.get('words', '')).strip()
+            if words:
+                grid[int(cell['row_start']), int(cell['col_start'])] = words
+
+        def text_rows(items: List[Dict]) -> List[List[Any]]:
+            rows = []
+            for item in items or []:
+                words = str(item.get('words', '')).strip()
+                if words:
+                    rows.append([words] + [np.nan] * (n_cols - 1))
+            return rows
+
+        rows = text_rows(table.get('header')) + grid.tolist() + text_rows(table.get('footer'))
+    except (KeyError, TypeError, ValueError) as e:
+        logger.warning(f"解析OCR表格结构失败: {e}")
+        return None
+
+    # 与读取Excel一致：去掉末尾的空行
+    while rows and all(pd.isna(value) for value in rows[-1]):
+        rows.pop()
+
+    return pd.DataFrame(rows, columns=range(n_cols))
+
+def promote_header(df: pd.DataFrame, header_row: int, usecols: Optional[Callable[[Any], bool]] = None,
+                   converters: Optional[Dict[Any, Callable[[Any], Any]]] = None) -> pd.DataFrame:
+    """
+    把指定行提升为列名，等价于 pd.read_excel(文件, header=header_row, usecols=..., converters=...)
+
+    与 pd.read_excel 使用同一个解析器，空列名、重复列名和各列的类型推断都与重新读取文件一致。
+    df 应以 header=None、dtype=object 读取，保留单元格的原始值。
+
+    Args:
+        df: 以 header=None 读取的数据帧
+        header_row: 表头所在行号（从0开始）
+        usecols: 按列名判断是否保留该列的函数，为None则保留所有列
+        converters: 列名 -> 单元格转换函数，转换后的列不再推断类型
+
+    Returns:
+        新的数据帧
+    """
+    if len(df) <= header_row:
+        # 与读取空工作表一致
+        return pd.DataFrame()
+
+    rows = df.iloc[header_row:].astype(object)
+    data = rows.where(rows.notna(), '').values.tolist()
+    # 与 pd.read_excel 相同：不跳过空行
+    parser = TextParser(data, header=0, usecols=usecols, converters=converters, skip_blank_lines=False)
+    return parser.read()
@@ -0,0 +1,236 @@
+"""
+采购单模板缓存模块
+--------------
+每个进程只解析一次采购单模板（模板文件修改后自动重新解析），每次输出时从已解析的模板
+生成可写副本；数字格式样式也只创建一次，供所有输出共用。
+数据行按列批量写入，每列的样式只解析一次，不逐行构造数据帧的行。
+也可以按模板的表头输出xlsx文件（只写模式，内存占用与行数无关），不受xls的行数限制。
+"""
+
+import os
+import time
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import xlrd
+import xlwt
+from xlutils.copy import copy as xlcopy
+
+from ..utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+# 常用的数字格式
+PRICE_FORMAT = '0.0000'
+QUANTITY_FORMAT = '0'
+
+# xls和xlsx工作表的最大行数
+XLS_MAX_ROWS = 65536
+XLSX_MAX_ROWS = 1048576
+
+_styles: Dict[str, xlwt.XFStyle] = {}
+_styles_lock = threading.Lock()
+
+def get_style(num_format_str: str) -> xlwt.XFStyle:
+    """
+    获取指定数字格式的共享样式
+
+    同一个样式对象可以写入多个工作簿，每个工作簿只登记一次。
+
+    Args:
+        num_format_str: 数字格式，如"0.0000"
+
+    Returns:
+        样式对象，调用方不应修改
+    """
+    with _styles_lock:
+        style = _styles.get(num_format_str)
+        if style is None:
+            style = xlwt.XFStyle()
+            style.num_format_str = num_format_str
+            _styles[num_format_str] = style
+        return style
+
+class PurchaseOrderTemplate:
+    """
+    已解析的采购单模板（xls，含格式信息）
+
+    同一模板路径在进程内共用一份，模板文件的修改时间或大小变化时重新解析。
+    """
+
+    _registry: Dict[str, 'PurchaseOrderTemplate'] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, template_path: str):
+        """
+        初始化模板缓存
+
+        Args:
+            template_path: 模板文件路径
+        """
+        self.template_path = template_path
+
+        self._lock = threading.Lock()
+        self._book: Optional[xlrd.Book] = None
+        self._signature: Optional[Tuple[float, int]] = None
+
+    @classmethod
+    def for_path(cls, template_path: str) -> 'PurchaseOrderTemplate':
+        """
+        获取模板的共享缓存
+
+        Args:
+            template_path: 模板文件路径
+
+        Returns:
+            模板缓存
+        """
+        key = os.path.normcase(os.path.abspath(template_path))
+        with cls._registry_lock:
+            template = cls._registry.get(key)
+            if template is None:
+                template = cls(template_path)
+                cls._registry[key] = template
+            return template
+
+    @property
+    def book(self) -> xlrd.Book:
+        """已解析的模板工作簿，模板文件变化时重新解析"""
+        stat = os.stat(self.template_path)
+        signature = (stat.st_mtime, stat.st_size)
+        with self._lock:
+            if self._book is None or self._signature != signature:
+                self._book = xlrd.open_workbook(self.template_path, formatting_info=True)
+                self._signature = signature
+                logger.info(f"已解析采购单模板: {self.template_path}")
+            return self._book
+
+    @property
+    def sheet(self) -> xlrd.sheet.Sheet:
+        """模板的第一个工作表"""
+        return self.book.sheet_by_index(0)
+
+    def new_workbook(self) -> Tuple[xlwt.Workbook, xlwt.Worksheet]:
+        """
+        从模板生成可写副本
+
+        Returns:
+            (可写工作簿, 第一个工作表)元组
+        """
+        book = self.book
+        with self._lock:
+            workbook = xlcopy(book)
+        return workbook, workbook.get_sheet(0)
+
+    def save_xlsx(self, file_path: str, columns: List[Tuple[int, Sequence[Any], Optional[xlwt.XFStyle]]],
+                  start_row: int = 1) -> Dict[str, float]:
+        """
+        按模板的表头和列宽输出xlsx文件
+
+        使用openpyxl的只写模式逐行写出，内存占用与行数无关。模板中 start_row 之前的行作为表头，
+        数据列的格式与 write_columns 相同，样式只使用其中的数字格式。
+
+        Args:
+            file_path: 输出文件路径
+            columns: (列号, 各行的值, 样式)列表
+            start_row: 第一行数据的行号
+
+        Returns:
+            {rows: 行数, cells: 写入的单元格数, seconds: 耗时, rows_per_second: 每秒写入的行数}
+        """
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.utils import get_column_letter
+
+        start = time.perf_counter()
+        template_sheet = self.sheet
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(template_sheet.name)
+        for col_index in range(template_sheet.ncols):
+            colinfo = template_sheet.colinfo_map.get(col_index)
+            if colinfo is not None:
+                # xls列宽以1/256字符为单位
+                sheet.column_dimensions[get_column_letter(col_index + 1)].width = colinfo.width / 256
+
+        for row_index in range(min(start_row, template_sheet.nrows)):
+            sheet.append([value if value != '' else None for value in template_sheet.row_values(row_index)])
+
+        prepared = []
+        for col_index, values, style in columns:
+            values = np.asarray(values)
+            if values.dtype.kind in 'iuf':
+                values = values.astype(float)
+            num_format = style.num_format_str if style is not None else 'General'
+            prepared.append((col_index, values.tolist(), None if num_format == 'General' else num_format))
+
+        rows = max((len(values) for _, values, _ in prepared), default=0)
+        width = max((col_index for col_index, _, _ in prepared), default=-1) + 1
+        cells = 0
+        for offset in range(rows):
+            line: List[Any] = [None] * width
+            for col_index, values, num_format in prepared:
+                value = values[offset] if offset < len(values) else None
+                if value is None or value != value:
+                    continue
+                if num_format is not None:
+                    value = WriteOnlyCell(sheet, value)
+                    value.number_format = num_format
+                line[col_index] = value
+                cells += 1
+            sheet.append(line)
+
+        workbook.save(file_path)
+        seconds = time.perf_counter() - start
+        return {
+            'rows': rows,
+            'cells': cells,
+            'seconds': seconds,
+            'rows_per_second': rows / seconds if seconds else 0.0
+        }
+
+def write_columns(sheet: xlwt.Worksheet, columns: List[Tuple[int, Sequence[Any], Optional[xlwt.XFStyle]]],
+                  start_row: int = 1) -> Dict[str, float]:
+    """
+    按列批量写入数据行
+
+    数值列转换为浮点数组后写入数字单元格，其他列按原值写入；空值（NaN、None）的单元格不写入。
+    同一列号可以出现多次，用于对不同的行使用不同的样式。
+
+    Args:
+        sheet: 可写工作表
+        columns: (列号, 各行的值, 样式)列表，样式为None时使用默认样式
+        start_row: 第一行数据的行号
+
+    Returns:
+        {rows: 行数, cells: 写入的单元格数, seconds: 耗时, rows_per_second: 每秒写入的行数}
+    """
+    start = time.perf_counter()
+    rows = 0
+    cells = 0
+    for col_index, values, style in columns:
+        style = style or xlwt.Style.default_style
+        values = np.asarray(values)
+        numeric = values.dtype.kind in 'iuf'
+        if numeric:
+            values = values.astype(float)
+        rows = max(rows, len(values))
+
+        row = sheet.row
+        for offset, value in enumerate(values.tolist()):
+            if value is None or value != value:
+                continue
+            if numeric:
+                row(start_row + offset).set_cell_number(col_index, value, style)
+            else:
+                row(start_row + offset).write(col_index, value, style)
+            cells += 1
+
+    seconds = time.perf_counter() - start
+    return {
+        'rows': rows,
+        'cells': cells,
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds else 0.0
+    }
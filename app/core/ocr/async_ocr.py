@@ -0,0 +1,341 @@
+"""
+异步OCR模块
+---------
+基于asyncio的百度OCR客户端与批量识别驱动，使用信号量限制并发请求数。
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
+
+from ..utils.log_utils import get_logger
+from .baidu_ocr import BaiduOCRClient
+
+logger = get_logger(__name__)
+
+class AsyncBaiduOCRClient:
+    """
+    异步百度OCR客户端
+
+    HTTP请求复用同步客户端的连接池，在专用线程池中执行；
+    重试与轮询等待使用 asyncio.sleep，等待期间不占用任何线程。
+    """
+
+    def __init__(self, client: BaiduOCRClient, max_concurrency: int = 4):
+        """
+        初始化异步OCR客户端
+
+        Args:
+            client: 同步OCR客户端，提供令牌、连接池和请求解析逻辑
+            max_concurrency: 最大并发请求数
+        """
+        self.client = client
+        self.max_concurrency = max(1, max_concurrency)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix='async-ocr'
+        )
+
+    async def run_blocking(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        """在线程池中执行阻塞调用"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def acquire_rate_limit(self) -> None:
+        """从共享令牌桶取出一个令牌，等待期间不占用线程"""
+        while True:
+            wait = await self.run_blocking(self.client.rate_limiter.try_acquire)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    async def _post(self, url: str, payload: Dict, headers: Dict) -> Tuple[int, Any]:
+        """
+        发送POST请求
+
+        Returns:
+            (HTTP状态码, 响应内容)元组，状态码为200时响应内容为解析后的JSON
+        """
+        def post() -> Tuple[int, Any]:
+            response = self.client.transport.post(
+                url,
+                data=payload,
+                headers=headers,
+                timeout=self.client.timeout
+            )
+            body = response.json() if response.status_code == 200 else response.text
+            return response.status_code, body
+
+        return await self.run_blocking(post)
+
+    async def recognize_table(self, image_data: Union[str, bytes]) -> Optional[Dict]:
+        """
+        识别表格
+
+        Args:
+            image_data: 图片数据，可以是文件路径或二进制数据
+
+        Returns:
+            识别结果字典，如果识别失败则返回None
+        """
+        request = await self.run_blocking(self.client.prepare_table_request, image_data)
+        if request is None:
+            return None
+        url, payload, headers = request
+
+        max_retries = self.client.max_retries
+        attempt = 0
+        throttled = 0
+        while attempt < max_retries:
+            await self.acquire_rate_limit()
+            try:
+                status_code, body = await self._post(url, payload, headers)
+                state, result = self.client.parse_table_response(status_code, body, attempt)
+                if state == 'done':
+                    return result
+                if state == 'throttled' and throttled < self.client.max_throttle_requeues:
+                    throttled += 1
+                    if self.client.rate_limiter.enabled:
+                        self.client.rate_limiter.penalize()
+                    else:
+                        # 未启用限速时没有令牌桶可清空，按重试间隔等待后再重新提交
+                        await asyncio.sleep(self.client.table_retry_delay(attempt))
+                    continue
+
+            except Exception as e:
+                logger.warning(f"表格识别时发生错误 (尝试 {attempt+1}/{max_retries}): {e}")
+
+            # 如果不是最后一次尝试，则等待后重试
+            if attempt < max_retries - 1:
+                wait_time = self.client.table_retry_delay(attempt)
+                logger.info(f"将在 {wait_time} 秒后重试...")
+                await asyncio.sleep(wait_time)
+            attempt += 1
+
+        logger.error("表格识别失败")
+        return None
+
+    async def get_excel_result(self, request_id_or_result: Union[str, Dict]) -> Optional[bytes]:
+        """
+        获取Excel结果
+
+        Args:
+            request_id_or_result: 请求ID或完整的识别结果
+
+        Returns:
+            Excel二进制数据，如果获取失败则返回None
+        """
+        access_token = await self.run_blocking(self.client.token_manager.get_token)
+        if not access_token:
+            logger.error("无法获取访问令牌，无法获取Excel结果")
+            return None
+
+        excel_data, request_id = self.client.resolve_excel_request(request_id_or_result)
+        if excel_data is not None or request_id is None:
+            return excel_data
+
+        url, payload, headers = self.client.prepare_excel_request(request_id, access_token)
+
+        max_retries = self.client.max_retries
+        for attempt in range(max_retries):
+            try:
+                status_code, body = await self._post(url, payload, headers)
+                state, excel_data = self.client.parse_excel_response(status_code, body, attempt)
+                if state == 'done':
+                    return excel_data
+                if state == 'pending':
+                    await asyncio.sleep(self.client.PENDING_POLL_INTERVAL)
+                    continue
+
+            except Exception as e:
+                logger.warning(f"获取Excel结果时发生错误 (尝试 {attempt+1}/{max_retries}): {e}")
+
+            # 如果不是最后一次尝试，则等待后重试
+            if attempt < max_retries - 1:
+                await asyncio.sleep(self.client.retry_delay * (attempt + 1))
+
+        logger.error("获取Excel结果失败")
+        return None
+
+    def close(self) -> None:
+        """关闭线程池，连接池由同步客户端负责关闭"""
+        self._executor.shutdown(wait=True)
+
+class AsyncOCRBatchRunner:
+    """
+    异步批量识别驱动：所有图片同时排队，信号量限制在途请求数，结果按完成顺序返回
+    """
+
+    def __init__(self, processor, max_concurrency: Optional[int] = None):
+        """
+        初始化批量识别驱动
+
+        Args:
+            processor: OCR处理器，负责图片校验、跳过判断和结果保存
+            max_concurrency: 最大在途请求数，如果为None则使用配置值
+        """
+        self.processor = processor
+        self.max_concurrency = max_concurrency or processor.max_concurrency
+        self.client = AsyncBaiduOCRClient(processor.ocr_client, self.max_concurrency)
+
+    async def process_image(self, image_path: str, semaphore: asyncio.Semaphore) -> Optional[str]:
+        """
+        异步处理单个图片
+
+        Args:
+            image_path: 图片文件路径
+            semaphore: 限制在途请求数的信号量
+
+        Returns:
+            输出Excel文件路径，如果处理失败则返回None
+        """
+        done, output_file = await self.client.run_blocking(self.processor.check_skip, image_path)
+        if done:
+            return output_file
+
+        try:
+            image_data = await self.client.run_blocking(self.processor.ocr_client.read_image, image_path)
+            if image_data is None:
+                return None
+
+            digest, excel_data = await self.client.run_blocking(self.processor.lookup_cached_excel, image_data)
+            ocr_result = None
+
+            if excel_data is None and digest is not None:
+                cache = self.processor.result_cache
+                owner, future = cache.claim(digest)
+                if not owner:
+                    # 同批次内相同内容的图片正在识别，等待其结果
+                    logger.info(f"等待相同内容图片的识别结果: {image_path}")
+                    excel_data = await asyncio.wrap_future(future)
+                else:
+                    try:
+                        ocr_result, excel_data = await self.recognize_image(image_path, image_data, semaphore)
+                        if excel_data:
+                            await self.client.run_blocking(cache.put, digest, ocr_result, excel_data)
+                    finally:
+                        cache.resolve(digest, excel_data)
+            elif excel_data is None:
+                ocr_result, excel_data = await self.recognize_image(image_path, image_data, semaphore)
+
+            if not excel_data:
+                logger.error(f"OCR识别或获取Excel结果失败: {image_path}")
+                return None
+
+            # 写文件不占用请求名额
+            return await self.client.run_blocking(self.processor.save_excel, image_path, excel_data, ocr_result)
+
+        except Exception as e:
+            logger.error(f"处理图片时出错: {image_path}, 错误: {e}")
+            return None
+
+    async def recognize_image(self, image_path: str, image_data: bytes,
+                              semaphore: asyncio.Semaphore) -> Tuple[Optional[Dict], Optional[bytes]]:
+        """
+        在并发名额内识别图片并获取Excel数据，优先恢复任务日志中未完成的任务
+
+        Args:
+            image_path: 原始图片路径
+            image_data: 原始图片二进制数据
+            semaphore: 限制在途请求数的信号量
+
+        Returns:
+            (OCR原始结果, Excel数据)元组，失败时对应值为None
+        """
+        journal = self.processor.job_journal
+
+        excel_data = await self.client.run_blocking(self.processor.resume_job, image_path)
+        if excel_data is not None:
+            return None, excel_data
+
+        upload_data = await self.client.run_blocking(self.processor.load_upload_data, image_path, image_data)
+        if upload_data is None:
+            return None, None
+
+        async with semaphore:
+            logger.info(f"开始处理图片: {image_path}")
+
+            await self.client.run_blocking(journal.mark_queued, image_path)
+            ocr_result = await self.client.recognize_table(upload_data)
+            if not ocr_result:
+                return None, None
+
+            found, excel_data = await self.client.run_blocking(self.processor.decode_excel, ocr_result)
+            if not found:
+                _, request_id = self.processor.ocr_client.resolve_excel_request(ocr_result)
+                if request_id:
+                    await self.client.run_blocking(journal.mark_submitted, image_path, request_id)
+                logger.info("无法从直接返回中获取Excel数据，尝试通过API获取...")
+                excel_data = await self.client.get_excel_result(ocr_result)
+
+            if excel_data:
+                await self.client.run_blocking(journal.mark_downloaded, image_path, excel_data)
+
+            return ocr_result, excel_data
+
+    async def iter_results(self, image_paths: List[str]) -> AsyncIterator[Tuple[str, Optional[str]]]:
+        """
+        并发处理图片，按完成顺序逐个返回结果
+
+        Args:
+            image_paths: 图片文件路径列表
+
+        Yields:
+            (图片路径, 输出文件路径)元组，处理失败时输出文件路径为None
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run_one(path: str) -> Tuple[str, Optional[str]]:
+            return path, await self.process_image(path, semaphore)
+
+        tasks = [asyncio.ensure_future(run_one(path)) for path in image_paths]
+        try:
+            for future in asyncio.as_completed(tasks):
+                yield await future
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def run(self, image_paths: List[str],
+                  on_result: Optional[Callable[[str, Optional[str]], None]] = None) -> Tuple[int, int]:
+        """
+        异步批量处理图片
+
+        Args:
+            image_paths: 图片文件路径列表
+            on_result: 每张图片完成时的回调，参数为(图片路径, 输出文件路径)
+
+        Returns:
+            (总处理数, 成功处理数)元组
+        """
+        total = len(image_paths)
+        success = 0
+        completed = 0
+
+        async for image_path, output_file in self.iter_results(image_paths):
+            completed += 1
+            if output_file is not None:
+                success += 1
+            logger.info(f"异步识别进度 {completed}/{total} ({completed * 100 // total}%): {image_path}")
+            if on_result:
+                on_result(image_path, output_file)
+
+        return total, success
+
+    def process_images(self, image_paths: List[str],
+                       on_result: Optional[Callable[[str, Optional[str]], None]] = None) -> Tuple[int, int]:
+        """
+        同步入口：在新的事件循环中运行批量处理
+
+        Args:
+            image_paths: 图片文件路径列表
+            on_result: 每张图片完成时的回调
+
+        Returns:
+            (总处理数, 成功处理数)元组
+        """
+        try:
+            return asyncio.run(self.run(image_paths, on_result))
+        finally:
+            self.client.close()
@@ -5,23 +5,37 @@
 """
 
 import os
+import json
+import stat
 import time
 import base64
+import hashlib
 import requests
 import logging
-from typing import Dict, Optional, Any, Union
+import threading
+import contextlib
+from typing import Dict, Optional, Any, Tuple, Union
 
 from ...config.settings import ConfigManager
 from ..utils.log_utils import get_logger
+from ..utils.file_utils import FileLock, ensure_dir, load_json
+from .transport import HTTPTransport
+from .rate_limiter import RateLimiter
 
 logger = get_logger(__name__)
 
 class TokenManager:
     """
     令牌管理类，负责获取和刷新百度API访问令牌
+    
+    令牌及过期时间持久化到缓存文件，多个进程之间复用；
+    刷新过程加锁，同一时刻只有一个调用方请求令牌接口，其余调用方等待并复用其结果。
     """
     
-    def __init__(self, api_key: str, secret_key: str, max_retries: int = 3, retry_delay: int = 2):
+    TOKEN_URL = "https://aip.baidubce.com/oauth/2.0/token"
+    
+    def __init__(self, api_key: str, secret_key: str, max_retries: int = 3, retry_delay: int = 2,
+                 transport: Optional[HTTPTransport] = None, cache_file: Optional[str] = None):
         """
         初始化令牌管理器
         
@@ -30,13 +44,21 @@ class TokenManager:
             secret_key: 百度Secret Key
             max_retries: 最大重试次数
             retry_delay: 重试延迟（秒）
+            transport: HTTP传输层，如果为None则使用独立的requests调用
+            cache_file: 令牌缓存文件路径，如果为None则只在内存中保存令牌
         """
         self.api_key = api_key
         self.secret_key = secret_key
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.transport = transport
+        self.cache_file = cache_file
         self.access_token = None
         self.token_expiry = 0
+        
+        # 刷新锁和刷新代数，用于合并并发的刷新请求
+        self._refresh_lock = threading.Lock()
+        self._generation = 0
     
     def get_token(self) -> Optional[str]:
         """
@@ -48,7 +70,17 @@ class TokenManager:
         if self.is_token_valid():
             return self.access_token
         
-        return self.refresh_token()
+        with self._refresh_lock:
+            # 等锁期间可能已有其他线程完成了刷新
+            if self.is_token_valid():
+                return self.access_token
+            
+            with self._cache_lock():
+                if self._load_cache():
+                    logger.info("使用缓存的访问令牌")
+                    return self.access_token
+                
+                return self._refresh_locked()
     
     def is_token_valid(self) -> bool:
         """
@@ -64,12 +96,43 @@ class TokenManager:
     
     def refresh_token(self) -> Optional[str]:
         """
-        刷新访问令牌
+        强制刷新访问令牌
+        
+        多个线程同时要求刷新时只请求一次令牌接口，后到的线程直接复用新令牌
+        
+        Returns:
+            新的访问令牌，如果获取失败则返回None
+        """
+        generation = self._generation
+        stale_token = self.access_token
+        
+        with self._refresh_lock:
+            if self._generation != generation and self.is_token_valid():
+                return self.access_token
+            
+            with self._cache_lock():
+                # 其他进程已经换了新令牌时直接复用
+                if self._load_cache() and self.access_token != stale_token:
+                    logger.info("使用其他进程刷新的访问令牌")
+                    return self.access_token
+                
+                return self._refresh_locked()
+    
+    def _refresh_locked(self) -> Optional[str]:
+        """请求令牌接口并写入缓存，调用方需持有刷新锁"""
+        token = self._request_token()
+        if token:
+            self._generation += 1
+            self._save_cache()
+        return token
+    
+    def _request_token(self) -> Optional[str]:
+        """
+        请求百度令牌接口
         
         Returns:
             新的访问令牌，如果获取失败则返回None
         """
-        url = "https://aip.baidubce.com/oauth/2.0/token"
         params = {
             "grant_type": "client_credentials",
             "client_id": self.api_key,
@@ -78,7 +141,8 @@ class TokenManager:
         
         for attempt in range(self.max_retries):
             try:
-                response = requests.post(url, params=params, timeout=10)
+                post = self.transport.post if self.transport else requests.post
+                response = post(self.TOKEN_URL, params=params, timeout=10)
                 if response.status_code == 200:
                     result = response.json()
                     if "access_token" in result:
@@ -99,12 +163,85 @@ class TokenManager:
         
         logger.error("无法获取访问令牌")
         return None
+    
+    def _cache_lock(self):
+        """获取令牌缓存的跨进程锁，未配置缓存文件时返回空上下文"""
+        if not self.cache_file:
+            return contextlib.nullcontext()
+        return FileLock(f"{self.cache_file}.lock")
+    
+    def _cache_key(self) -> str:
+        """缓存归属标识，API Key变更后旧令牌自动失效"""
+        return hashlib.sha256(self.api_key.encode('utf-8')).hexdigest()[:16] if self.api_key else ''
+    
+    def _load_cache(self) -> bool:
+        """
+        从缓存文件加载令牌
+        
+        Returns:
+            是否加载到有效令牌
+        """
+        if not self.cache_file:
+            return False
+        
+        cached = load_json(self.cache_file, {})
+        if not isinstance(cached, dict) or cached.get('key') != self._cache_key():
+            return False
+        
+        token = cached.get('access_token')
+        expiry = cached.get('token_expiry', 0)
+        if not token or not isinstance(expiry, (int, float)) or expiry <= time.time() + 60:
+            return False
+        
+        self.access_token = token
+        self.token_expiry = expiry
+        return True
+    
+    def _save_cache(self) -> None:
+        """将令牌写入缓存文件，文件权限仅限当前用户读写"""
+        if not self.cache_file:
+            return
+        
+        data = {
+            'key': self._cache_key(),
+            'access_token': self.access_token,
+            'token_expiry': self.token_expiry
+        }
+        tmp_file = f"{self.cache_file}.tmp"
+        try:
+            ensure_dir(os.path.dirname(os.path.abspath(self.cache_file)))
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.chmod(tmp_file, stat.S_IRUSR | stat.S_IWUSR)
+            os.replace(tmp_file, self.cache_file)
+            logger.debug(f"访问令牌已缓存到: {self.cache_file}")
+        except Exception as e:
+            logger.warning(f"保存令牌缓存失败: {self.cache_file}, 错误: {e}")
 
 class BaiduOCRClient:
     """
     百度OCR API客户端
     """
     
+    # 获取异步识别结果的接口地址
+    RESULT_URL = "https://aip.baidubce.com/rest/2.0/solution/v1/form_ocr/get_request_result"
+    
+    # 公共请求头
+    REQUEST_HEADERS = {
+        'Content-Type': 'application/x-www-form-urlencoded',
+        'Accept': 'application/json'
+    }
+    
+    # Excel结果处理中时的轮询间隔（秒）
+    PENDING_POLL_INTERVAL = 2
+    
+    # 异步识别任务未完成的ret_code：1 未开始, 2 进行中
+    PENDING_RET_CODES = (1, 2)
+    
+    # QPS超限相关错误码：4 集群超限额，18 QPS超限额
+    QPS_LIMIT_ERROR_CODES = (4, 18)
+    
     def __init__(self, config: Optional[ConfigManager] = None):
         """
         初始化百度OCR客户端
@@ -122,18 +259,50 @@ class BaiduOCRClient:
         self.retry_delay = self.config.getint('API', 'retry_delay', 2)
         self.api_url = self.config.get('API', 'api_url', 'https://aip.baidubce.com/rest/2.0/ocr/v1/table')
         
+        # QPS超限时重新排队的最大次数，不计入失败重试
+        self.max_throttle_requeues = self.config.getint('API', 'max_throttle_requeues', 10)
+        
+        # 异步识别任务的轮询节奏：首次等待、退避倍数、间隔上限和单任务超时（秒）
+        self.poll_initial_interval = self.config.getfloat('API', 'poll_initial_interval', 1.0)
+        self.poll_backoff = self.config.getfloat('API', 'poll_backoff', 1.5)
+        self.poll_max_interval = self.config.getfloat('API', 'poll_max_interval', 10.0)
+        self.poll_timeout = self.config.getfloat('API', 'poll_timeout', 300.0)
+        
+        # 创建令牌桶限速器，所有线程共享
+        self.rate_limiter = RateLimiter.from_config(self.config)
+        
+        # 令牌缓存文件，多次运行之间复用访问令牌
+        self.token_cache_file = None
+        if self.config.get('API', 'token_cache_file', 'data/token_cache.json'):
+            self.token_cache_file = self.config.get_path('API', 'token_cache_file', 'data/token_cache.json', create=True)
+        
+        # 创建连接池传输层，令牌刷新与识别请求共用同一组长连接
+        self.transport = HTTPTransport.from_config(self.config)
+        
         # 创建令牌管理器
         self.token_manager = TokenManager(
             self.api_key, 
             self.secret_key, 
             self.max_retries, 
-            self.retry_delay
+            self.retry_delay,
+            self.transport,
+            self.token_cache_file
         )
         
         # 验证API配置
         if not self.api_key or not self.secret_key:
             logger.warning("API密钥未设置，请在配置文件中设置API密钥")
     
+    def close(self) -> None:
+        """关闭客户端，释放连接池"""
+        self.transport.close()
+    
+    def __enter__(self) -> 'BaiduOCRClient':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+    
     def read_image(self, image_path: str) -> Optional[bytes]:
         """
         读取图片文件为二进制数据
@@ -151,15 +320,16 @@ class BaiduOCRClient:
             logger.error(f"读取图片文件失败: {image_path}, 错误: {e}")
             return None
     
-    def recognize_table(self, image_data: Union[str, bytes]) -> Optional[Dict]:
+    def prepare_table_request(self, image_data: Union[str, bytes], is_sync: bool = True) -> Optional[Tuple[str, Dict, Dict]]:
         """
-        识别表格
+        准备表格识别请求
         
         Args:
             image_data: 图片数据，可以是文件路径或二进制数据
+            is_sync: 是否同步识别，为False时接口只返回request_id，结果需轮询获取
             
         Returns:
-            识别结果字典，如果识别失败则返回None
+            (请求地址, 请求参数, 请求头)元组，如果准备失败则返回None
         """
         # 获取访问令牌
         access_token = self.token_manager.get_token()
@@ -184,73 +354,168 @@ class BaiduOCRClient:
             'request_type': 'excel',  # 输出为Excel
             'return_excel': 'true'  # 直接返回Excel数据
         }
+        if not is_sync:
+            payload['is_sync'] = 'false'
+            del payload['return_excel']
         
-        headers = {
-            'Content-Type': 'application/x-www-form-urlencoded',
-            'Accept': 'application/json'
-        }
+        return url, payload, dict(self.REQUEST_HEADERS)
+    
+    def parse_table_response(self, status_code: int, body: Any, attempt: int) -> Tuple[str, Optional[Dict]]:
+        """
+        解析表格识别响应
         
-        # 发送请求
-        for attempt in range(self.max_retries):
+        Args:
+            status_code: HTTP状态码
+            body: 响应内容，状态码为200时为解析后的JSON，否则为响应文本
+            attempt: 当前尝试序号（从0开始）
+            
+        Returns:
+            (状态, 识别结果)元组，状态为 done/retry/throttled 之一
+        """
+        if status_code != 200:
+            logger.warning(f"表格识别请求失败 (尝试 {attempt+1}/{self.max_retries}): {body}")
+            return 'retry', None
+        
+        result = body
+        # 打印返回结果以便调试
+        logger.debug(f"百度OCR API返回结果: {result}")
+        
+        if 'error_code' in result:
+            error_msg = result.get('error_msg', '未知错误')
+            # QPS超限不算失败，交回限速器重新排队
+            if result.get('error_code') in self.QPS_LIMIT_ERROR_CODES:
+                logger.warning(f"百度OCR API限流: {error_msg}")
+                return 'throttled', None
+            
+            logger.error(f"百度OCR API错误: {error_msg}")
+            # 如果是授权错误，尝试刷新令牌
+            if result.get('error_code') in [110, 111]:  # 授权相关错误码
+                logger.info("尝试刷新访问令牌...")
+                self.token_manager.refresh_token()
+            return 'done', None
+        
+        # 兼容不同的返回结构
+        # 这是最关键的修改部分: 直接返回整个结果，不强制要求特定结构
+        return 'done', result
+    
+    def table_retry_delay(self, attempt: int) -> float:
+        """
+        计算表格识别的重试等待时间（指数退避）
+        
+        Args:
+            attempt: 当前尝试序号（从0开始）
+            
+        Returns:
+            等待秒数
+        """
+        return self.retry_delay * (2 ** attempt)
+    
+    def post_table_request(self, url: str, payload: Dict, headers: Dict) -> Optional[Dict]:
+        """
+        发送表格识别请求，经过限速器并按配置重试
+        
+        Args:
+            url: 请求地址
+            payload: 请求参数
+            headers: 请求头
+            
+        Returns:
+            接口返回结果，如果请求失败则返回None
+        """
+        attempt = 0
+        throttled = 0
+        while attempt < self.max_retries:
+            self.rate_limiter.acquire()
             try:
-                response = requests.post(
+                response = self.transport.post(
                     url, 
                     data=payload, 
                     headers=headers, 
                     timeout=self.timeout
                 )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    # 打印返回结果以便调试
-                    logger.debug(f"百度OCR API返回结果: {result}")
-                    
-                    if 'error_code' in result:
-                        error_msg = result.get('error_msg', '未知错误')
-                        logger.error(f"百度OCR API错误: {error_msg}")
-                        # 如果是授权错误，尝试刷新令牌
-                        if result.get('error_code') in [110, 111]:  # 授权相关错误码
-                            logger.info("尝试刷新访问令牌...")
-                            self.token_manager.refresh_token()
-                        return None
-                    
-                    # 兼容不同的返回结构
-                    # 这是最关键的修改部分: 直接返回整个结果，不强制要求特定结构
+                body = response.json() if response.status_code == 200 else response.text
+                state, result = self.parse_table_response(response.status_code, body, attempt)
+                if state == 'done':
                     return result
-                else:
-                    logger.warning(f"表格识别请求失败 (尝试 {attempt+1}/{self.max_retries}): {response.text}")
+                if state == 'throttled' and throttled < self.max_throttle_requeues:
+                    throttled += 1
+                    if self.rate_limiter.enabled:
+                        self.rate_limiter.penalize()
+                    else:
+                        # 未启用限速时没有令牌桶可清空，按重试间隔等待后再重新提交
+                        time.sleep(self.table_retry_delay(attempt))
+                    continue
             
             except Exception as e:
                 logger.warning(f"表格识别时发生错误 (尝试 {attempt+1}/{self.max_retries}): {e}")
             
             # 如果不是最后一次尝试，则等待后重试
             if attempt < self.max_retries - 1:
-                wait_time = self.retry_delay * (2 ** attempt)  # 指数退避
+                wait_time = self.table_retry_delay(attempt)
                 logger.info(f"将在 {wait_time} 秒后重试...")
                 time.sleep(wait_time)
+            attempt += 1
         
-        logger.error("表格识别失败")
         return None
     
-    def get_excel_result(self, request_id_or_result: Union[str, Dict]) -> Optional[bytes]:
+    def recognize_table(self, image_data: Union[str, bytes]) -> Optional[Dict]:
         """
-        获取Excel结果
+        识别表格
         
         Args:
-            request_id_or_result: 请求ID或完整的识别结果
+            image_data: 图片数据，可以是文件路径或二进制数据
             
         Returns:
-            Excel二进制数据，如果获取失败则返回None
+            识别结果字典，如果识别失败则返回None
         """
-        # 获取访问令牌
-        access_token = self.token_manager.get_token()
-        if not access_token:
-            logger.error("无法获取访问令牌，无法获取Excel结果")
+        request = self.prepare_table_request(image_data)
+        if request is None:
             return None
         
+        result = self.post_table_request(*request)
+        if result is None:
+            logger.error("表格识别失败")
+        return result
+    
+    def submit_table(self, image_data: Union[str, bytes]) -> Optional[str]:
+        """
+        异步提交表格识别任务，不等待识别完成
+        
+        Args:
+            image_data: 图片数据，可以是文件路径或二进制数据
+            
+        Returns:
+            request_id，如果提交失败则返回None
+        """
+        request = self.prepare_table_request(image_data, is_sync=False)
+        if request is None:
+            return None
+        
+        result = self.post_table_request(*request)
+        if result is None:
+            logger.error("提交表格识别任务失败")
+            return None
+        
+        _, request_id = self.resolve_excel_request(result)
+        return request_id
+    
+    def resolve_excel_request(self, request_id_or_result: Union[str, Dict]) -> Tuple[Optional[bytes], Optional[str]]:
+        """
+        从识别结果中提取直接返回的Excel数据或request_id
+        
+        Args:
+            request_id_or_result: 请求ID或完整的识别结果
+            
+        Returns:
+            (Excel二进制数据, request_id)元组，两者至多一个不为None
+        """
         # 处理直接传入结果对象的情况
         request_id = request_id_or_result
-        if isinstance(request_id_or_result, dict):
+        if isinstance(request_id_or_result, dict) and isinstance(request_id_or_result.get('result'), list):
+            # 异步提交接口返回 {"result": [{"request_id": ...}]}
+            items = request_id_or_result['result']
+            request_id = items[0].get('request_id') if items and isinstance(items[0], dict) else None
+        elif isinstance(request_id_or_result, dict):
             # v1版本兼容处理：如果结果中直接包含Excel数据
             if 'result' in request_id_or_result:
                 # 如果是同步返回的Excel结果（某些API版本会直接返回）
@@ -258,7 +523,7 @@ class BaiduOCRClient:
                     excel_content = request_id_or_result['result']['result_data']
                     if excel_content:
                         try:
-                            return base64.b64decode(excel_content)
+                            return base64.b64decode(excel_content), None
                         except Exception as e:
                             logger.error(f"解析Excel数据失败: {e}")
                 
@@ -269,7 +534,7 @@ class BaiduOCRClient:
                 elif 'tables_result' in request_id_or_result['result'] and len(request_id_or_result['result']['tables_result']) > 0:
                     # 某些版本API可能直接返回表格内容，此时可能没有request_id
                     logger.info("检测到API直接返回了表格内容，但没有request_id")
-                    return None
+                    return None, None
             # 有些版本可能request_id在顶层
             elif 'request_id' in request_id_or_result:
                 request_id = request_id_or_result['request_id']
@@ -278,60 +543,183 @@ class BaiduOCRClient:
         # 如果没有有效的request_id，无法获取结果
         if not isinstance(request_id, str):
             logger.error(f"无法从结果中提取有效的request_id: {request_id_or_result}")
-            return None
+            return None, None
+        
+        return None, request_id
+    
+    def prepare_excel_request(self, request_id: str, access_token: str) -> Tuple[str, Dict, Dict]:
+        """
+        准备获取Excel结果的请求
+        
+        Args:
+            request_id: 请求ID
+            access_token: 访问令牌
             
-        url = f"https://aip.baidubce.com/rest/2.0/solution/v1/form_ocr/get_request_result?access_token={access_token}"
+        Returns:
+            (请求地址, 请求参数, 请求头)元组
+        """
+        url = f"{self.RESULT_URL}?access_token={access_token}"
         
         payload = {
             'request_id': request_id,
             'result_type': 'excel'
         }
         
-        headers = {
-            'Content-Type': 'application/x-www-form-urlencoded',
-            'Accept': 'application/json'
-        }
+        return url, payload, dict(self.REQUEST_HEADERS)
+    
+    def parse_excel_response(self, status_code: int, body: Any, attempt: int) -> Tuple[str, Optional[bytes]]:
+        """
+        解析获取Excel结果的响应
+        
+        Args:
+            status_code: HTTP状态码
+            body: 响应内容，状态码为200时为解析后的JSON，否则为响应文本
+            attempt: 当前尝试序号（从0开始）
+            
+        Returns:
+            (状态, Excel二进制数据)元组，状态为 done/pending/retry 之一
+        """
+        if status_code != 200:
+            logger.warning(f"获取Excel结果请求失败 (尝试 {attempt+1}/{self.max_retries}): {body}")
+            return 'retry', None
+        
+        try:
+            result = body
+            logger.debug(f"获取Excel结果返回: {result}")
+            
+            # 检查是否还在处理中
+            if result.get('result', {}).get('ret_code') == 3:
+                logger.info(f"Excel结果正在处理中，等待后重试 (尝试 {attempt+1}/{self.max_retries})")
+                return 'pending', None
+            
+            # 检查是否有错误
+            if 'error_code' in result or result.get('result', {}).get('ret_code') != 0:
+                error_msg = result.get('error_msg') or result.get('result', {}).get('ret_msg', '未知错误')
+                logger.error(f"获取Excel结果失败: {error_msg}")
+                return 'done', None
+            
+            # 获取Excel内容
+            excel_content = result.get('result', {}).get('result_data')
+            if excel_content:
+                return 'done', base64.b64decode(excel_content)
+            else:
+                logger.error("Excel结果为空")
+                return 'done', None
+        
+        except Exception as e:
+            logger.error(f"解析Excel结果时出错: {e}")
+            return 'done', None
+    
+    def poll_excel_result(self, request_id: str) -> Tuple[str, Optional[bytes]]:
+        """
+        查询一次异步识别任务的结果，不做等待和重试，由调用方决定轮询节奏
+        
+        Args:
+            request_id: 请求ID
+            
+        Returns:
+            (状态, Excel二进制数据)元组，状态为 done/pending/failed/retry 之一
+        """
+        access_token = self.token_manager.get_token()
+        if not access_token:
+            return 'retry', None
+        
+        url, payload, headers = self.prepare_excel_request(request_id, access_token)
+        try:
+            response = self.transport.post(url, data=payload, headers=headers, timeout=self.timeout)
+            if response.status_code != 200:
+                logger.warning(f"查询识别结果请求失败: {request_id}, {response.text}")
+                return 'retry', None
+            result = response.json()
+        except Exception as e:
+            logger.warning(f"查询识别结果时发生错误: {request_id}, {e}")
+            return 'retry', None
+        
+        logger.debug(f"查询识别结果返回: {result}")
+        if 'error_code' in result:
+            if result.get('error_code') in self.QPS_LIMIT_ERROR_CODES:
+                return 'retry', None
+            logger.error(f"查询识别结果失败: {request_id}, {result.get('error_msg', '未知错误')}")
+            return 'failed', None
+        
+        task = result.get('result', {})
+        ret_code = task.get('ret_code')
+        excel_content = task.get('result_data')
+        
+        # ret_code: 1 未开始, 2 进行中, 3 已完成；部分接口版本完成时返回0
+        if ret_code in self.PENDING_RET_CODES or (ret_code == 3 and not excel_content):
+            return 'pending', None
+        if ret_code in (0, 3) and excel_content:
+            try:
+                return 'done', base64.b64decode(excel_content)
+            except Exception as e:
+                logger.error(f"解析Excel数据失败: {request_id}, {e}")
+                return 'failed', None
+        
+        logger.error(f"识别任务失败: {request_id}, ret_code={ret_code}, {task.get('ret_msg', '未知错误')}")
+        return 'failed', None
+    
+    def wait_excel_result(self, request_id: str) -> Optional[bytes]:
+        """
+        按轮询节奏等待异步识别任务完成
+        
+        Args:
+            request_id: 请求ID
+            
+        Returns:
+            Excel二进制数据，任务失败或超时则返回None
+        """
+        interval = self.poll_initial_interval
+        deadline = time.time() + self.poll_timeout
+        while True:
+            state, excel_data = self.poll_excel_result(request_id)
+            if state == 'done':
+                return excel_data
+            if state == 'failed':
+                return None
+            if time.time() + interval > deadline:
+                logger.error(f"识别任务超时: request_id={request_id}")
+                return None
+            time.sleep(interval)
+            interval = min(self.poll_max_interval, interval * self.poll_backoff)
+    
+    def get_excel_result(self, request_id_or_result: Union[str, Dict]) -> Optional[bytes]:
+        """
+        获取Excel结果
+        
+        Args:
+            request_id_or_result: 请求ID或完整的识别结果
+            
+        Returns:
+            Excel二进制数据，如果获取失败则返回None
+        """
+        # 获取访问令牌
+        access_token = self.token_manager.get_token()
+        if not access_token:
+            logger.error("无法获取访问令牌，无法获取Excel结果")
+            return None
+        
+        excel_data, request_id = self.resolve_excel_request(request_id_or_result)
+        if excel_data is not None or request_id is None:
+            return excel_data
+        
+        url, payload, headers = self.prepare_excel_request(request_id, access_token)
         
         for attempt in range(self.max_retries):
             try:
-                response = requests.post(
+                response = self.transport.post(
                     url, 
                     data=payload, 
                     headers=headers, 
                     timeout=self.timeout
                 )
-                
-                if response.status_code == 200:
-                    try:
-                        result = response.json()
-                        logger.debug(f"获取Excel结果返回: {result}")
-                        
-                        # 检查是否还在处理中
-                        if result.get('result', {}).get('ret_code') == 3:
-                            logger.info(f"Excel结果正在处理中，等待后重试 (尝试 {attempt+1}/{self.max_retries})")
-                            time.sleep(2)
-                            continue
-                        
-                        # 检查是否有错误
-                        if 'error_code' in result or result.get('result', {}).get('ret_code') != 0:
-                            error_msg = result.get('error_msg') or result.get('result', {}).get('ret_msg', '未知错误')
-                            logger.error(f"获取Excel结果失败: {error_msg}")
-                            return None
-                        
-                        # 获取Excel内容
-                        excel_content = result.get('result', {}).get('result_data')
-                        if excel_content:
-                            return base64.b64decode(excel_content)
-                        else:
-                            logger.error("Excel结果为空")
-                            return None
-                    
-                    except Exception as e:
-                        logger.error(f"解析Excel结果时出错: {e}")
-                        return None
-                
-                else:
-                    logger.warning(f"获取Excel结果请求失败 (尝试 {attempt+1}/{self.max_retries}): {response.text}")
+                body = response.json() if response.status_code == 200 else response.text
+                state, excel_data = self.parse_excel_response(response.status_code, body, attempt)
+                if state == 'done':
+                    return excel_data
+                if state == 'pending':
+                    time.sleep(self.PENDING_POLL_INTERVAL)
+                    continue
             
             except Exception as e:
                 logger.warning(f"获取Excel结果时发生错误 (尝试 {attempt+1}/{self.max_retries}): {e}")
@@ -341,4 +729,4 @@ class BaiduOCRClient:
                 time.sleep(self.retry_delay * (attempt + 1))
         
         logger.error("获取Excel结果失败")
-        return None 
\ No newline at end of file
+        return None 
@@ -0,0 +1,262 @@
+"""
+OCR任务日志模块
+-------------
+以追加写入的JSON Lines记录每张图片的识别进度（排队/已提交/已下载/已写入），
+进程意外退出后重启可从最后一个持久化状态继续，不再重复上传和付费识别。
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+import contextlib
+from typing import Dict, Iterator, Optional
+
+from ..utils.log_utils import get_logger
+from ..utils.file_utils import FileLock, ensure_dir
+
+logger = get_logger(__name__)
+
+class OCRJobJournal:
+    """
+    OCR任务日志
+
+    每次状态变化追加一行并立即落盘；已写入的任务在下次加载时被压缩掉。
+    已下载但尚未写出的Excel数据暂存在日志旁的目录中。
+    多个进程可以共用同一个日志：追加和压缩都在跨进程文件锁内进行，锁被占用时跳过压缩。
+    """
+
+    QUEUED = 'queued'
+    SUBMITTED = 'submitted'
+    DOWNLOADED = 'downloaded'
+    WRITTEN = 'written'
+
+    def __init__(self, journal_file: str):
+        """
+        初始化任务日志
+
+        Args:
+            journal_file: 日志文件路径
+        """
+        self.journal_file = journal_file
+        self.spool_dir = os.path.abspath(f"{os.path.splitext(journal_file)[0]}_spool")
+        self.lock_file = f"{journal_file}.lock"
+
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict] = {}
+
+        ensure_dir(os.path.dirname(os.path.abspath(journal_file)))
+        ensure_dir(self.spool_dir)
+        self._load()
+
+    def _load(self) -> None:
+        """重放日志，能拿到文件锁时压缩日志并清理暂存文件，只保留未完成的任务"""
+        lock = FileLock(self.lock_file)
+        compact = lock.acquire(blocking=False)
+        try:
+            if os.path.exists(self.journal_file):
+                with open(self.journal_file, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                            image_path = entry['image']
+                        except (ValueError, KeyError, TypeError):
+                            # 断电时最后一行可能只写了一半
+                            continue
+                        if entry.get('state') == self.WRITTEN:
+                            self._jobs.pop(image_path, None)
+                        else:
+                            self._jobs[image_path] = entry
+
+            if compact:
+                self._compact()
+            else:
+                # 其他进程正在写日志，不能在它之下改写文件或删除它的暂存文件
+                logger.info(f"任务日志正被其他进程使用，本次跳过压缩: {self.journal_file}")
+        finally:
+            if compact:
+                lock.release()
+
+        if self._jobs:
+            counts: Dict[str, int] = {}
+            for entry in self._jobs.values():
+                counts[entry['state']] = counts.get(entry['state'], 0) + 1
+            summary = ', '.join(f"{state}={count}" for state, count in counts.items())
+            logger.info(f"从任务日志恢复 {len(self._jobs)} 个未完成的识别任务: {summary}")
+
+    def _compact(self) -> None:
+        """改写日志只保留未完成的任务，并删除不再被引用的暂存文件，调用方需持有文件锁"""
+        tmp_file = f"{self.journal_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            for entry in self._jobs.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.journal_file)
+
+        referenced = {os.path.abspath(entry['spool']) for entry in self._jobs.values() if entry.get('spool')}
+        for name in os.listdir(self.spool_dir):
+            path = os.path.join(self.spool_dir, name)
+            if path not in referenced:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    @contextlib.contextmanager
+    def _locked(self) -> Iterator[None]:
+        """同时持有线程锁和跨进程文件锁，期间其他进程不会压缩日志或清理暂存文件"""
+        with self._lock:
+            with FileLock(self.lock_file):
+                yield
+
+    def _append(self, entry: Dict) -> None:
+        """追加一条记录并落盘，调用方需通过 _locked 持有锁"""
+        with open(self.journal_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _update(self, image_path: str, state: str, **fields) -> Dict:
+        """记录图片的新状态，保留此前已知的字段，调用方需通过 _locked 持有锁"""
+        entry = dict(self._jobs.get(image_path) or {})
+        if state == self.QUEUED or not entry:
+            # 重新排队时记录源文件指纹，用于恢复时判断图片是否被替换
+            entry = {'image': image_path}
+            try:
+                stat = os.stat(image_path)
+                entry.update(size=stat.st_size, mtime=stat.st_mtime)
+            except OSError:
+                pass
+        entry.update(fields, state=state, time=time.time())
+
+        self._append(entry)
+        if state == self.WRITTEN:
+            self._jobs.pop(image_path, None)
+        else:
+            self._jobs[image_path] = entry
+        return entry
+
+    def get(self, image_path: str) -> Optional[Dict]:
+        """
+        获取图片未完成的任务记录
+
+        Args:
+            image_path: 图片文件路径
+
+        Returns:
+            任务记录，图片没有未完成的任务或已被替换时返回None
+        """
+        with self._lock:
+            entry = self._jobs.get(image_path)
+        if entry is None:
+            return None
+
+        try:
+            stat = os.stat(image_path)
+            unchanged = stat.st_size == entry.get('size') and stat.st_mtime == entry.get('mtime')
+        except OSError:
+            unchanged = False
+
+        if not unchanged:
+            logger.info(f"图片已变更，丢弃旧的识别任务: {image_path}")
+            self.discard(image_path)
+            return None
+
+        return entry
+
+    def mark_queued(self, image_path: str) -> None:
+        """
+        标记图片即将上传
+
+        Args:
+            image_path: 图片文件路径
+        """
+        with self._locked():
+            self._update(image_path, self.QUEUED)
+
+    def mark_submitted(self, image_path: str, request_id: str) -> None:
+        """
+        标记图片已提交识别
+
+        Args:
+            image_path: 图片文件路径
+            request_id: 识别任务的request_id
+        """
+        with self._locked():
+            self._update(image_path, self.SUBMITTED, request_id=request_id)
+
+    def mark_downloaded(self, image_path: str, excel_data: bytes) -> None:
+        """
+        暂存已下载的Excel数据并标记
+
+        Args:
+            image_path: 图片文件路径
+            excel_data: Excel二进制数据
+        """
+        name = hashlib.sha1(os.path.abspath(image_path).encode('utf-8')).hexdigest()
+        spool_file = os.path.join(self.spool_dir, f"{name}.xlsx")
+        tmp_file = f"{spool_file}.tmp"
+        # 暂存文件写完并登记之前，其他进程不能把它当作无引用文件清理掉
+        with self._locked():
+            with open(tmp_file, 'wb') as f:
+                f.write(excel_data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, spool_file)
+
+            self._update(image_path, self.DOWNLOADED, spool=spool_file)
+
+    def mark_written(self, image_path: str, output_file: str) -> None:
+        """
+        标记Excel已写出，任务结束
+
+        Args:
+            image_path: 图片文件路径
+            output_file: 输出Excel文件路径
+        """
+        with self._locked():
+            if image_path not in self._jobs:
+                return
+            entry = self._update(image_path, self.WRITTEN, output=output_file)
+        self._remove_spool(entry)
+
+    def discard(self, image_path: str) -> None:
+        """
+        丢弃图片的任务记录，下次处理时重新提交
+
+        Args:
+            image_path: 图片文件路径
+        """
+        with self._locked():
+            entry = self._jobs.pop(image_path, None)
+            if entry is None:
+                return
+            self._append({'image': image_path, 'state': self.WRITTEN, 'time': time.time()})
+        self._remove_spool(entry)
+
+    def load_downloaded(self, entry: Dict) -> Optional[bytes]:
+        """
+        读取已下载任务暂存的Excel数据
+
+        Args:
+            entry: 任务记录
+
+        Returns:
+            Excel二进制数据，暂存文件丢失时返回None
+        """
+        try:
+            with open(entry['spool'], 'rb') as f:
+                return f.read()
+        except (OSError, KeyError):
+            return None
+
+    def _remove_spool(self, entry: Dict) -> None:
+        """删除任务的暂存文件"""
+        spool_file = entry.get('spool')
+        if spool_file and os.path.exists(spool_file):
+            try:
+                os.remove(spool_file)
+            except OSError:
+                pass
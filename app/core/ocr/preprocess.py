@@ -0,0 +1,230 @@
+"""
+图片预处理模块
+-----------
+在上传OCR之前对图片做方向校正、缩放和JPEG重编码，
+在多进程中并行执行，减小上传体积并避免大图被直接拒绝。
+"""
+
+import os
+import io
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, List, Optional, Tuple
+
+from ...config.settings import ConfigManager
+from ..utils.log_utils import get_logger
+from ..utils.file_utils import ensure_dir, save_json
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+logger = get_logger(__name__)
+
+def source_fingerprint(image_path: str) -> Optional[Tuple[int, float]]:
+    """
+    获取原图的(大小, 修改时间)，用于判断预处理结果是否过期
+
+    Args:
+        image_path: 原始图片路径
+
+    Returns:
+        (大小, 修改时间)元组，读取失败时返回None
+    """
+    try:
+        stat = os.stat(image_path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime
+
+def preprocess_image(image_path: str, options: Dict) -> Dict:
+    """
+    预处理单张图片（在子进程中执行）
+
+    Args:
+        image_path: 原始图片路径
+        options: 预处理参数，见 ImagePreprocessor.options
+
+    Returns:
+        处理结果字典，包含 source/fingerprint/output/original_bytes/processed_bytes/quality/error
+    """
+    # 先取指纹再读图，处理期间原图被替换时下次查询会重新处理
+    fingerprint = source_fingerprint(image_path)
+    original_bytes = fingerprint[0] if fingerprint else 0
+    result = {
+        'source': image_path,
+        'fingerprint': fingerprint,
+        'output': image_path,
+        'original_bytes': original_bytes,
+        'processed_bytes': original_bytes,
+        'quality': None,
+        'error': None
+    }
+
+    try:
+        with Image.open(image_path) as img:
+            exif_orientation = img.getexif().get(0x0112, 1)
+            needs_resize = max(img.size) > options['max_edge']
+            needs_gray = options['grayscale'] and img.mode != 'L'
+
+            # 尺寸、方向和体积都符合要求时保留原图
+            if not needs_resize and not needs_gray and exif_orientation == 1 \
+                    and original_bytes <= options['max_bytes']:
+                return result
+
+            img = ImageOps.exif_transpose(img)
+            img = img.convert('L' if options['grayscale'] else 'RGB')
+            if needs_resize:
+                img.thumbnail((options['max_edge'], options['max_edge']), Image.LANCZOS)
+
+            # 从高质量开始逐步降低，直到满足体积预算
+            data = b''
+            quality = options['max_quality']
+            while True:
+                buffer = io.BytesIO()
+                img.save(buffer, format='JPEG', quality=quality, optimize=True)
+                data = buffer.getvalue()
+                if len(data) <= options['max_bytes'] or quality <= options['min_quality']:
+                    break
+                quality = max(options['min_quality'], quality - options['quality_step'])
+
+        # 以原路径哈希命名，避免不同目录的同名图片互相覆盖
+        name = os.path.splitext(os.path.basename(image_path))[0]
+        suffix = hashlib.sha1(os.path.abspath(image_path).encode('utf-8')).hexdigest()[:8]
+        output_path = os.path.join(options['output_folder'], f"{name}_{suffix}.jpg")
+        with open(output_path, 'wb') as f:
+            f.write(data)
+
+        result.update(output=output_path, processed_bytes=len(data), quality=quality)
+    except Exception as e:
+        result['error'] = str(e)
+
+    return result
+
+class ImagePreprocessor:
+    """
+    图片预处理器：自动旋转、缩放长边、按体积预算自适应JPEG质量、可选灰度化
+    """
+
+    def __init__(self, config: ConfigManager):
+        """
+        初始化图片预处理器
+
+        Args:
+            config: 配置管理器
+        """
+        self.enabled = config.getboolean('Preprocess', 'enabled', True)
+        self.max_workers = config.getint('Preprocess', 'max_workers', 0) or os.cpu_count() or 1
+
+        output_folder = os.path.join(
+            config.get_path('Paths', 'temp_folder', 'data/temp', create=True),
+            'preprocessed'
+        )
+        ensure_dir(output_folder)
+        self.stats_file = os.path.join(output_folder, 'preprocess_stats.json')
+
+        self.options = {
+            'max_edge': config.getint('Preprocess', 'max_edge', 3000),
+            'max_bytes': int(config.getfloat('Preprocess', 'max_upload_mb', 3.0) * 1024 * 1024),
+            'max_quality': config.getint('Preprocess', 'max_quality', 90),
+            'min_quality': config.getint('Preprocess', 'min_quality', 50),
+            'quality_step': config.getint('Preprocess', 'quality_step', 10),
+            'grayscale': config.getboolean('Preprocess', 'grayscale', False),
+            'output_folder': output_folder
+        }
+
+        if self.enabled and Image is None:
+            logger.warning("未安装Pillow，图片预处理已禁用，将直接上传原图")
+            self.enabled = False
+
+        # 原图路径 -> 预处理结果，原图大小或修改时间变化后结果作废；任务写出后由 release 移除
+        self.results: Dict[str, Dict] = {}
+
+    def _lookup(self, image_path: str) -> Optional[Dict]:
+        """获取原图仍然有效的预处理结果"""
+        result = self.results.get(image_path)
+        if result is None:
+            return None
+        fingerprint = source_fingerprint(image_path)
+        if fingerprint is None or fingerprint != result['fingerprint']:
+            return None
+        return result
+
+    def _record(self, result: Dict) -> None:
+        """记录单张图片的处理结果"""
+        self.results[result['source']] = result
+        if result['error']:
+            logger.warning(f"图片预处理失败，使用原图: {result['source']}, 错误: {result['error']}")
+        elif result['output'] != result['source']:
+            logger.info(f"图片预处理: {os.path.basename(result['source'])} "
+                        f"{result['original_bytes'] / 1024:.0f}KB -> {result['processed_bytes'] / 1024:.0f}KB "
+                        f"(质量={result['quality']})")
+
+    def prepare(self, image_paths: List[str]) -> None:
+        """
+        在进程池中并行预处理一批图片，并保存本批次处理前后的字节数统计
+
+        Args:
+            image_paths: 原始图片路径列表
+        """
+        pending = [path for path in image_paths if self._lookup(path) is None]
+        if not self.enabled or not pending:
+            return
+
+        workers = min(self.max_workers, len(pending))
+        if workers <= 1:
+            results = [preprocess_image(path, self.options) for path in pending]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(preprocess_image, pending, repeat(self.options)))
+
+        for result in results:
+            self._record(result)
+
+        before = sum(r['original_bytes'] for r in results)
+        after = sum(r['processed_bytes'] for r in results)
+        logger.info(f"预处理完成 {len(results)} 张图片, 总大小 {before / 1024 / 1024:.2f}MB -> {after / 1024 / 1024:.2f}MB")
+
+        # 只保存本批次的统计，文件大小不随运行时间增长
+        save_json(
+            {r['source']: {k: r[k] for k in ('output', 'original_bytes', 'processed_bytes', 'quality')}
+             for r in results},
+            self.stats_file
+        )
+
+    def get_upload_path(self, image_path: str) -> str:
+        """
+        获取实际上传的图片路径，尚未预处理的图片在当前进程中即时处理
+
+        Args:
+            image_path: 原始图片路径
+
+        Returns:
+            预处理后的图片路径，未启用或处理失败时返回原路径
+        """
+        if not self.enabled:
+            return image_path
+
+        result = self._lookup(image_path)
+        if result is None:
+            result = preprocess_image(image_path, self.options)
+            self._record(result)
+
+        return result['output']
+
+    def release(self, image_path: str) -> None:
+        """
+        任务写出后删除图片的预处理结果和预处理生成的文件
+
+        Args:
+            image_path: 原始图片路径
+        """
+        result = self.results.pop(image_path, None)
+        if result is None or result['output'] == result['source']:
+            return
+        try:
+            os.remove(result['output'])
+        except OSError:
+            pass
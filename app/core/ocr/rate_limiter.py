@@ -0,0 +1,144 @@
+"""
+请求限速模块
+----------
+令牌桶限速器，按百度表格识别接口的QPS配额控制请求速率。
+"""
+
+import os
+import json
+import time
+import threading
+from typing import Optional
+
+from ...config.settings import ConfigManager
+from ..utils.log_utils import get_logger
+from ..utils.file_utils import FileLock
+
+logger = get_logger(__name__)
+
+class RateLimiter:
+    """
+    令牌桶限速器
+
+    同一进程内所有线程共享一个令牌桶；配置锁文件后，
+    桶状态保存在锁文件中，同时运行的多个进程共享同一个配额。
+    """
+
+    def __init__(self, qps: float = 2.0, burst: int = 2, lock_file: Optional[str] = None):
+        """
+        初始化限速器
+
+        Args:
+            qps: 每秒补充的令牌数，小于等于0表示不限速
+            burst: 令牌桶容量，即允许的瞬时突发请求数
+            lock_file: 跨进程共享时使用的锁文件路径，为None则只在进程内共享
+        """
+        self.qps = qps
+        self.burst = max(1, burst)
+        self.lock_file = lock_file
+
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = time.time()
+
+    @classmethod
+    def from_config(cls, config: ConfigManager) -> 'RateLimiter':
+        """
+        根据配置创建限速器
+
+        Args:
+            config: 配置管理器
+
+        Returns:
+            限速器实例
+        """
+        lock_file = None
+        if config.getboolean('API', 'qps_shared', False):
+            lock_file = config.get_path('API', 'qps_lock_file', 'data/temp/ocr_qps.lock', create=True)
+
+        return cls(
+            qps=config.getfloat('API', 'qps', 2.0),
+            burst=config.getint('API', 'burst', 2),
+            lock_file=lock_file
+        )
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用限速"""
+        return self.qps > 0
+
+    def _take(self, tokens: float, updated: float, now: float):
+        """
+        按流逝时间补充令牌并尝试取出一个
+
+        Returns:
+            (剩余令牌数, 需要等待的秒数)元组，等待秒数为0表示取到令牌
+        """
+        tokens = min(float(self.burst), tokens + (now - updated) * self.qps)
+        if tokens >= 1:
+            return tokens - 1, 0.0
+        return tokens, (1 - tokens) / self.qps
+
+    def try_acquire(self) -> float:
+        """
+        尝试取出一个令牌，不阻塞
+
+        Returns:
+            0表示成功取到令牌，否则为建议等待的秒数
+        """
+        if not self.enabled:
+            return 0.0
+
+        with self._lock:
+            if self.lock_file:
+                return self._try_acquire_shared()
+
+            now = time.time()
+            self._tokens, wait = self._take(self._tokens, self._updated, now)
+            self._updated = now
+            return wait
+
+    def _try_acquire_shared(self) -> float:
+        """在锁文件中读写桶状态，实现跨进程共享"""
+        with FileLock(self.lock_file) as lock:
+            now = time.time()
+            tokens, updated = float(self.burst), now
+            try:
+                state = json.loads(lock.read_text() or '{}')
+                tokens = float(state.get('tokens', tokens))
+                updated = float(state.get('updated', updated))
+            except (ValueError, TypeError):
+                logger.warning(f"限速状态文件损坏，已重置: {self.lock_file}")
+
+            # 其他进程的时钟回拨时不补充令牌
+            tokens, wait = self._take(tokens, min(updated, now), now)
+            lock.write_text(json.dumps({'tokens': tokens, 'updated': now, 'pid': os.getpid()}))
+            return wait
+
+    def acquire(self) -> None:
+        """取出一个令牌，令牌不足时阻塞等待"""
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def penalize(self) -> None:
+        """
+        服务端返回QPS超限时清空令牌桶，让所有调用方一起退避
+
+        未启用限速时不做任何处理，调用方需要自行等待后再重试
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            now = time.time()
+            if self.lock_file:
+                with FileLock(self.lock_file) as lock:
+                    lock.write_text(json.dumps({'tokens': 0.0, 'updated': now, 'pid': os.getpid()}))
+            else:
+                self._tokens = 0.0
+                self._updated = now
+
+        logger.info(f"触发接口QPS限制，令牌桶已清空，约 {1 / self.qps:.2f} 秒后恢复")
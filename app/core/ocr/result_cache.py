@@ -0,0 +1,211 @@
+"""
+OCR结果缓存模块
+-------------
+按图片内容的SHA-256缓存OCR原始结果和Excel数据，
+相同内容的图片（重拍、改名、重复提交）不再重复调用付费接口。
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import Future
+from typing import Dict, Optional, Tuple
+
+from ..utils.log_utils import get_logger
+from ..utils.file_utils import ensure_dir
+
+logger = get_logger(__name__)
+
+class OCRResultCache:
+    """
+    基于内容哈希的OCR结果缓存
+
+    每条缓存包含 <hash>.json（接口原始返回）和 <hash>.xlsx（解码后的Excel），
+    按哈希前两位分目录存放；超过最大保存天数或总大小超限时按最近使用时间淘汰。
+    """
+
+    def __init__(self, cache_dir: str, max_size_mb: float = 500, max_age_days: float = 90):
+        """
+        初始化结果缓存
+
+        Args:
+            cache_dir: 缓存目录
+            max_size_mb: 缓存总大小上限（MB），小于等于0表示不限制
+            max_age_days: 缓存最长保存天数，小于等于0表示不限制
+        """
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.max_age_seconds = max_age_days * 86400
+
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+        self._total_size: Optional[int] = None
+
+        ensure_dir(self.cache_dir)
+
+    @staticmethod
+    def hash_bytes(data: bytes) -> str:
+        """
+        计算内容哈希
+
+        Args:
+            data: 图片二进制数据
+
+        Returns:
+            SHA-256十六进制字符串
+        """
+        return hashlib.sha256(data).hexdigest()
+
+    def _entry_paths(self, digest: str) -> Tuple[str, str]:
+        """获取缓存条目的JSON和Excel文件路径"""
+        directory = os.path.join(self.cache_dir, digest[:2])
+        return os.path.join(directory, f"{digest}.json"), os.path.join(directory, f"{digest}.xlsx")
+
+    def get(self, digest: str) -> Optional[Tuple[Dict, bytes]]:
+        """
+        读取缓存
+
+        Args:
+            digest: 图片内容哈希
+
+        Returns:
+            (OCR原始结果, Excel数据)元组，未命中时返回None
+        """
+        json_path, excel_path = self._entry_paths(digest)
+        if not os.path.exists(excel_path):
+            return None
+
+        try:
+            if self.max_age_seconds > 0 and time.time() - os.path.getmtime(excel_path) > self.max_age_seconds:
+                self._remove(digest)
+                return None
+
+            with open(excel_path, 'rb') as f:
+                excel_data = f.read()
+            ocr_result = {}
+            if os.path.exists(json_path):
+                with open(json_path, 'r', encoding='utf-8') as f:
+                    ocr_result = json.load(f)
+
+            # 更新访问时间，作为淘汰依据
+            os.utime(excel_path, None)
+            return ocr_result, excel_data
+        except Exception as e:
+            logger.warning(f"读取OCR结果缓存失败: {digest}, 错误: {e}")
+            return None
+
+    def put(self, digest: str, ocr_result: Optional[Dict], excel_data: bytes) -> None:
+        """
+        写入缓存
+
+        Args:
+            digest: 图片内容哈希
+            ocr_result: OCR原始结果
+            excel_data: 解码后的Excel数据
+        """
+        json_path, excel_path = self._entry_paths(digest)
+        try:
+            ensure_dir(os.path.dirname(excel_path))
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(ocr_result or {}, f, ensure_ascii=False)
+            # Excel最后写入，存在即代表条目完整
+            tmp_path = f"{excel_path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(excel_data)
+            os.replace(tmp_path, excel_path)
+        except Exception as e:
+            logger.warning(f"写入OCR结果缓存失败: {digest}, 错误: {e}")
+            return
+
+        with self._lock:
+            if self._total_size is not None:
+                self._total_size += os.path.getsize(json_path) + len(excel_data)
+            over_limit = self.max_size_bytes > 0 and (self._total_size or 0) > self.max_size_bytes
+
+        if over_limit:
+            self.evict()
+
+    def claim(self, digest: str) -> Tuple[bool, Future]:
+        """
+        登记一次进行中的识别，合并同一批次内相同内容的并发请求
+
+        Args:
+            digest: 图片内容哈希
+
+        Returns:
+            (是否由调用方负责识别, 结果Future)元组。
+            负责识别的调用方完成后必须调用 resolve；其余调用方等待Future，结果为Excel数据或None
+        """
+        with self._lock:
+            future = self._in_flight.get(digest)
+            if future is not None:
+                return False, future
+            future = Future()
+            self._in_flight[digest] = future
+            return True, future
+
+    def resolve(self, digest: str, excel_data: Optional[bytes]) -> None:
+        """
+        发布识别结果并唤醒等待同一内容的调用方
+
+        Args:
+            digest: 图片内容哈希
+            excel_data: Excel数据，识别失败时为None
+        """
+        with self._lock:
+            future = self._in_flight.pop(digest, None)
+        if future is not None and not future.done():
+            future.set_result(excel_data)
+
+    def _remove(self, digest: str) -> int:
+        """删除缓存条目，返回释放的字节数"""
+        freed = 0
+        for path in self._entry_paths(digest):
+            try:
+                freed += os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                pass
+        return freed
+
+    def evict(self) -> int:
+        """
+        淘汰过期条目，并在总大小超限时按最近使用时间淘汰最旧的条目
+
+        Returns:
+            淘汰的条目数
+        """
+        entries = []
+        total = 0
+        now = time.time()
+        for sub in os.scandir(self.cache_dir):
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub.path):
+                if not entry.name.endswith('.xlsx'):
+                    continue
+                digest = entry.name[:-len('.xlsx')]
+                stat = entry.stat()
+                json_path, _ = self._entry_paths(digest)
+                size = stat.st_size + (os.path.getsize(json_path) if os.path.exists(json_path) else 0)
+                entries.append((stat.st_mtime, digest, size))
+                total += size
+
+        entries.sort()
+        removed = 0
+        for mtime, digest, size in entries:
+            expired = self.max_age_seconds > 0 and now - mtime > self.max_age_seconds
+            oversize = self.max_size_bytes > 0 and total > self.max_size_bytes
+            if not expired and not oversize:
+                break
+            total -= self._remove(digest) or size
+            removed += 1
+
+        with self._lock:
+            self._total_size = total
+
+        if removed:
+            logger.info(f"OCR结果缓存淘汰 {removed} 条，当前占用 {total / 1024 / 1024:.1f}MB")
+        return removed
@@ -0,0 +1,121 @@
+"""
+识别任务调度模块
+-------------
+常驻线程池加有界在途窗口的连续调度器：任一任务完成立即补入下一个，
+吞吐只受最慢的单个请求影响，不再受批次边界拖累。
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+def _file_mtime(path: str) -> float:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0.0
+
+# 调度顺序：fifo 按给定顺序，smallest 小文件优先，oldest 修改时间最早优先
+ORDERINGS: Dict[str, Callable[[List[str]], List[str]]] = {
+    'fifo': lambda paths: list(paths),
+    'smallest': lambda paths: sorted(paths, key=_file_size),
+    'oldest': lambda paths: sorted(paths, key=_file_mtime),
+}
+
+class WorkQueueScheduler:
+    """
+    连续工作队列调度器
+
+    线程池在多次运行之间复用；同时提交到线程池的任务数不超过在途窗口，
+    每完成一个任务就补入一个新任务，并回调一次进度。
+    """
+
+    def __init__(self, worker: Callable[[str], Optional[str]], max_workers: int = 4,
+                 max_in_flight: int = 0, order: str = 'fifo'):
+        """
+        初始化调度器
+
+        Args:
+            worker: 处理单个文件的函数，返回输出文件路径，失败返回None
+            max_workers: 常驻线程数
+            max_in_flight: 在途任务上限，小于等于0时为线程数的2倍
+            order: 调度顺序，fifo/smallest/oldest 之一
+        """
+        self.worker = worker
+        self.max_workers = max(1, max_workers)
+        self.max_in_flight = max_in_flight if max_in_flight > 0 else self.max_workers * 2
+
+        if order not in ORDERINGS:
+            logger.warning(f"未知的调度顺序: {order}，使用fifo")
+            order = 'fifo'
+        self.order = order
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """常驻线程池，首次使用时创建"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='ocr-worker')
+        return self._executor
+
+    def run(self, paths: List[str],
+            on_result: Optional[Callable[[str, Optional[str]], None]] = None) -> Tuple[int, int]:
+        """
+        调度处理一组文件
+
+        Args:
+            paths: 文件路径列表
+            on_result: 每个文件完成时的回调，参数为(文件路径, 输出文件路径)
+
+        Returns:
+            (总处理数, 成功处理数)元组
+        """
+        queue = ORDERINGS[self.order](paths)
+        total = len(queue)
+        completed = 0
+        success = 0
+        in_flight = {}
+
+        logger.info(f"开始调度 {total} 个文件, 线程数: {self.max_workers}, 在途上限: {self.max_in_flight}, 顺序: {self.order}")
+
+        next_index = 0
+        while next_index < total or in_flight:
+            while next_index < total and len(in_flight) < self.max_in_flight:
+                path = queue[next_index]
+                in_flight[self.executor.submit(self.worker, path)] = path
+                next_index += 1
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = in_flight.pop(future)
+                try:
+                    output_file = future.result()
+                except Exception as e:
+                    logger.error(f"处理文件时出错: {path}, 错误: {e}")
+                    output_file = None
+
+                completed += 1
+                if output_file is not None:
+                    success += 1
+                logger.info(f"处理进度 {completed}/{total} ({completed * 100 // total}%): {os.path.basename(path)}")
+                if on_result:
+                    on_result(path, output_file)
+
+        return total, success
+
+    def close(self) -> None:
+        """关闭常驻线程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -9,50 +9,134 @@ import sys
 import time
 import json
 import base64
+import atexit
+import sqlite3
+import threading
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, List, Optional, Tuple, Union, Any
+from typing import Callable, Dict, List, Optional, Tuple, Union, Any
 
 from ...config.settings import ConfigManager
 from ..utils.log_utils import get_logger
 from ..utils.file_utils import (
     ensure_dir, 
     get_file_extension, 
-    get_files_by_extensions, 
     generate_timestamp_filename,
     is_file_size_valid,
-    load_json,
-    save_json
+    load_json
 )
 from .baidu_ocr import BaiduOCRClient
+from .result_cache import OCRResultCache
+from .preprocess import ImagePreprocessor
+from .job_journal import OCRJobJournal
+from .scheduler import WorkQueueScheduler
+from .table_result import has_tables
+from ..utils.dir_index import DirectoryIndex
 
 logger = get_logger(__name__)
 
 class ProcessedRecordManager:
-    """处理记录管理器，用于跟踪已处理的文件"""
+    """
+    处理记录管理器，用于跟踪已处理的文件
+    
+    记录保存在与记录文件同名的SQLite数据库（WAL模式）中，按输入文件路径建主键索引；
+    新记录先进入内存缓冲，累积到一定数量或超过一定时间后批量提交。
+    旧版本的JSON记录文件在首次打开数据库时导入一次。
+    """
+    
+    # 缓冲记录达到该数量时提交
+    FLUSH_BATCH_SIZE = 50
+    
+    # 距上次提交超过该秒数时提交
+    FLUSH_INTERVAL = 2.0
+    
+    # 批量查询时每条SQL的参数个数，低于SQLite的参数上限
+    QUERY_CHUNK_SIZE = 500
     
     def __init__(self, record_file: str):
         """
         初始化处理记录管理器
         
         Args:
-            record_file: 记录文件路径
+            record_file: 记录文件路径，数据库保存在同目录下的同名.db文件中
         """
         self.record_file = record_file
-        self.processed_files = self._load_record()
+        self.db_file = f"{os.path.splitext(record_file)[0]}.db"
+        
+        self._lock = threading.RLock()
+        self._pending: Dict[str, str] = {}
+        self._last_flush = time.time()
+        self._conn = self._connect()
+        self._import_json_record()
+        
+        # 进程退出前提交缓冲中的记录
+        atexit.register(self.close)
     
-    def _load_record(self) -> Dict[str, str]:
+    def _connect(self) -> sqlite3.Connection:
         """
-        加载处理记录
+        打开数据库并创建表结构
         
         Returns:
-            处理记录字典，键为输入文件路径，值为输出文件路径
+            数据库连接
         """
-        return load_json(self.record_file, {})
+        ensure_dir(os.path.dirname(os.path.abspath(self.db_file)))
+        conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        # WAL模式下NORMAL只在检查点时同步，断电最多丢失最近一次提交
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS processed_files ('
+            'image_file TEXT PRIMARY KEY, output_file TEXT NOT NULL, processed_at REAL NOT NULL)'
+        )
+        conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        conn.commit()
+        return conn
+    
+    def _import_json_record(self) -> None:
+        """首次打开数据库时导入旧版JSON记录文件"""
+        with self._lock:
+            imported = self._conn.execute(
+                "SELECT value FROM meta WHERE key = 'json_imported'"
+            ).fetchone()
+            if imported:
+                return
+            
+            records = load_json(self.record_file, {}) if os.path.exists(self.record_file) else {}
+            now = time.time()
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO processed_files VALUES (?, ?, ?)',
+                [(image_file, output_file, now) for image_file, output_file in records.items()]
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('json_imported', ?)",
+                (datetime.now().isoformat(),)
+            )
+            self._conn.commit()
+        
+        if records:
+            logger.info(f"已从 {self.record_file} 导入 {len(records)} 条处理记录到 {self.db_file}")
     
     def save_record(self) -> None:
-        """保存处理记录"""
-        save_json(self.processed_files, self.record_file)
+        """提交缓冲中的处理记录"""
+        with self._lock:
+            if not self._pending:
+                return
+            now = time.time()
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO processed_files VALUES (?, ?, ?)',
+                [(image_file, output_file, now) for image_file, output_file in self._pending.items()]
+            )
+            self._conn.commit()
+            self._pending.clear()
+            self._last_flush = now
+    
+    def close(self) -> None:
+        """提交缓冲中的记录并关闭数据库"""
+        with self._lock:
+            if self._conn is None:
+                return
+            self.save_record()
+            self._conn.close()
+            self._conn = None
     
     def is_processed(self, image_file: str) -> bool:
         """
@@ -64,7 +148,7 @@ class ProcessedRecordManager:
         Returns:
             是否已处理
         """
-        return image_file in self.processed_files
+        return self.get_output_file(image_file) is not None
     
     def mark_as_processed(self, image_file: str, output_file: str) -> None:
         """
@@ -74,8 +158,10 @@ class ProcessedRecordManager:
             image_file: 图片文件路径
             output_file: 输出文件路径
         """
-        self.processed_files[image_file] = output_file
-        self.save_record()
+        with self._lock:
+            self._pending[image_file] = output_file
+            if len(self._pending) >= self.FLUSH_BATCH_SIZE or time.time() - self._last_flush >= self.FLUSH_INTERVAL:
+                self.save_record()
     
     def get_output_file(self, image_file: str) -> Optional[str]:
         """
@@ -87,7 +173,13 @@ class ProcessedRecordManager:
         Returns:
             输出文件路径，如果不存在则返回None
         """
-        return self.processed_files.get(image_file)
+        with self._lock:
+            if image_file in self._pending:
+                return self._pending[image_file]
+            row = self._conn.execute(
+                'SELECT output_file FROM processed_files WHERE image_file = ?', (image_file,)
+            ).fetchone()
+        return row[0] if row else None
     
     def get_unprocessed_files(self, files: List[str]) -> List[str]:
         """
@@ -99,7 +191,18 @@ class ProcessedRecordManager:
         Returns:
             未处理的文件列表
         """
-        return [file for file in files if not self.is_processed(file)]
+        processed = set()
+        with self._lock:
+            processed.update(file for file in files if file in self._pending)
+            for i in range(0, len(files), self.QUERY_CHUNK_SIZE):
+                chunk = files[i:i + self.QUERY_CHUNK_SIZE]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f'SELECT image_file FROM processed_files WHERE image_file IN ({placeholders})', chunk
+                )
+                processed.update(row[0] for row in rows)
+        
+        return [file for file in files if file not in processed]
 
 class OCRProcessor:
     """
@@ -138,17 +241,64 @@ class OCRProcessor:
         self.max_file_size_mb = self.config.getfloat('File', 'max_file_size_mb', 4.0)
         self.excel_extension = self.config.get('File', 'excel_extension', '.xlsx')
         
+        # 结果中带有表格单元格结构且有调用方直接使用时，是否仍保存原始Excel文件
+        self.save_raw_workbook = self.config.getboolean('File', 'save_raw_workbook', True)
+        self.keep_tables = False
+        self._tables: Dict[str, Dict] = {}
+        self._unmarked: Dict[str, str] = {}
+        self._tables_lock = threading.Lock()
+        
+        # 输入目录索引，增量扫描代替每次完整列目录
+        self.input_index = DirectoryIndex.for_directory(
+            self.input_folder,
+            os.path.join(self.temp_folder, 'dir_index'),
+            self.allowed_extensions
+        )
+        
         # 处理性能配置
         self.max_workers = self.config.getint('Performance', 'max_workers', 4)
         self.batch_size = self.config.getint('Performance', 'batch_size', 5)
         self.skip_existing = self.config.getboolean('Performance', 'skip_existing', True)
         
+        # 批量识别引擎：thread（线程池分批）或 async（asyncio并发）
+        self.ocr_engine = self.config.get('Performance', 'ocr_engine', 'thread').strip().lower()
+        self.max_concurrency = self.config.getint('Performance', 'max_concurrency', 0) or self.max_workers
+        
+        # 线程池引擎的调度：在途任务上限（0表示取批处理大小与线程数的较大值）和调度顺序
+        self.max_in_flight = self.config.getint('Performance', 'max_in_flight', 0)
+        self.schedule_order = self.config.get('Performance', 'schedule_order', 'fifo').strip().lower()
+        self.scheduler: Optional[WorkQueueScheduler] = None
+        
         # 初始化处理记录管理器
         record_file = self.config.get('Paths', 'processed_record', 'data/processed_files.json')
         self.record_manager = ProcessedRecordManager(record_file)
         
+        # 初始化识别任务日志，重启后从最后持久化的状态继续
+        journal_file = self.config.get('Paths', 'ocr_job_journal', 'data/ocr_jobs.jsonl')
+        self.job_journal = OCRJobJournal(journal_file)
+        
+        # 初始化按内容哈希的OCR结果缓存
+        self.result_cache = None
+        if self.config.getboolean('Cache', 'ocr_cache_enabled', True):
+            self.result_cache = OCRResultCache(
+                self.config.get_path('Cache', 'ocr_cache_folder', 'data/ocr_cache', create=True),
+                self.config.getfloat('Cache', 'ocr_cache_max_size_mb', 500),
+                self.config.getfloat('Cache', 'ocr_cache_max_age_days', 90)
+            )
+            self.result_cache.evict()
+        
+        # 上传前的图片预处理（缩放、重编码）
+        self.preprocessor = ImagePreprocessor(self.config)
+        
         logger.info(f"OCR处理器初始化完成，输入目录: {self.input_folder}, 输出目录: {self.output_folder}")
     
+    def close(self) -> None:
+        """释放OCR客户端持有的连接池等资源，并提交缓冲中的处理记录"""
+        if self.scheduler is not None:
+            self.scheduler.close()
+        self.ocr_client.close()
+        self.record_manager.close()
+    
     def get_unprocessed_images(self) -> List[str]:
         """
         获取未处理的图片列表
@@ -156,8 +306,8 @@ class OCRProcessor:
         Returns:
             未处理的图片文件路径列表
         """
-        # 获取所有图片文件
-        image_files = get_files_by_extensions(self.input_folder, self.allowed_extensions)
+        # 从目录索引获取所有图片文件
+        image_files = [entry.path for entry in self.input_index.entries('image', self.allowed_extensions)]
         
         # 如果需要跳过已存在的文件
         if self.skip_existing:
@@ -190,115 +340,413 @@ class OCRProcessor:
             logger.warning(f"不支持的文件类型: {ext}, 文件: {image_path}")
             return False
         
-        # 检查文件大小
-        if not is_file_size_valid(image_path, self.max_file_size_mb):
+        # 检查文件大小，启用预处理时由预处理后的上传大小决定
+        if not self.preprocessor.enabled and not is_file_size_valid(image_path, self.max_file_size_mb):
             logger.warning(f"文件大小超过限制 ({self.max_file_size_mb}MB): {image_path}")
             return False
         
         return True
     
-    def process_image(self, image_path: str) -> Optional[str]:
+    def get_output_path(self, image_path: str) -> str:
         """
-        处理单个图片
+        生成图片对应的输出Excel文件路径
         
         Args:
             image_path: 图片文件路径
             
         Returns:
-            输出Excel文件路径，如果处理失败则返回None
+            输出Excel文件路径
+        """
+        file_name = os.path.splitext(os.path.basename(image_path))[0]
+        return os.path.join(self.output_folder, f"{file_name}{self.excel_extension}")
+    
+    def check_skip(self, image_path: str) -> Tuple[bool, Optional[str]]:
+        """
+        验证图片并检查是否可以跳过识别
+        
+        Args:
+            image_path: 图片文件路径
+            
+        Returns:
+            (是否结束处理, 输出文件路径)元组，图片无效时输出文件路径为None
         """
         # 验证图片
         if not self.validate_image(image_path):
-            return None
+            return True, None
         
         # 如果需要跳过已处理的文件
         if self.skip_existing and self.record_manager.is_processed(image_path):
             output_file = self.record_manager.get_output_file(image_path)
             logger.info(f"图片已处理，跳过: {image_path}, 输出文件: {output_file}")
-            return output_file
+            return True, output_file
         
-        logger.info(f"开始处理图片: {image_path}")
+        # 检查是否已存在对应的Excel文件
+        output_file = self.get_output_path(image_path)
+        if os.path.exists(output_file) and self.skip_existing:
+            logger.info(f"已存在对应的Excel文件，跳过处理: {os.path.basename(image_path)} -> {os.path.basename(output_file)}")
+            # 记录处理结果
+            self.record_manager.mark_as_processed(image_path, output_file)
+            return True, output_file
+        
+        return False, None
+    
+    def extract_excel_base64(self, ocr_result: Dict) -> Optional[str]:
+        """
+        从识别结果中提取Base64编码的Excel数据
+        
+        Args:
+            ocr_result: OCR识别结果
+            
+        Returns:
+            Base64编码的Excel数据，如果识别结果中不包含则返回None
+        """
+        excel_base64 = None
+        
+        # 从不同可能的字段中尝试获取Excel数据
+        if 'excel_file' in ocr_result:
+            excel_base64 = ocr_result['excel_file']
+            logger.debug("从excel_file字段获取Excel数据")
+        elif 'result' in ocr_result:
+            if 'result_data' in ocr_result['result']:
+                excel_base64 = ocr_result['result']['result_data']
+                logger.debug("从result.result_data字段获取Excel数据")
+            elif 'excel_file' in ocr_result['result']:
+                excel_base64 = ocr_result['result']['excel_file']
+                logger.debug("从result.excel_file字段获取Excel数据")
+            elif 'tables_result' in ocr_result['result'] and ocr_result['result']['tables_result']:
+                for table in ocr_result['result']['tables_result']:
+                    if 'excel_file' in table:
+                        excel_base64 = table['excel_file']
+                        logger.debug("从tables_result中获取Excel数据")
+                        break
+        
+        return excel_base64
+    
+    def save_excel(self, image_path: str, excel_data: bytes, ocr_result: Optional[Dict] = None) -> Optional[str]:
+        """
+        保存Excel数据并标记图片为已处理
+        
+        开启 keep_tables 且识别结果带有表格单元格结构时，结果留给 pop_tables 取用；
+        此时如果配置不保存原始Excel，则跳过写文件，并推迟到 complete_tables 时才标记为已处理。
+        
+        Args:
+            image_path: 图片文件路径
+            excel_data: Excel二进制数据
+            ocr_result: OCR原始结果，可选
+            
+        Returns:
+            输出Excel文件路径，如果保存失败则返回None
+        """
+        output_file = self.get_output_path(image_path)
+        
+        keep = self.keep_tables and has_tables(ocr_result)
+        if keep:
+            with self._tables_lock:
+                self._tables[image_path] = ocr_result
+        
+        if keep and not self.save_raw_workbook:
+            # 没有写出文件，生成采购单后由 complete_tables 标记为已处理；
+            # 在此之前任务日志保留已下载的结果，中断后可恢复
+            with self._tables_lock:
+                self._unmarked[image_path] = output_file
+            logger.info(f"图片处理成功: {image_path}, 使用表格结构，不保存原始Excel")
+            return output_file
         
         try:
-            # 生成输出文件路径
-            file_name = os.path.splitext(os.path.basename(image_path))[0]
-            output_file = os.path.join(self.output_folder, f"{file_name}{self.excel_extension}")
+            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+            with open(output_file, 'wb') as f:
+                f.write(excel_data)
+        except Exception as e:
+            logger.error(f"保存Excel数据时出错: {e}")
+            with self._tables_lock:
+                self._tables.pop(image_path, None)
+            return None
+        
+        logger.info(f"图片处理成功: {image_path}, 输出文件: {output_file}")
+        
+        self._mark_processed(image_path, output_file)
+        
+        return output_file
+    
+    def _mark_processed(self, image_path: str, output_file: str) -> None:
+        """
+        标记图片为已处理，结束任务日志中的任务，并删除预处理生成的上传图片
+        
+        Args:
+            image_path: 图片文件路径
+            output_file: 输出Excel文件路径
+        """
+        self.record_manager.mark_as_processed(image_path, output_file)
+        self.job_journal.mark_written(image_path, output_file)
+        self.preprocessor.release(image_path)
+    
+    def pop_tables(self, image_path: str) -> Optional[Dict]:
+        """
+        取出图片保留的识别结果（含表格单元格结构），取出后不再保留
+        
+        Args:
+            image_path: 图片文件路径
+            
+        Returns:
+            OCR原始结果，没有保留时返回None
+        """
+        with self._tables_lock:
+            return self._tables.pop(image_path, None)
+    
+    def complete_tables(self, image_path: str, success: bool) -> None:
+        """
+        使用保留的识别结果生成采购单后调用：成功时把未写出原始Excel的图片标记为已处理，
+        失败时不标记，下次运行从任务日志恢复结果后重新生成
+        
+        Args:
+            image_path: 图片文件路径
+            success: 采购单是否生成成功
+        """
+        with self._tables_lock:
+            output_file = self._unmarked.pop(image_path, None)
+        if output_file is None:
+            return
+        if success:
+            self._mark_processed(image_path, output_file)
+        else:
+            logger.warning(f"采购单未生成，图片保持未处理状态: {image_path}")
+    
+    def lookup_cached_excel(self, image_data: bytes) -> Tuple[Optional[str], Optional[bytes]]:
+        """
+        按图片内容查找缓存的Excel数据
+        
+        Args:
+            image_data: 图片二进制数据
             
-            # 检查是否已存在对应的Excel文件
-            if os.path.exists(output_file) and self.skip_existing:
-                logger.info(f"已存在对应的Excel文件，跳过处理: {os.path.basename(image_path)} -> {os.path.basename(output_file)}")
-                # 记录处理结果
-                self.record_manager.mark_as_processed(image_path, output_file)
-                return output_file
+        Returns:
+            (内容哈希, 缓存的Excel数据)元组，未启用缓存时哈希为None，未命中时Excel数据为None
+        """
+        if self.result_cache is None:
+            return None, None
+        
+        digest = self.result_cache.hash_bytes(image_data)
+        cached = self.result_cache.get(digest)
+        if cached is None:
+            return digest, None
+        
+        logger.info(f"命中OCR结果缓存: {digest[:12]}")
+        return digest, cached[1]
+    
+    def load_upload_data(self, image_path: str, image_data: bytes) -> Optional[bytes]:
+        """
+        获取实际上传的图片数据（预处理后的图片，未启用预处理时为原图）
+        
+        Args:
+            image_path: 原始图片路径
+            image_data: 原始图片二进制数据
             
-            # 进行OCR识别
-            ocr_result = self.ocr_client.recognize_table(image_path)
-            if not ocr_result:
-                logger.error(f"OCR识别失败: {image_path}")
+        Returns:
+            上传数据，超过大小限制或读取失败时返回None
+        """
+        upload_path = self.preprocessor.get_upload_path(image_path)
+        if upload_path != image_path:
+            upload_data = self.ocr_client.read_image(upload_path)
+            if upload_data is None:
                 return None
-                
-            # 保存Excel文件 - 按照v1版本逻辑提取Excel数据
-            excel_base64 = None
+        else:
+            upload_data = image_data
+        
+        if len(upload_data) > self.max_file_size_mb * 1024 * 1024:
+            logger.warning(f"文件大小超过限制 ({self.max_file_size_mb}MB): {image_path}")
+            return None
+        
+        return upload_data
+    
+    def decode_excel(self, ocr_result: Dict) -> Tuple[bool, Optional[bytes]]:
+        """
+        从识别结果中解码直接返回的Excel数据
+        
+        Args:
+            ocr_result: OCR识别结果
             
-            # 从不同可能的字段中尝试获取Excel数据
-            if 'excel_file' in ocr_result:
-                excel_base64 = ocr_result['excel_file']
-                logger.debug("从excel_file字段获取Excel数据")
-            elif 'result' in ocr_result:
-                if 'result_data' in ocr_result['result']:
-                    excel_base64 = ocr_result['result']['result_data']
-                    logger.debug("从result.result_data字段获取Excel数据")
-                elif 'excel_file' in ocr_result['result']:
-                    excel_base64 = ocr_result['result']['excel_file']
-                    logger.debug("从result.excel_file字段获取Excel数据")
-                elif 'tables_result' in ocr_result['result'] and ocr_result['result']['tables_result']:
-                    for table in ocr_result['result']['tables_result']:
-                        if 'excel_file' in table:
-                            excel_base64 = table['excel_file']
-                            logger.debug("从tables_result中获取Excel数据")
-                            break
-                    
-            # 如果还是没有找到Excel数据，尝试通过get_excel_result获取
-            if not excel_base64:
-                logger.info("无法从直接返回中获取Excel数据，尝试通过API获取...")
-                excel_data = self.ocr_client.get_excel_result(ocr_result)
-                if not excel_data:
-                    logger.error(f"获取Excel结果失败: {image_path}")
-                    return None
-                    
-                # 保存Excel文件
-                os.makedirs(os.path.dirname(output_file), exist_ok=True)
-                with open(output_file, 'wb') as f:
-                    f.write(excel_data)
-            else:
-                # 解码并保存Excel文件
-                try:
-                    excel_data = base64.b64decode(excel_base64)
-                    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-                    with open(output_file, 'wb') as f:
-                        f.write(excel_data)
-                except Exception as e:
-                    logger.error(f"解码或保存Excel数据时出错: {e}")
-                    return None
+        Returns:
+            (是否包含Excel数据, Excel数据)元组，包含但解码失败时Excel数据为None
+        """
+        excel_base64 = self.extract_excel_base64(ocr_result)
+        if not excel_base64:
+            return False, None
+        
+        try:
+            return True, base64.b64decode(excel_base64)
+        except Exception as e:
+            logger.error(f"解码Excel数据时出错: {e}")
+            return True, None
+    
+    def resume_job(self, image_path: str) -> Optional[bytes]:
+        """
+        从任务日志恢复上次中断的识别，避免重复上传
+        
+        Args:
+            image_path: 图片文件路径
             
-            logger.info(f"图片处理成功: {image_path}, 输出文件: {output_file}")
+        Returns:
+            恢复得到的Excel数据，没有可恢复的任务时返回None
+        """
+        entry = self.job_journal.get(image_path)
+        if entry is None:
+            return None
+        
+        excel_data = None
+        if entry['state'] == OCRJobJournal.DOWNLOADED:
+            excel_data = self.job_journal.load_downloaded(entry)
+            if excel_data:
+                logger.info(f"从任务日志恢复已下载的Excel结果: {image_path}")
+        elif entry['state'] == OCRJobJournal.SUBMITTED:
+            logger.info(f"恢复已提交的识别任务: {image_path}, request_id={entry['request_id']}")
+            excel_data = self.ocr_client.wait_excel_result(entry['request_id'])
+            if excel_data:
+                self.job_journal.mark_downloaded(image_path, excel_data)
+        
+        if not excel_data:
+            if entry['state'] != OCRJobJournal.QUEUED:
+                logger.warning(f"无法恢复上次的识别任务，重新提交: {image_path}")
+            self.job_journal.discard(image_path)
+            return None
+        
+        return excel_data
+    
+    def recognize_image(self, image_data: bytes, image_path: Optional[str] = None) -> Tuple[Optional[Dict], Optional[bytes]]:
+        """
+        调用OCR接口识别图片并获取Excel数据
+        
+        Args:
+            image_data: 图片二进制数据
+            image_path: 原始图片路径，提供时在任务日志中记录识别进度
             
-            # 标记为已处理
-            self.record_manager.mark_as_processed(image_path, output_file)
+        Returns:
+            (OCR原始结果, Excel数据)元组，失败时对应值为None
+        """
+        if image_path:
+            self.job_journal.mark_queued(image_path)
+        
+        # 进行OCR识别
+        ocr_result = self.ocr_client.recognize_table(image_data)
+        if not ocr_result:
+            return None, None
+        
+        # 按照v1版本逻辑提取Excel数据
+        found, excel_data = self.decode_excel(ocr_result)
+        
+        # 如果没有找到Excel数据，尝试通过get_excel_result获取
+        if not found:
+            _, request_id = self.ocr_client.resolve_excel_request(ocr_result)
+            if image_path and request_id:
+                self.job_journal.mark_submitted(image_path, request_id)
+            logger.info("无法从直接返回中获取Excel数据，尝试通过API获取...")
+            excel_data = self.ocr_client.get_excel_result(ocr_result)
+        
+        if image_path and excel_data:
+            self.job_journal.mark_downloaded(image_path, excel_data)
+        
+        return ocr_result, excel_data
+    
+    def fetch_excel(self, image_path: str, image_data: bytes) -> Tuple[Optional[Dict], Optional[bytes]]:
+        """
+        获取图片的Excel数据：优先恢复上次中断的任务，否则上传识别
+        
+        Args:
+            image_path: 原始图片路径
+            image_data: 原始图片二进制数据
+            
+        Returns:
+            (OCR原始结果, Excel数据)元组，失败时对应值为None
+        """
+        excel_data = self.resume_job(image_path)
+        if excel_data is not None:
+            return None, excel_data
+        
+        upload_data = self.load_upload_data(image_path, image_data)
+        if upload_data is None:
+            return None, None
+        
+        return self.recognize_image(upload_data, image_path)
+    
+    def process_image(self, image_path: str) -> Optional[str]:
+        """
+        处理单个图片
+        
+        Args:
+            image_path: 图片文件路径
             
+        Returns:
+            输出Excel文件路径，如果处理失败则返回None
+        """
+        done, output_file = self.check_skip(image_path)
+        if done:
             return output_file
+        
+        logger.info(f"开始处理图片: {image_path}")
+        
+        try:
+            image_data = self.ocr_client.read_image(image_path)
+            if image_data is None:
+                return None
+            
+            digest, excel_data = self.lookup_cached_excel(image_data)
+            ocr_result = None
+            
+            if excel_data is None and digest is not None:
+                owner, future = self.result_cache.claim(digest)
+                if not owner:
+                    # 同批次内相同内容的图片正在识别，等待其结果
+                    logger.info(f"等待相同内容图片的识别结果: {image_path}")
+                    excel_data = future.result()
+                else:
+                    try:
+                        ocr_result, excel_data = self.fetch_excel(image_path, image_data)
+                        if excel_data:
+                            self.result_cache.put(digest, ocr_result, excel_data)
+                    finally:
+                        self.result_cache.resolve(digest, excel_data)
+            elif excel_data is None:
+                ocr_result, excel_data = self.fetch_excel(image_path, image_data)
+            
+            if not excel_data:
+                logger.error(f"OCR识别或获取Excel结果失败: {image_path}")
+                return None
+            
+            return self.save_excel(image_path, excel_data, ocr_result)
             
         except Exception as e:
             logger.error(f"处理图片时出错: {image_path}, 错误: {e}")
             return None
     
-    def process_images_batch(self, batch_size: int = None, max_workers: int = None) -> Tuple[int, int]:
+    def process_images_batch(self, batch_size: int = None, max_workers: int = None,
+                             on_result: Optional[Callable[[str, Optional[str]], None]] = None) -> Tuple[int, int]:
+        """
+        批量处理输入目录中所有未处理的图片
+        
+        Args:
+            batch_size: 未配置在途上限时作为在途任务数，如果为None则使用配置值
+            max_workers: 最大线程数，如果为None则使用配置值
+            on_result: 每张图片完成时的回调，参数为(图片路径, 输出文件路径)
+            
+        Returns:
+            (总处理数, 成功处理数)元组
+        """
+        # 获取未处理的图片
+        unprocessed_images = self.get_unprocessed_images()
+        if not unprocessed_images:
+            logger.warning("没有需要处理的图片")
+            return 0, 0
+        
+        return self.process_image_list(unprocessed_images, batch_size, max_workers, on_result)
+    
+    def process_image_list(self, image_paths: List[str], batch_size: int = None, max_workers: int = None,
+                           on_result: Optional[Callable[[str, Optional[str]], None]] = None) -> Tuple[int, int]:
         """
-        批量处理图片
+        处理指定的图片列表，由常驻线程池连续调度，不再按批次等待
         
         Args:
-            batch_size: 批处理大小，如果为None则使用配置值
+            image_paths: 图片文件路径列表
+            batch_size: 未配置在途上限时作为在途任务数，如果为None则使用配置值
             max_workers: 最大线程数，如果为None则使用配置值
+            on_result: 每张图片完成时的回调，参数为(图片路径, 输出文件路径)
             
         Returns:
             (总处理数, 成功处理数)元组
@@ -306,29 +754,78 @@ class OCRProcessor:
         # 使用配置值或参数值
         batch_size = batch_size or self.batch_size
         max_workers = max_workers or self.max_workers
+        max_in_flight = self.max_in_flight or max(batch_size, max_workers)
+        
+        # 在进程池中并行预处理所有待上传图片
+        self.preprocessor.prepare(image_paths)
+        
+        # 线程数或在途上限变化时重建调度器，否则复用常驻线程池
+        scheduler = self.scheduler
+        if scheduler is None or scheduler.max_workers != max_workers or scheduler.max_in_flight != max_in_flight:
+            if scheduler is not None:
+                scheduler.close()
+            scheduler = self.scheduler = WorkQueueScheduler(
+                self.process_image,
+                max_workers,
+                max_in_flight,
+                self.schedule_order
+            )
+        
+        total, success = scheduler.run(image_paths, on_result)
+        
+        logger.info(f"所有图片处理完成, 总计: {total}, 成功: {success}")
+        return total, success
+    
+    def process_images_async(self, max_concurrency: int = None,
+                             on_result: Optional[Callable[[str, Optional[str]], None]] = None) -> Tuple[int, int]:
+        """
+        使用asyncio并发批量处理图片，不分批，在途请求数由信号量限制
+        
+        Args:
+            max_concurrency: 最大在途请求数，如果为None则使用配置值
+            on_result: 每张图片完成时的回调，参数为(图片路径, 输出文件路径)
+            
+        Returns:
+            (总处理数, 成功处理数)元组
+        """
+        from .async_ocr import AsyncOCRBatchRunner
         
-        # 获取未处理的图片
         unprocessed_images = self.get_unprocessed_images()
         if not unprocessed_images:
             logger.warning("没有需要处理的图片")
             return 0, 0
         
-        total = len(unprocessed_images)
-        success = 0
+        self.preprocessor.prepare(unprocessed_images)
         
-        # 按批次处理
-        for i in range(0, total, batch_size):
-            batch = unprocessed_images[i:i + batch_size]
-            logger.info(f"处理批次 {i//batch_size + 1}/{(total-1)//batch_size + 1}, 大小: {len(batch)}")
-            
-            # 使用线程池并行处理
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                results = list(executor.map(self.process_image, batch))
-            
-            # 统计成功数
-            success += sum(1 for result in results if result is not None)
+        runner = AsyncOCRBatchRunner(self, max_concurrency)
+        total, success = runner.process_images(unprocessed_images, on_result)
+        
+        logger.info(f"所有图片处理完成, 总计: {total}, 成功: {success}")
+        return total, success
+    
+    def process_images_two_phase(self, max_workers: int = None,
+                                 on_result: Optional[Callable[[str, Optional[str]], None]] = None) -> Tuple[int, int]:
+        """
+        两阶段批量处理图片：先按限速提交全部图片，再集中轮询结果
+        
+        Args:
+            max_workers: 提交阶段的线程数，如果为None则使用配置值
+            on_result: 每张图片完成时的回调，参数为(图片路径, 输出文件路径)
             
-            logger.info(f"批次处理完成, 成功: {sum(1 for result in results if result is not None)}/{len(batch)}")
+        Returns:
+            (总处理数, 成功处理数)元组
+        """
+        from .two_phase import TwoPhaseOCRPipeline
+        
+        unprocessed_images = self.get_unprocessed_images()
+        if not unprocessed_images:
+            logger.warning("没有需要处理的图片")
+            return 0, 0
+        
+        self.preprocessor.prepare(unprocessed_images)
+        
+        pipeline = TwoPhaseOCRPipeline(self, max_workers, on_result)
+        total, success = pipeline.run(unprocessed_images)
         
         logger.info(f"所有图片处理完成, 总计: {total}, 成功: {success}")
-        return total, success 
\ No newline at end of file
+        return total, success
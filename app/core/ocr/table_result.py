@@ -0,0 +1,20 @@
+"""
+表格识别结果模块
+-------------
+读取表格识别接口返回结果中的表格单元格结构。
+"""
+
+from typing import Dict, List, Optional
+
+def find_tables(ocr_result: Optional[Dict]) -> List[Dict]:
+    """获取识别结果中的表格列表，兼容顶层和result下两种返回结构"""
+    if not isinstance(ocr_result, dict):
+        return []
+    tables = ocr_result.get('tables_result')
+    if tables is None and isinstance(ocr_result.get('result'), dict):
+        tables = ocr_result['result'].get('tables_result')
+    return tables if isinstance(tables, list) else []
+
+def has_tables(ocr_result: Optional[Dict]) -> bool:
+    """识别结果中是否带有可用的表格单元格结构"""
+    return any(table.get('body') for table in find_tables(ocr_result) if isinstance(table, dict))
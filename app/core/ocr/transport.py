@@ -0,0 +1,128 @@
+"""
+HTTP传输层模块
+------------
+为百度OCR客户端提供基于连接池的HTTP会话，复用TCP/TLS连接。
+"""
+
+import threading
+from typing import Dict, Optional, Any
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ...config.settings import ConfigManager
+from ..utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+class HTTPTransport:
+    """
+    连接池HTTP传输层，线程安全，由OCR客户端持有并负责关闭
+    """
+
+    def __init__(self,
+                 pool_connections: int = 2,
+                 pool_maxsize: int = 4,
+                 pool_block: bool = False,
+                 keep_alive: bool = True):
+        """
+        初始化HTTP传输层
+
+        Args:
+            pool_connections: 缓存的主机连接池数量
+            pool_maxsize: 每个主机连接池的最大连接数
+            pool_block: 连接池耗尽时是否阻塞等待空闲连接
+            keep_alive: 是否保持长连接
+        """
+        self.pool_connections = max(1, pool_connections)
+        self.pool_maxsize = max(1, pool_maxsize)
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+
+        self._lock = threading.Lock()
+        self._session: Optional[requests.Session] = None
+        self._closed = False
+
+    @classmethod
+    def from_config(cls, config: ConfigManager) -> 'HTTPTransport':
+        """
+        根据配置创建传输层，每主机连接数默认与最大线程数一致
+
+        Args:
+            config: 配置管理器
+
+        Returns:
+            HTTP传输层实例
+        """
+        max_workers = config.getint('Performance', 'max_workers', 4)
+        pool_maxsize = config.getint('Performance', 'pool_maxsize', 0) or max_workers
+
+        return cls(
+            pool_connections=config.getint('Performance', 'pool_connections', 2),
+            pool_maxsize=pool_maxsize,
+            pool_block=config.getboolean('Performance', 'pool_block', False),
+            keep_alive=config.getboolean('Performance', 'keep_alive', True)
+        )
+
+    def _create_session(self) -> requests.Session:
+        """
+        创建挂载连接池适配器的会话
+
+        Returns:
+            请求会话
+        """
+        session = requests.Session()
+
+        # 重试由客户端自行控制，适配器层不做重试
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+            max_retries=0
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+
+        session.headers['Connection'] = 'keep-alive' if self.keep_alive else 'close'
+
+        logger.info(f"创建HTTP连接池: 每主机最大连接数={self.pool_maxsize}, 主机池数量={self.pool_connections}, 长连接={self.keep_alive}")
+        return session
+
+    @property
+    def session(self) -> requests.Session:
+        """获取共享会话，首次访问时创建"""
+        if self._session is None:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("HTTP传输层已关闭")
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        """
+        发送POST请求
+
+        Args:
+            url: 请求地址
+            **kwargs: 透传给requests的参数
+
+        Returns:
+            响应对象
+        """
+        return self.session.post(url, **kwargs)
+
+    def close(self) -> None:
+        """关闭会话并释放连接池中的所有连接"""
+        with self._lock:
+            self._closed = True
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+                logger.info("HTTP连接池已关闭")
+
+    def __enter__(self) -> 'HTTPTransport':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
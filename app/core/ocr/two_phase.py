@@ -0,0 +1,251 @@
+"""
+两阶段OCR流水线模块
+----------------
+第一阶段按限速尽快提交所有图片并收集request_id，
+第二阶段由单个轮询线程按自适应退避查询结果，完成的Excel立即交给保存阶段。
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+class PollJob:
+    """
+    一个待轮询的识别任务，同一内容的多张图片共享一个任务
+    """
+
+    def __init__(self, request_id: str, image_paths: List[str], digest: Optional[str],
+                 interval: float, deadline: float):
+        self.request_id = request_id
+        self.image_paths = image_paths
+        self.digest = digest
+        self.interval = interval
+        self.next_poll = time.time() + interval
+        self.deadline = deadline
+
+class TwoPhaseOCRPipeline:
+    """
+    两阶段OCR流水线：提交与轮询分离，慢任务不再占用提交线程
+    """
+
+    def __init__(self, processor, max_workers: Optional[int] = None,
+                 on_result: Optional[Callable[[str, Optional[str]], None]] = None):
+        """
+        初始化两阶段流水线
+
+        Args:
+            processor: OCR处理器，负责图片校验、缓存、预处理和结果保存
+            max_workers: 提交阶段的线程数，如果为None则使用配置值
+            on_result: 每张图片完成时的回调，参数为(图片路径, 输出文件路径)
+        """
+        self.processor = processor
+        self.client = processor.ocr_client
+        self.max_workers = max_workers or processor.max_workers
+        self.on_result = on_result
+
+        self.poll_initial_interval = self.client.poll_initial_interval
+        self.poll_max_interval = self.client.poll_max_interval
+        self.poll_backoff = self.client.poll_backoff
+        self.poll_timeout = self.client.poll_timeout
+
+        self._cond = threading.Condition()
+        self._jobs: List[PollJob] = []
+        self._jobs_by_digest: Dict[str, PollJob] = {}
+        self._submitting = False
+        self._results: Dict[str, Optional[str]] = {}
+        self._save_futures: List[Future] = []
+        self._save_executor: Optional[ThreadPoolExecutor] = None
+
+    def _finish(self, image_path: str, output_file: Optional[str]) -> None:
+        """记录单张图片的最终结果"""
+        with self._cond:
+            self._results[image_path] = output_file
+            completed = len(self._results)
+        logger.info(f"两阶段识别进度 {completed}/{self._total} ({completed * 100 // self._total}%): {image_path}")
+        if self.on_result:
+            self.on_result(image_path, output_file)
+
+    def _hand_off(self, image_paths: List[str], excel_data: Optional[bytes]) -> None:
+        """将Excel数据交给保存阶段"""
+        def save() -> None:
+            for image_path in image_paths:
+                output_file = self.processor.save_excel(image_path, excel_data) if excel_data else None
+                if output_file is None:
+                    logger.error(f"OCR识别或获取Excel结果失败: {image_path}")
+                self._finish(image_path, output_file)
+
+        self._save_futures.append(self._save_executor.submit(save))
+
+    def _submit_one(self, image_path: str) -> None:
+        """
+        第一阶段：校验、查缓存并提交单张图片
+        """
+        try:
+            done, output_file = self.processor.check_skip(image_path)
+            if done:
+                self._finish(image_path, output_file)
+                return
+
+            image_data = self.client.read_image(image_path)
+            if image_data is None:
+                self._finish(image_path, None)
+                return
+
+            digest, excel_data = self.processor.lookup_cached_excel(image_data)
+            if excel_data is not None:
+                self._hand_off([image_path], excel_data)
+                return
+
+            # 上次运行中断的任务：已下载的直接保存，已提交的只需继续轮询
+            journal = self.processor.job_journal
+            entry = journal.get(image_path)
+            if entry is not None and entry['state'] == journal.DOWNLOADED:
+                excel_data = journal.load_downloaded(entry)
+                if excel_data:
+                    logger.info(f"从任务日志恢复已下载的Excel结果: {image_path}")
+                    self._hand_off([image_path], excel_data)
+                    return
+            resumed_id = entry['request_id'] if entry is not None and entry['state'] == journal.SUBMITTED else None
+
+            # 同批次内相同内容的图片并入已提交的任务
+            if digest is not None:
+                with self._cond:
+                    job = self._jobs_by_digest.get(digest)
+                    if job is not None:
+                        job.image_paths.append(image_path)
+                        logger.info(f"等待相同内容图片的识别结果: {image_path}")
+                        return
+                    # 占位，避免并发提交相同内容
+                    self._jobs_by_digest[digest] = PollJob('', [image_path], digest, 0, 0)
+
+            request_id = None
+            try:
+                if resumed_id:
+                    request_id = resumed_id
+                    logger.info(f"恢复已提交的识别任务: {image_path}, request_id={request_id}")
+                else:
+                    upload_data = self.processor.load_upload_data(image_path, image_data)
+                    if upload_data is not None:
+                        journal.mark_queued(image_path)
+                        request_id = self.client.submit_table(upload_data)
+                        if request_id:
+                            journal.mark_submitted(image_path, request_id)
+            except Exception as e:
+                # 按提交失败处理：下面移除占位，并入占位的相同内容图片一起结束
+                logger.error(f"提交图片时出错: {image_path}, 错误: {e}")
+                request_id = None
+
+            with self._cond:
+                placeholder = self._jobs_by_digest.pop(digest, None) if digest is not None else None
+                image_paths = placeholder.image_paths if placeholder else [image_path]
+                if request_id is None:
+                    failed = image_paths
+                else:
+                    failed = None
+                    job = PollJob(
+                        request_id,
+                        image_paths,
+                        digest,
+                        self.poll_initial_interval,
+                        time.time() + self.poll_timeout
+                    )
+                    self._jobs.append(job)
+                    if digest is not None:
+                        self._jobs_by_digest[digest] = job
+                    self._cond.notify_all()
+
+            if failed:
+                logger.error(f"提交识别任务失败: {image_path}")
+                self._hand_off(failed, None)
+            elif not resumed_id:
+                logger.info(f"已提交识别任务: {image_path}, request_id={request_id}")
+
+        except Exception as e:
+            logger.error(f"提交图片时出错: {image_path}, 错误: {e}")
+            self._finish(image_path, None)
+
+    def _complete_job(self, job: PollJob, excel_data: Optional[bytes]) -> None:
+        """任务结束：写入缓存并交给保存阶段"""
+        # 先写缓存再释放登记，之后到达的相同内容图片直接命中缓存
+        if excel_data and job.digest is not None and self.processor.result_cache is not None:
+            self.processor.result_cache.put(job.digest, {'request_id': job.request_id}, excel_data)
+
+        with self._cond:
+            self._jobs.remove(job)
+            if job.digest is not None:
+                self._jobs_by_digest.pop(job.digest, None)
+            image_paths = list(job.image_paths)
+
+        # 已提交的任务失败时丢弃日志记录，下次运行重新提交
+        if not excel_data:
+            for image_path in image_paths:
+                self.processor.job_journal.discard(image_path)
+
+        self._hand_off(image_paths, excel_data)
+
+    def _poll_loop(self) -> None:
+        """
+        第二阶段：单线程轮询所有未完成任务，每个任务独立退避
+        """
+        while True:
+            with self._cond:
+                if not self._jobs and not self._submitting:
+                    return
+                now = time.time()
+                due = [job for job in self._jobs if job.next_poll <= now]
+                if not due:
+                    next_poll = min((job.next_poll for job in self._jobs), default=now + self.poll_max_interval)
+                    self._cond.wait(timeout=max(0.05, next_poll - now))
+                    continue
+
+            for job in due:
+                state, excel_data = self.client.poll_excel_result(job.request_id)
+                if state == 'done':
+                    logger.info(f"识别任务完成: request_id={job.request_id}")
+                    self._complete_job(job, excel_data)
+                elif state == 'failed':
+                    self._complete_job(job, None)
+                elif time.time() >= job.deadline:
+                    logger.error(f"识别任务超时: request_id={job.request_id}")
+                    self._complete_job(job, None)
+                else:
+                    job.interval = min(self.poll_max_interval, job.interval * self.poll_backoff)
+                    job.next_poll = time.time() + job.interval
+
+    def run(self, image_paths: List[str]) -> Tuple[int, int]:
+        """
+        运行两阶段识别
+
+        Args:
+            image_paths: 图片文件路径列表
+
+        Returns:
+            (总处理数, 成功处理数)元组
+        """
+        self._total = len(image_paths)
+        self._submitting = True
+        self._save_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='ocr-save')
+
+        poller = threading.Thread(target=self._poll_loop, name='ocr-poller', daemon=True)
+        poller.start()
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='ocr-submit') as executor:
+                list(executor.map(self._submit_one, image_paths))
+        finally:
+            with self._cond:
+                self._submitting = False
+                self._cond.notify_all()
+
+        poller.join()
+        for future in list(self._save_futures):
+            future.result()
+        self._save_executor.shutdown(wait=True)
+
+        success = sum(1 for output_file in self._results.values() if output_file is not None)
+        return self._total, success
@@ -0,0 +1,251 @@
+"""
+目录索引模块
+----------
+用 os.scandir 维护目录中文件的路径、大小、修改时间、类型和内容哈希，
+每次刷新只处理新增、变化和删除的文件，查询最新文件或按类型列出文件时不再逐个访问文件系统。
+"""
+
+import os
+import json
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+from .log_utils import get_logger
+from .file_utils import ensure_dir, get_file_hash
+
+logger = get_logger(__name__)
+
+# 默认识别为图片的扩展名
+DEFAULT_IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.bmp']
+
+EXCEL_EXTENSIONS = ('.xls', '.xlsx')
+
+# 采购单文件名前缀
+PURCHASE_ORDER_PREFIX = '采购单_'
+# 合并采购单文件名前缀
+MERGED_ORDER_PREFIX = '合并采购单_'
+
+class FileEntry:
+    """目录索引中的一个文件"""
+
+    __slots__ = ('path', 'name', 'ext', 'size', 'mtime', 'kind', 'hash')
+
+    def __init__(self, path: str, size: int, mtime: float, kind: str, file_hash: Optional[str] = None):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.ext = os.path.splitext(self.name)[1].lower()
+        self.size = size
+        self.mtime = mtime
+        self.kind = kind
+        self.hash = file_hash
+
+class DirectoryIndex:
+    """
+    单个目录（不含子目录）的文件索引
+
+    文件类型：image 图片、purchase_order 采购单、excel 其他Excel文件、other 其他文件。
+    内容哈希在首次查询时计算，文件大小和修改时间不变时沿用，并可保存到索引文件供下次运行使用。
+    """
+
+    _registry: Dict[str, 'DirectoryIndex'] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, directory: str, index_file: Optional[str] = None,
+                 image_extensions: Optional[List[str]] = None,
+                 exclude_patterns: Optional[List[str]] = None):
+        """
+        初始化目录索引
+
+        Args:
+            directory: 目录路径
+            index_file: 保存内容哈希的索引文件，为None则不保存
+            image_extensions: 识别为图片的扩展名列表
+            exclude_patterns: 排除的文件名模式（例如临时文件）
+        """
+        self.directory = os.path.abspath(directory)
+        self.index_file = index_file
+        self.image_extensions = [ext.lower() for ext in (image_extensions or DEFAULT_IMAGE_EXTENSIONS)]
+        self.exclude_patterns = exclude_patterns or ['~$', '.tmp']
+
+        self._lock = threading.RLock()
+        self._entries: Dict[str, FileEntry] = {}
+        self._saved_hashes = self._load_hashes()
+        self._dirty = False
+
+    @classmethod
+    def for_directory(cls, directory: str, cache_dir: Optional[str] = None,
+                      image_extensions: Optional[List[str]] = None) -> 'DirectoryIndex':
+        """
+        获取目录的共享索引，同一进程内的各处理器共用一份
+
+        Args:
+            directory: 目录路径
+            cache_dir: 保存索引文件的目录，为None则不保存内容哈希
+            image_extensions: 识别为图片的扩展名列表
+
+        Returns:
+            目录索引
+        """
+        key = os.path.normcase(os.path.abspath(directory))
+        with cls._registry_lock:
+            index = cls._registry.get(key)
+            if index is None:
+                index_file = None
+                if cache_dir:
+                    ensure_dir(cache_dir)
+                    name = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+                    index_file = os.path.join(cache_dir, f"dir_index_{name}.json")
+                index = cls(directory, index_file, image_extensions)
+                cls._registry[key] = index
+            elif image_extensions:
+                # 后来的调用方可能关注更多图片类型
+                for ext in image_extensions:
+                    if ext.lower() not in index.image_extensions:
+                        index.image_extensions.append(ext.lower())
+                        index._entries.clear()
+            return index
+
+    def _load_hashes(self) -> Dict[str, list]:
+        """加载上次保存的 路径 -> [大小, 修改时间, 哈希]"""
+        if not self.index_file or not os.path.exists(self.index_file):
+            return {}
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            logger.warning(f"目录索引文件损坏，已忽略: {self.index_file}")
+            return {}
+
+    def _classify(self, name: str) -> str:
+        """根据文件名判断文件类型"""
+        ext = os.path.splitext(name)[1].lower()
+        if ext in self.image_extensions:
+            return 'image'
+        if ext in EXCEL_EXTENSIONS:
+            return 'purchase_order' if name.startswith(PURCHASE_ORDER_PREFIX) else 'excel'
+        return 'other'
+
+    def refresh(self) -> None:
+        """
+        重新扫描目录：新增和变化的文件更新条目，已删除的文件移出索引，未变化的文件保留已计算的哈希
+        """
+        with self._lock:
+            if not os.path.isdir(self.directory):
+                self._entries.clear()
+                return
+
+            seen = {}
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    name = entry.name
+                    if any(pattern in name for pattern in self.exclude_patterns):
+                        continue
+                    try:
+                        if not entry.is_file():
+                            continue
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+
+                    current = self._entries.get(entry.path)
+                    if current is not None and current.size == stat.st_size and current.mtime == stat.st_mtime:
+                        seen[entry.path] = current
+                        continue
+
+                    file_hash = None
+                    saved = self._saved_hashes.get(entry.path)
+                    if saved and saved[0] == stat.st_size and saved[1] == stat.st_mtime:
+                        file_hash = saved[2]
+                    seen[entry.path] = FileEntry(entry.path, stat.st_size, stat.st_mtime, self._classify(name), file_hash)
+
+            self._entries = seen
+            self.save()
+
+    def entries(self, kind: Optional[str] = None, extensions: Optional[List[str]] = None,
+                refresh: bool = True) -> List[FileEntry]:
+        """
+        按条件列出文件
+
+        Args:
+            kind: 文件类型，为None则不限制
+            extensions: 扩展名列表，为None则不限制
+            refresh: 查询前是否刷新索引
+
+        Returns:
+            文件条目列表，按文件名排序
+        """
+        if refresh:
+            self.refresh()
+
+        exts = {ext.lower() for ext in extensions} if extensions else None
+        with self._lock:
+            result = [
+                entry for entry in self._entries.values()
+                if (kind is None or entry.kind == kind) and (exts is None or entry.ext in exts)
+            ]
+        result.sort(key=lambda entry: entry.name)
+        return result
+
+    def latest(self, kind: Optional[str] = None, extensions: Optional[List[str]] = None) -> Optional[FileEntry]:
+        """
+        获取修改时间最新的文件
+
+        Args:
+            kind: 文件类型，为None则不限制
+            extensions: 扩展名列表，为None则不限制
+
+        Returns:
+            最新的文件条目，没有符合条件的文件时返回None
+        """
+        candidates = self.entries(kind, extensions)
+        if not candidates:
+            return None
+        return max(candidates, key=lambda entry: entry.mtime)
+
+    def get_hash(self, path: str) -> Optional[str]:
+        """
+        获取文件内容的SHA-256哈希，文件大小和修改时间未变化时直接返回已计算的值
+
+        Args:
+            path: 文件路径
+
+        Returns:
+            十六进制哈希，文件不在索引中或读取失败时返回None
+        """
+        with self._lock:
+            entry = self._entries.get(os.path.abspath(path))
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(entry.path)
+        except OSError:
+            return None
+        if entry.size != stat.st_size or entry.mtime != stat.st_mtime:
+            # 上次刷新后文件又有变化
+            entry.size, entry.mtime, entry.hash = stat.st_size, stat.st_mtime, None
+        if entry.hash is None:
+            entry.hash = get_file_hash(entry.path)
+            if entry.hash is None:
+                return None
+            self._dirty = bool(self.index_file)
+        return entry.hash
+
+    def save(self) -> None:
+        """保存已计算的内容哈希，供下次运行复用"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                entry.path: [entry.size, entry.mtime, entry.hash]
+                for entry in self._entries.values() if entry.hash
+            }
+            tmp_file = f"{self.index_file}.tmp"
+            try:
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp_file, self.index_file)
+                self._saved_hashes = data
+                self._dirty = False
+            except OSError as e:
+                logger.warning(f"保存目录索引失败: {self.index_file}, 错误: {e}")
@@ -8,14 +8,106 @@ import os
 import sys
 import shutil
 import json
+import time
+import hashlib
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Union, Any
 
 from .log_utils import get_logger
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
 logger = get_logger(__name__)
 
+class FileLock:
+    """
+    跨进程文件锁（POSIX使用fcntl，Windows使用msvcrt）
+    
+    锁定期间可以通过 handle 读写锁文件本身的内容
+    """
+    
+    def __init__(self, lock_file: str):
+        """
+        初始化文件锁
+        
+        Args:
+            lock_file: 锁文件路径，不存在时自动创建
+        """
+        self.lock_file = lock_file
+        self.handle = None
+    
+    def acquire(self, blocking: bool = True) -> bool:
+        """
+        获取锁
+        
+        Args:
+            blocking: 是否阻塞直到成功，为False时锁被占用立即返回
+            
+        Returns:
+            是否获取到锁
+        """
+        ensure_dir(os.path.dirname(os.path.abspath(self.lock_file)))
+        self.handle = open(self.lock_file, 'a+b')
+        if fcntl is not None:
+            try:
+                fcntl.flock(self.handle.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except OSError:
+                self.handle.close()
+                self.handle = None
+                return False
+        
+        # msvcrt.locking 只会重试有限次数，这里循环直到拿到锁
+        while True:
+            try:
+                self.handle.seek(0)
+                msvcrt.locking(self.handle.fileno(), msvcrt.LK_NBLCK, 1)
+                return True
+            except OSError:
+                if not blocking:
+                    self.handle.close()
+                    self.handle = None
+                    return False
+                time.sleep(0.05)
+    
+    def release(self) -> None:
+        """释放锁"""
+        if self.handle is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self.handle.fileno(), fcntl.LOCK_UN)
+            else:
+                self.handle.seek(0)
+                msvcrt.locking(self.handle.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self.handle.close()
+            self.handle = None
+    
+    def read_text(self) -> str:
+        """读取锁文件内容（需在持有锁时调用）"""
+        self.handle.seek(0)
+        return self.handle.read().decode('utf-8')
+    
+    def write_text(self, text: str) -> None:
+        """覆盖写入锁文件内容（需在持有锁时调用）"""
+        self.handle.seek(0)
+        self.handle.truncate()
+        self.handle.write(text.encode('utf-8'))
+        self.handle.flush()
+    
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.release()
+
 def ensure_dir(directory: str) -> bool:
     """
     确保目录存在，如果不存在则创建
@@ -235,6 +327,26 @@ def get_file_size(file_path: str) -> int:
         logger.error(f"获取文件大小失败: {file_path}, 错误: {e}")
         return 0
 
+def get_file_hash(file_path: str) -> Optional[str]:
+    """
+    计算文件内容的SHA-256哈希
+    
+    Args:
+        file_path: 文件路径
+        
+    Returns:
+        十六进制哈希，读取失败时返回None
+    """
+    digest = hashlib.sha256()
+    try:
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+    except OSError as e:
+        logger.warning(f"计算文件哈希失败: {file_path}, 错误: {e}")
+        return None
+    return digest.hexdigest()
+
 def is_file_size_valid(file_path: str, max_size_mb: float) -> bool:
     """
     检查文件大小是否在允许范围内
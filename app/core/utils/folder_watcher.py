@@ -0,0 +1,224 @@
+"""
+目录监听模块
+----------
+监听输入目录中新出现或被修改的文件，等文件大小和修改时间稳定后（复制完成）再交给处理流程。
+安装了watchdog时使用系统文件事件，否则定时扫描目录。
+"""
+
+import os
+import time
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from .log_utils import get_logger
+from .file_utils import is_valid_extension
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+logger = get_logger(__name__)
+
+class _EventHandler(FileSystemEventHandler):
+    """将watchdog事件转发给监听器"""
+
+    def __init__(self, watcher: 'FolderWatcher'):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_created(self, event) -> None:
+        if not event.is_directory:
+            self.watcher.touch(event.src_path)
+
+    def on_modified(self, event) -> None:
+        if not event.is_directory:
+            self.watcher.touch(event.src_path)
+
+    def on_moved(self, event) -> None:
+        if not event.is_directory:
+            self.watcher.touch(event.dest_path)
+
+class FolderWatcher:
+    """
+    带防抖的目录监听器
+
+    新文件先进入候选集合，大小和修改时间在 stable_seconds 内保持不变且可以打开读取时才视为就绪。
+    """
+
+    def __init__(self, directory: str, extensions: List[str], poll_interval: float = 2.0,
+                 stable_seconds: float = 2.0, use_watchdog: bool = True,
+                 exclude_patterns: Optional[List[str]] = None):
+        """
+        初始化目录监听器
+
+        Args:
+            directory: 监听的目录
+            extensions: 关注的文件扩展名列表
+            poll_interval: 未使用watchdog时的扫描间隔（秒）
+            stable_seconds: 文件保持不变多少秒后视为复制完成
+            use_watchdog: 是否优先使用watchdog文件事件
+            exclude_patterns: 排除的文件名模式
+        """
+        self.directory = directory
+        self.extensions = extensions
+        self.poll_interval = poll_interval
+        self.stable_seconds = stable_seconds
+        self.exclude_patterns = exclude_patterns or ['~$', '.tmp']
+
+        self.use_watchdog = use_watchdog and Observer is not None
+        if use_watchdog and Observer is None:
+            logger.info("未安装watchdog，使用定时扫描监听目录")
+
+        self._lock = threading.Lock()
+        self._changed = threading.Event()
+        self._stopped = threading.Event()
+        # 候选文件 -> (大小, 修改时间, 最近一次变化的时间)
+        self._candidates: Dict[str, Tuple[int, float, float]] = {}
+        # 已交出的文件 -> (大小, 修改时间)，扫描时据此忽略未变化的文件
+        self._emitted: Dict[str, Tuple[int, float]] = {}
+        self._observer = None
+        self._poll_thread: Optional[threading.Thread] = None
+
+    def _accept(self, path: str) -> bool:
+        """检查文件名是否需要关注"""
+        name = os.path.basename(path)
+        if any(pattern in name for pattern in self.exclude_patterns):
+            return False
+        return is_valid_extension(path, self.extensions)
+
+    def touch(self, path: str) -> None:
+        """
+        登记一个新出现或发生变化的文件
+
+        Args:
+            path: 文件路径
+        """
+        if not self._accept(path):
+            return
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+
+        with self._lock:
+            if self._emitted.get(path) == (stat.st_size, stat.st_mtime):
+                return
+            current = self._candidates.get(path)
+            if current is None or current[:2] != (stat.st_size, stat.st_mtime):
+                self._candidates[path] = (stat.st_size, stat.st_mtime, time.time())
+        self._changed.set()
+
+    def _scan(self) -> None:
+        """扫描一次目录，登记新文件和变化的文件"""
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        self.touch(entry.path)
+        except OSError as e:
+            logger.warning(f"扫描监听目录失败: {self.directory}, 错误: {e}")
+
+    def _poll_loop(self) -> None:
+        """定时扫描线程"""
+        while not self._stopped.wait(self.poll_interval):
+            self._scan()
+
+    def start(self) -> None:
+        """开始监听，启动时已存在的文件同样作为候选"""
+        if self.use_watchdog:
+            self._observer = Observer()
+            self._observer.schedule(_EventHandler(self), self.directory, recursive=False)
+            self._observer.start()
+            logger.info(f"使用文件系统事件监听目录: {self.directory}")
+        else:
+            self._poll_thread = threading.Thread(target=self._poll_loop, name='folder-poll', daemon=True)
+            self._poll_thread.start()
+            logger.info(f"每 {self.poll_interval} 秒扫描一次目录: {self.directory}")
+
+        self._scan()
+
+    def stop(self) -> None:
+        """停止监听"""
+        self._stopped.set()
+        self._changed.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        if self._poll_thread is not None:
+            self._poll_thread.join()
+            self._poll_thread = None
+
+    def _is_readable(self, path: str) -> bool:
+        """文件能否以只读方式打开（Windows上仍在写入的文件无法打开）"""
+        try:
+            with open(path, 'rb'):
+                return True
+        except OSError:
+            return False
+
+    def _collect_ready(self) -> Tuple[List[str], Optional[float]]:
+        """
+        检查候选文件
+
+        Returns:
+            (就绪文件列表, 距离下一个候选文件可能就绪的秒数)元组，没有候选文件时秒数为None
+        """
+        now = time.time()
+        ready = []
+        next_check = None
+
+        with self._lock:
+            for path, (size, mtime, since) in list(self._candidates.items()):
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    # 文件已被删除或移走
+                    del self._candidates[path]
+                    continue
+
+                if (stat.st_size, stat.st_mtime) != (size, mtime):
+                    self._candidates[path] = (stat.st_size, stat.st_mtime, now)
+                    wait = self.stable_seconds
+                elif now - since >= self.stable_seconds and stat.st_size > 0 and self._is_readable(path):
+                    del self._candidates[path]
+                    self._emitted[path] = (size, mtime)
+                    ready.append(path)
+                    continue
+                else:
+                    wait = max(0.1, self.stable_seconds - (now - since))
+
+                next_check = wait if next_check is None else min(next_check, wait)
+
+        return sorted(ready), next_check
+
+    def get_ready(self, timeout: Optional[float] = None) -> List[str]:
+        """
+        等待并返回已复制完成的文件
+
+        Args:
+            timeout: 最长等待秒数，为None则一直等待直到有文件就绪或监听停止
+
+        Returns:
+            就绪的文件路径列表，超时或停止时可能为空
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while not self._stopped.is_set():
+            self._changed.clear()
+            ready, next_check = self._collect_ready()
+            if ready:
+                return ready
+
+            wait = next_check if next_check is not None else self.poll_interval
+            if deadline is not None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return []
+                wait = min(wait, remaining)
+            # 有新事件时提前醒来
+            self._changed.wait(wait)
+
+        return []
@@ -0,0 +1,253 @@
+"""
+记忆化缓存模块
+-----------
+为纯函数提供有界的LRU记忆化缓存，记录命中和未命中次数，
+并可把缓存内容保存到文件，下次运行时预热。
+"""
+
+import os
+import json
+import atexit
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from .log_utils import get_logger
+
+logger = get_logger(__name__)
+
+# 默认每个函数最多缓存的条目数
+DEFAULT_MAXSIZE = 4096
+
+# 预热文件版本，spec_parser 或 converter 中被记忆化的解析规则变化时加1，
+# 与预热文件中的版本不一致时忽略该文件，避免沿用旧规则的结果
+WARM_CACHE_VERSION = 1
+
+_MISSING = object()
+
+class LRUMemo:
+    """
+    单个函数的有界LRU缓存
+
+    只缓存字符串参数的结果；其他类型的参数直接调用函数。
+    encode/decode 用于把结果转换为可保存到JSON文件的形式。
+    """
+
+    def __init__(self, name: str, maxsize: int = DEFAULT_MAXSIZE,
+                 encode: Optional[Callable[[Any], Any]] = None,
+                 decode: Optional[Callable[[Any], Any]] = None):
+        """
+        初始化缓存
+
+        Args:
+            name: 缓存名称，用作预热文件中的键
+            maxsize: 最多缓存的条目数，小于等于0时不缓存
+            encode: 结果转换为JSON可保存形式的函数
+            decode: 从JSON形式恢复结果的函数
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self.encode = encode or (lambda value: value)
+        self.decode = decode or (lambda value: value)
+
+        self.hits = 0
+        self.misses = 0
+        self._data: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any, compute: Callable[[], Any]) -> Any:
+        """
+        获取缓存的结果，未命中时计算并缓存
+
+        Args:
+            key: 缓存键（函数参数）
+            compute: 计算结果的函数
+
+        Returns:
+            函数结果
+        """
+        if self.maxsize <= 0 or not isinstance(key, str):
+            return compute()
+
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is not _MISSING:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+
+        value = compute()
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def resize(self, maxsize: int) -> None:
+        """调整缓存上限，超出的最久未用条目被淘汰"""
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._data) > max(0, maxsize):
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """清空缓存和计数"""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计
+
+        Returns:
+            包含条目数、上限、命中数、未命中数和命中率的字典
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+    def dump(self) -> List[list]:
+        """导出缓存内容，按最近使用顺序排列"""
+        with self._lock:
+            return [[key, self.encode(value)] for key, value in self._data.items()]
+
+    def load(self, items: List[list]) -> None:
+        """导入缓存内容，已有的条目不覆盖"""
+        with self._lock:
+            for key, value in items[-self.maxsize:] if self.maxsize > 0 else []:
+                if key not in self._data:
+                    self._data[key] = self.decode(value)
+            while len(self._data) > max(0, self.maxsize):
+                self._data.popitem(last=False)
+
+_registry: Dict[str, LRUMemo] = {}
+_registry_lock = threading.Lock()
+_warm_file: Optional[str] = None
+
+def get_memo(name: str, maxsize: int = DEFAULT_MAXSIZE,
+             encode: Optional[Callable[[Any], Any]] = None,
+             decode: Optional[Callable[[Any], Any]] = None) -> LRUMemo:
+    """
+    获取指定名称的共享缓存，不存在时创建
+
+    Args:
+        name: 缓存名称
+        maxsize: 最多缓存的条目数
+        encode: 结果转换为JSON可保存形式的函数
+        decode: 从JSON形式恢复结果的函数
+
+    Returns:
+        缓存对象
+    """
+    with _registry_lock:
+        memo = _registry.get(name)
+        if memo is None:
+            memo = LRUMemo(name, maxsize, encode, decode)
+            _registry[name] = memo
+        return memo
+
+def memoized(name: str, encode: Optional[Callable[[Any], Any]] = None,
+             decode: Optional[Callable[[Any], Any]] = None) -> Callable:
+    """
+    单参数纯函数的记忆化装饰器
+
+    Args:
+        name: 缓存名称
+        encode: 结果转换为JSON可保存形式的函数
+        decode: 从JSON形式恢复结果的函数
+
+    Returns:
+        装饰器
+    """
+    def decorator(func: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        memo = get_memo(name, encode=encode, decode=decode)
+
+        def wrapper(arg: Any) -> Any:
+            return memo.get(arg, lambda: func(arg))
+
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        wrapper.memo = memo
+        return wrapper
+    return decorator
+
+def configure(maxsize: int, warm_file: Optional[str] = None) -> None:
+    """
+    设置所有缓存的上限，并从预热文件加载上次保存的内容（每个进程只加载一次）
+
+    Args:
+        maxsize: 每个缓存最多的条目数，小于等于0时关闭缓存
+        warm_file: 预热文件路径，为None则不保存也不加载
+    """
+    global _warm_file
+
+    with _registry_lock:
+        memos = list(_registry.values())
+    for memo in memos:
+        memo.resize(maxsize)
+
+    if not warm_file or maxsize <= 0 or _warm_file == warm_file:
+        return
+    first = _warm_file is None
+    _warm_file = warm_file
+
+    if os.path.exists(warm_file):
+        try:
+            with open(warm_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != WARM_CACHE_VERSION:
+                logger.info(f"记忆化缓存预热文件版本已变化，忽略: {warm_file}")
+            else:
+                for name, items in data['memos'].items():
+                    if name in _registry:
+                        _registry[name].load(items)
+                logger.info(f"已从预热文件加载记忆化缓存: {warm_file}")
+        except (OSError, ValueError, TypeError, KeyError, AttributeError) as e:
+            logger.warning(f"加载记忆化缓存预热文件失败: {warm_file}, 错误: {e}")
+
+    if first:
+        atexit.register(save_warm_cache)
+
+def save_warm_cache() -> None:
+    """把所有缓存的内容保存到预热文件"""
+    if not _warm_file:
+        return
+
+    with _registry_lock:
+        memos = list(_registry.values())
+    if not any(memo.misses for memo in memos):
+        # 没有新计算的结果，无需重写
+        return
+
+    data = {'version': WARM_CACHE_VERSION, 'memos': {memo.name: memo.dump() for memo in memos}}
+    tmp_file = f"{_warm_file}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(_warm_file)), exist_ok=True)
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_file, _warm_file)
+    except (OSError, TypeError) as e:
+        logger.warning(f"保存记忆化缓存预热文件失败: {_warm_file}, 错误: {e}")
+        return
+
+    for memo in memos:
+        stats = memo.stats()
+        logger.info(f"记忆化缓存 {memo.name}: {stats['size']} 条, 命中 {stats['hits']}, "
+                    f"未命中 {stats['misses']}, 命中率 {stats['hit_rate']:.1%}")
+
+def all_stats() -> Dict[str, Dict[str, Any]]:
+    """获取所有缓存的统计信息"""
+    with _registry_lock:
+        memos = list(_registry.values())
+    return {memo.name: memo.stats() for memo in memos}
@@ -0,0 +1,365 @@
+"""
+规格解析模块
+----------
+统一解析商品规格和从商品名称推断规格。所有正则表达式预编译，
+每个字符串只做一次空白规整，不可能匹配的模式先用字符检查跳过；
+各规则的优先顺序与原先 ExcelProcessor、UnitConverter 和 string_utils 中的实现一致。
+解析和推断结果按输入文本记忆化，重复出现的商品名称只需一次字典查找。
+修改任何解析规则时需递增 memo.WARM_CACHE_VERSION，否则会沿用预热文件中按旧规则得到的结果。
+"""
+
+import re
+from typing import List, NamedTuple, Optional, Tuple
+
+from .memo import memoized
+
+# 置信度：规格中有明确的层级、只能确定包装数量、无法解析
+CONFIDENCE_EXPLICIT = 1.0
+CONFIDENCE_PARTIAL = 0.5
+CONFIDENCE_NONE = 0.0
+
+# 从商品名称推断的置信度：规格格式、特定商品规则、典型件装数
+CONFIDENCE_NAME_PATTERN = 0.8
+CONFIDENCE_NAME_RULE = 0.6
+CONFIDENCE_NAME_GUESS = 0.3
+
+SEPARATORS = '*xX×'
+
+WHITESPACE = re.compile(r'\s+')
+
+# 重量/容量*数量，如"450g*15"、"450ml*15"
+WEIGHT_COUNT = re.compile(r'\d+(?:g|ml|毫升|克)[*xX×](\d+)')
+THREE_LEVEL = re.compile(r'(\d+)[*xX×](\d+)[*xX×](\d+)')
+TWO_LEVEL = re.compile(r'(\d+)[*xX×](\d+)')
+# 24瓶/件
+PIECES_PER_CASE = re.compile(r'(\d+)[瓶个支袋][/／](件|箱)')
+# 4L、1.5升*6
+LITRE = re.compile(r'(\d+(?:\.\d+)?)\s*[Ll升][*×]?(\d+)?')
+
+# 容量*数量，如"1.8L*8瓶"、"500ml*24"
+CONTAINER_COUNT = re.compile(r'(\d+(?:\.\d+)?)\s*(?:ml|[mM][lL]|[lL]|升|毫升)[*×xX](\d+)')
+# 规格为容量*数量（用于推断单位为件）
+VOLUME_COUNT = re.compile(r'\d+(?:\.\d+)?\s*(?:ml|[mL]L|l|L|升|毫升)[*×xX]\d+')
+SIMPLE_COUNT = re.compile(r'\d+[*×xX]\d+')
+
+# 层级解析（分隔符已统一为*，从开头匹配）
+LEVEL_THREE = re.compile(r'(\d+)[*](\d+)[*](\d+)')
+LEVEL_ML = re.compile(r'(\d+)(?:ml|毫升)[*](\d+)', re.IGNORECASE)
+LEVEL_LITRE = re.compile(r'(\d+(?:\.\d+)?)[Ll升][*](\d+)')
+LEVEL_TWO = re.compile(r'(\d+)[*](\d+)')
+LEVEL_VOLUME = re.compile(r'([\d\.]+)[L升][*xX×](\d+)')
+LEVEL_SEPARATOR = re.compile(r'[xX×]')
+
+# 容量或重量
+VOLUME = re.compile(r'(\d+(?:\.\d+)?)\s*(ml|mL|ML|毫升|L|l|升|kg|KG|公斤|g|克)')
+VOLUME_UNITS = {
+    'ml': 'ml', 'mL': 'ml', 'ML': 'ml', '毫升': 'ml',
+    'L': 'L', 'l': 'L', '升': 'L',
+    'kg': 'kg', 'KG': 'kg', '公斤': 'kg',
+    'g': 'g', '克': 'g'
+}
+
+# 从名称推断规格：(模式, 需要包含的文字)
+NAME_WHITE_FILM_PIECES = (re.compile(r'(\d+)入白膜'), '入白膜')
+NAME_CARTON_PIECES = (re.compile(r'(\d+)入纸箱'), '入纸箱')
+NAME_CARTON = (re.compile(r'(\d+)纸箱'), '纸箱')
+NAME_WHITE_FILM = (re.compile(r'(\d+)白膜'), '白膜')
+NAME_LITRE_COUNT = re.compile(r'([\d\.]+)[Ll升][*×xX](\d+)')
+NAME_LITRE = re.compile(r'([\d\.]+)[Ll升]')
+
+# 通用规格模式：(模式, 替换格式)
+GENERIC_PATTERNS = [
+    # 1*6、1x12、1X20等格式
+    (re.compile(r'(\d+)[*xX×](\d+)'), r'\1*\2'),
+    # "xx入"格式，如"12入"、"24入"
+    (re.compile(r'(\d+)入'), r'1*\1'),
+    # "xxL*1"或"xx升*1"格式
+    (re.compile(r'([\d\.]+)[L升][*xX×]?(\d+)?'), r'\1L*\2'),
+    # "xxkg*1"或"xx公斤*1"格式
+    (re.compile(r'([\d\.]+)(?:kg|公斤)[*xX×]?(\d+)?'), r'\1kg*\2'),
+    # "xxg*1"或"xx克*1"格式
+    (re.compile(r'([\d\.]+)(?:g|克)[*xX×]?(\d+)?'), r'\1g*\2'),
+    # "xxmL*1"或"xx毫升*1"格式
+    (re.compile(r'([\d\.]+)(?:mL|毫升)[*xX×]?(\d+)?'), r'\1mL*\2'),
+]
+
+# 特定商品规则：(模式, 结果构造函数)
+NAME_RULES = [
+    # XX入白膜格式，如"550纯净水24入白膜"
+    (re.compile(r'(\d+)入白膜'), lambda m: (f"1*{m.group(1)}", int(m.group(1)))),
+    # 白膜格式，如"550水24白膜"
+    (re.compile(r'(\d+)白膜'), lambda m: (f"1*{m.group(1)}", int(m.group(1)))),
+    # 445水溶C系列
+    (re.compile(r'445水溶C.*?(\d+)[入个]纸箱'), lambda m: (f"1*{m.group(1)}", int(m.group(1)))),
+    # 东方树叶系列
+    (re.compile(r'东方树叶.*?(\d+\*\d+).*纸箱'), lambda m: (m.group(1), int(m.group(1).split('*')[1]))),
+    # 桶装
+    (re.compile(r'(\d+\.?\d*L)桶装'), lambda m: (f"{m.group(1)}*1", 1)),
+    # 树叶茶系
+    (re.compile(r'树叶.*?(\d+)[入个]纸箱'), lambda m: (f"1*{m.group(1)}", int(m.group(1)))),
+    # 茶π系列
+    (re.compile(r'茶[πΠπ].*?(\d+)纸箱'), lambda m: (f"1*{m.group(1)}", int(m.group(1)))),
+    # 通用入数匹配
+    (re.compile(r'(\d+)[入个](?:纸箱|箱装|白膜)'), lambda m: (f"1*{m.group(1)}", int(m.group(1)))),
+    # 通用数字+纸箱格式
+    (re.compile(r'(\d+)纸箱'), lambda m: (f"1*{m.group(1)}", int(m.group(1)))),
+]
+NAME_DIRECT = re.compile(r'(\d+\*\d+)')
+DIGITS = re.compile(r'\d+')
+# 典型的件装数
+TYPICAL_CASE_COUNTS = ('12', '15', '24', '30')
+
+DEFAULT_LEVELS = (1, 1, None)
+
+class SpecResult(NamedTuple):
+    """规格解析结果"""
+    spec: Optional[str]  # 规格字符串
+    levels: Tuple[int, int, Optional[int]]  # (一级包装, 二级包装, 三级包装)，无法解析时为(1, 1, None)
+    package_quantity: Optional[int]  # 包装数量，无法确定时为None
+    volume: Optional[float]  # 单件容量或重量
+    unit: Optional[str]  # 容量或重量单位：ml、L、g、kg
+    confidence: float  # 置信度，0表示无法解析
+
+EMPTY_RESULT = SpecResult(None, DEFAULT_LEVELS, None, None, None, CONFIDENCE_NONE)
+
+def _encode_result(result: SpecResult) -> list:
+    return list(result)
+
+def _decode_result(value: list) -> SpecResult:
+    spec, levels, package_quantity, volume, unit, confidence = value
+    return SpecResult(spec, tuple(levels), package_quantity, volume, unit, confidence)
+
+def _has_separator(text: str) -> bool:
+    return any(sep in text for sep in SEPARATORS)
+
+def _package_quantity(text: str) -> Optional[int]:
+    """按包装数量规则解析已规整空白的规格"""
+    has_separator = _has_separator(text)
+    if has_separator:
+        match = WEIGHT_COUNT.search(text)
+        if match:
+            return int(match.group(1))
+
+        match = THREE_LEVEL.search(text)
+        if match:
+            # 取最后一个数字作为袋数量
+            return int(match.group(3))
+
+        match = TWO_LEVEL.search(text)
+        if match:
+            return int(match.group(2))
+
+    if '/' in text or '／' in text:
+        match = PIECES_PER_CASE.search(text)
+        if match:
+            return int(match.group(1))
+
+    if 'L' in text or 'l' in text or '升' in text:
+        match = LITRE.search(text)
+        if match:
+            # 如果有第二个数字，返回它；否则返回1
+            return int(match.group(2)) if match.group(2) else 1
+
+    return None
+
+def _levels(text: str) -> Optional[Tuple[int, int, Optional[int]]]:
+    """按层级规则解析规格，无法解析时返回None"""
+    compact = LEVEL_SEPARATOR.sub('*', WHITESPACE.sub('', text))
+    if '*' not in compact:
+        return None
+
+    match = LEVEL_THREE.match(compact)
+    if match:
+        return int(match.group(1)), int(match.group(2)), int(match.group(3))
+
+    match = LEVEL_ML.match(compact)
+    if match:
+        return 1, int(match.group(2)), None
+
+    match = LEVEL_LITRE.match(compact)
+    if match:
+        return 1, int(match.group(2)), None
+
+    match = LEVEL_TWO.match(compact)
+    if match:
+        return int(match.group(1)), int(match.group(2)), None
+
+    match = LEVEL_VOLUME.match(compact)
+    if match:
+        try:
+            float(match.group(1))
+            return 1, int(match.group(2)), None
+        except ValueError:
+            pass
+
+    return None
+
+def _volume(text: str) -> Tuple[Optional[float], Optional[str]]:
+    match = VOLUME.search(text)
+    if not match:
+        return None, None
+    return float(match.group(1)), VOLUME_UNITS[match.group(2)]
+
+@memoized('parse_spec', _encode_result, _decode_result)
+def parse_spec(spec: str) -> SpecResult:
+    """
+    解析规格字符串
+
+    Args:
+        spec: 规格字符串，如"1*15"、"1x5x10"、"500ml*24"、"24瓶/件"
+
+    Returns:
+        规格解析结果
+    """
+    if not spec or not isinstance(spec, str):
+        return EMPTY_RESULT
+
+    text = WHITESPACE.sub(' ', spec.strip())
+    if not any(ch.isdigit() for ch in text):
+        return SpecResult(spec, DEFAULT_LEVELS, None, None, None, CONFIDENCE_NONE)
+
+    levels = _levels(text)
+    package_quantity = _package_quantity(text)
+    volume, unit = _volume(text)
+
+    if levels is not None:
+        confidence = CONFIDENCE_EXPLICIT
+    elif package_quantity is not None:
+        confidence = CONFIDENCE_PARTIAL
+    else:
+        confidence = CONFIDENCE_NONE
+
+    return SpecResult(spec, levels or DEFAULT_LEVELS, package_quantity, volume, unit, confidence)
+
+def extract_specification(text: str) -> Optional[str]:
+    """
+    用通用规格模式从文本中提取规格
+
+    Args:
+        text: 文本字符串
+
+    Returns:
+        提取的规格字符串，如果无法提取则返回None
+    """
+    if not text or not isinstance(text, str):
+        return None
+
+    # 处理XX入白膜格式，如"550纯净水24入白膜"
+    pattern, marker = NAME_WHITE_FILM_PIECES
+    if marker in text:
+        match = pattern.search(text)
+        if match:
+            return f"1*{match.group(1)}"
+
+    for pattern, replacement in GENERIC_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            if pattern.groups >= 2:
+                return f"{match.group(1)}*{match.group(2)}"
+            return pattern.sub(replacement, text)
+
+    return None
+
+@memoized('infer_spec')
+def infer_spec(name: str) -> Optional[str]:
+    """
+    从商品名称推断规格字符串
+
+    规则依次为：重量/容量*数量、xx入白膜、xx入纸箱、直接包含的规格、xx纸箱、xx白膜、
+    容量*数量、简单容量、通用规格模式。
+
+    Args:
+        name: 商品名称
+
+    Returns:
+        推断的规格，如果无法推断则返回None
+    """
+    if not name or not isinstance(name, str):
+        return None
+
+    has_separator = _has_separator(name)
+    if has_separator:
+        match = WEIGHT_COUNT.search(name)
+        if match:
+            return f"1*{match.group(1)}"
+
+    for pattern, marker in (NAME_WHITE_FILM_PIECES, NAME_CARTON_PIECES):
+        if marker in name:
+            match = pattern.search(name)
+            if match:
+                return f"1*{match.group(1)}"
+
+    if has_separator:
+        match = TWO_LEVEL.search(name)
+        if match:
+            return f"{match.group(1)}*{match.group(2)}"
+
+    for pattern, marker in (NAME_CARTON, NAME_WHITE_FILM):
+        if marker in name:
+            match = pattern.search(name)
+            if match:
+                return f"1*{match.group(1)}"
+
+    if 'L' in name or 'l' in name or '升' in name:
+        match = NAME_LITRE_COUNT.search(name)
+        if match:
+            return f"{match.group(1)}L*{match.group(2)}"
+
+        match = NAME_LITRE.search(name)
+        if match:
+            return f"{match.group(1)}L*1"
+
+    return extract_specification(name)
+
+@memoized('guess_spec', _encode_result, _decode_result)
+def guess_spec(name: str) -> SpecResult:
+    """
+    从商品名称推断规格和包装数量，依次使用规格格式、特定商品规则和典型件装数
+
+    Args:
+        name: 商品名称
+
+    Returns:
+        规格解析结果，无法推断时 spec 为None
+    """
+    if not name or not isinstance(name, str):
+        return EMPTY_RESULT
+
+    name = name.strip()
+    volume, unit = _volume(name)
+
+    def result(spec: str, package_quantity: int, confidence: float) -> SpecResult:
+        levels = _levels(WHITESPACE.sub(' ', spec)) or DEFAULT_LEVELS
+        return SpecResult(spec, levels, package_quantity, volume, unit, confidence)
+
+    # 重量/容量*数字格式
+    if _has_separator(name):
+        match = WEIGHT_COUNT.search(name)
+        if match:
+            return result(f"1*{match.group(1)}", int(match.group(1)), CONFIDENCE_NAME_PATTERN)
+
+    spec = infer_spec(name)
+    if spec:
+        package_quantity = parse_spec(spec).package_quantity
+        if package_quantity:
+            return result(spec, package_quantity, CONFIDENCE_NAME_PATTERN)
+
+    for pattern, formatter in NAME_RULES:
+        match = pattern.search(name)
+        if match:
+            spec, package_quantity = formatter(match)
+            return result(spec, package_quantity, CONFIDENCE_NAME_RULE)
+
+    if '*' in name:
+        match = NAME_DIRECT.search(name)
+        if match:
+            package_quantity = parse_spec(match.group(1)).package_quantity
+            if package_quantity:
+                return result(match.group(1), package_quantity, CONFIDENCE_NAME_RULE)
+
+    numbers: List[str] = DIGITS.findall(name)
+    for num in numbers:
+        if num in TYPICAL_CASE_COUNTS:
+            return result(f"1*{num}", int(num), CONFIDENCE_NAME_GUESS)
+
+    return SpecResult(None, DEFAULT_LEVELS, None, volume, unit, CONFIDENCE_NONE)
@@ -2,11 +2,26 @@
 字符串处理工具模块
 ---------------
 提供字符串处理、正则表达式匹配等功能。
+条码的清理和格式化同时提供单个值和整列（pandas Series）两种版本，整列版本按列向量化处理，
+只有少数特殊取值（超出整数范围的数值、其他类型的对象）逐个按单值规则处理，结果与单值版本一致。
 """
 
 import re
 from typing import Dict, List, Optional, Tuple, Any, Match, Pattern
 
+import numpy as np
+import pandas as pd
+
+from .spec_parser import parse_spec
+
+# 条码规则使用的正则表达式
+SCIENTIFIC_NOTATION = re.compile(r'^-?\d+(\.\d+)?[eE][+-]?\d+$')
+TRAILING_ZEROS = re.compile(r'\.0+$')
+NON_DIGITS = re.compile(r'\D')
+
+# 可以精确转换为int64的浮点数上限
+INT64_LIMIT = 2.0 ** 63
+
 def clean_string(text: str) -> str:
     """
     清理字符串，移除多余空白
@@ -120,46 +135,7 @@ def parse_specification(spec_str: str) -> Optional[int]:
     Returns:
         包装数量，如果无法解析则返回None
     """
-    if not spec_str or not isinstance(spec_str, str):
-        return None
-    
-    try:
-        # 清理规格字符串
-        spec_str = clean_string(spec_str)
-        
-        # 匹配重量/容量格式，如"450g*15"、"450ml*15"
-        match = re.search(r'\d+(?:g|ml|毫升|克)[*xX×](\d+)', spec_str)
-        if match:
-            # 返回后面的数量
-            return int(match.group(1))
-        
-        # 匹配1*5*10 格式的三级规格
-        match = re.search(r'(\d+)[\*xX×](\d+)[\*xX×](\d+)', spec_str)
-        if match:
-            # 取最后一个数字作为袋数量
-            return int(match.group(3))
-        
-        # 匹配1*15, 1x15 格式
-        match = re.search(r'(\d+)[\*xX×](\d+)', spec_str)
-        if match:
-            # 取第二个数字作为包装数量
-            return int(match.group(2))
-            
-        # 匹配24瓶/件等格式
-        match = re.search(r'(\d+)[瓶个支袋][/／](件|箱)', spec_str)
-        if match:
-            return int(match.group(1))
-            
-        # 匹配4L格式
-        match = re.search(r'(\d+(?:\.\d+)?)\s*[Ll升][*×]?(\d+)?', spec_str)
-        if match:
-            # 如果有第二个数字，返回它；否则返回1
-            return int(match.group(2)) if match.group(2) else 1
-            
-    except Exception:
-        pass
-        
-    return None
+    return parse_spec(spec_str).package_quantity
 
 def clean_barcode(barcode: Any) -> str:
     """
@@ -175,8 +151,8 @@ def clean_barcode(barcode: Any) -> str:
         barcode = f"{barcode:.0f}"
         
     # 清理条码格式，移除可能的非数字字符（包括小数点）
-    barcode_clean = re.sub(r'\.0+$', '', str(barcode))  # 移除末尾0
-    barcode_clean = re.sub(r'\D', '', barcode_clean)  # 只保留数字
+    barcode_clean = TRAILING_ZEROS.sub('', str(barcode))  # 移除末尾0
+    barcode_clean = NON_DIGITS.sub('', barcode_clean)  # 只保留数字
     
     return barcode_clean
 
@@ -190,7 +166,7 @@ def is_scientific_notation(value: str) -> bool:
     Returns:
         是否是科学计数法
     """
-    return bool(re.match(r'^-?\d+(\.\d+)?[eE][+-]?\d+$', str(value)))
+    return bool(SCIENTIFIC_NOTATION.match(str(value)))
 
 def format_barcode(barcode: Any) -> str:
     """
@@ -210,4 +186,118 @@ def format_barcode(barcode: Any) -> str:
             pass
     
     # 如果不是数字或转换失败，返回原始字符串
-    return str(barcode) 
\ No newline at end of file
+    return str(barcode)
+
+def _classify_barcodes(values: pd.Series) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    把条码列的取值分为数值、字符串和其他对象
+    
+    Args:
+        values: 条码列
+        
+    Returns:
+        (各行的对象数组, 数值掩码, 字符串掩码, 数值的浮点数组)元组，
+        无法转换为浮点数的数值（如超出范围的整数）不计入数值掩码
+    """
+    n = len(values)
+    numbers = np.full(n, np.nan)
+    
+    if isinstance(values.dtype, np.dtype) and values.dtype.kind in 'biuf':
+        # numpy数值列：每个取值都是数值
+        objects = values.to_numpy(dtype=object)
+        is_number = np.ones(n, dtype=bool)
+        is_text = np.zeros(n, dtype=bool)
+        numbers = values.to_numpy(dtype=np.float64)
+        return objects, is_number, is_text, numbers
+    
+    objects = values.to_numpy(dtype=object)
+    if pd.api.types.infer_dtype(objects, skipna=False) == 'string':
+        return objects, np.zeros(n, dtype=bool), np.ones(n, dtype=bool), numbers
+    
+    is_text = np.fromiter((isinstance(value, str) for value in objects), dtype=bool, count=n)
+    is_number = np.fromiter((isinstance(value, (int, float)) for value in objects), dtype=bool, count=n)
+    if is_number.any():
+        try:
+            numbers[is_number] = objects[is_number].astype(np.float64)
+        except OverflowError:
+            # 超出浮点数范围的整数按单值规则处理
+            is_number[:] = False
+    return objects, is_number, is_text, numbers
+
+def _integer_text(numbers: np.ndarray) -> np.ndarray:
+    """把取值为整数的浮点数组转换为十进制字符串数组"""
+    return np.array(list(map(str, numbers.astype(np.int64).tolist())), dtype=object)
+
+def format_barcode_series(values: pd.Series) -> pd.Series:
+    """
+    按 format_barcode 的规则整列格式化条码
+    
+    数值和科学计数法字符串转换为去掉小数部分的整数字符串，其他字符串保持原样；
+    超出int64范围的数值和其他类型的对象逐个按 format_barcode 处理。
+    
+    Args:
+        values: 条码列
+        
+    Returns:
+        格式化后的条码列（字符串），索引与输入一致
+    """
+    objects, is_number, is_text, numbers = _classify_barcodes(values)
+    result = objects.copy()
+    
+    # 字符串保持原样，科学计数法字符串（含字母e）按浮点数处理
+    if is_text.any():
+        text = objects[is_text]
+        if not is_text.all() or pd.api.types.infer_dtype(text, skipna=False) != 'string':
+            text = text.astype(str).astype(object)
+        result[is_text] = text
+        text_series = pd.Series(text, dtype=object)
+        scientific = text_series.str.contains('e', case=False, regex=False).to_numpy(dtype=bool, copy=True)
+        if scientific.any():
+            scientific[scientific] = text_series[scientific].str.match(SCIENTIFIC_NOTATION).to_numpy(dtype=bool)
+        if scientific.any():
+            positions = np.flatnonzero(is_text)[scientific]
+            numbers[positions] = text[scientific].astype(np.float64)
+            is_number[positions] = True
+            is_text[positions] = False
+    
+    # NaN格式化失败，保持原始字符串"nan"
+    exact = is_number & np.isfinite(numbers) & (np.abs(np.nan_to_num(numbers)) < INT64_LIMIT)
+    result[exact] = _integer_text(np.trunc(numbers[exact]))
+    result[is_number & np.isnan(numbers)] = 'nan'
+    
+    residual = ~(exact | is_text | (is_number & np.isnan(numbers)))
+    for position in np.flatnonzero(residual):
+        result[position] = format_barcode(objects[position])
+    
+    return pd.Series(result, index=values.index, dtype=object)
+
+def clean_barcode_series(values: pd.Series) -> pd.Series:
+    """
+    按 clean_barcode 的规则整列清理条码，只保留数字
+    
+    Args:
+        values: 条码列
+        
+    Returns:
+        清理后的条码列（字符串），索引与输入一致
+    """
+    objects, is_number, is_text, numbers = _classify_barcodes(values)
+    text = objects.copy()
+    
+    # 数值按"{:.0f}"格式化（四舍六入五成双）后只保留数字，非有限值去掉非数字字符后为空
+    exact = is_number & np.isfinite(numbers) & (np.abs(np.nan_to_num(numbers)) < INT64_LIMIT)
+    text[exact] = _integer_text(np.abs(np.rint(numbers[exact])))
+    text[is_number & ~np.isfinite(numbers)] = ''
+    
+    residual = ~(exact | is_text | (is_number & ~np.isfinite(numbers)))
+    for position in np.flatnonzero(residual):
+        value = objects[position]
+        text[position] = f"{value:.0f}" if isinstance(value, (int, float)) else str(value)
+    
+    # 只含数字的字符串无需清理，其余移除末尾的".0"和非数字字符
+    cleaned = pd.Series(text, index=values.index, dtype=object)
+    dirty = (is_text | residual) & ~cleaned.str.isdecimal().to_numpy(dtype=bool)
+    if dirty.any():
+        cleaned[dirty] = (cleaned[dirty].str.replace(TRAILING_ZEROS, '', regex=True)
+                          .str.replace(NON_DIGITS, '', regex=True))
+    return cleaned
\ No newline at end of file
@@ -4,7 +4,7 @@ OCR服务模块
 提供OCR识别服务，协调OCR流程。
 """
 
-from typing import Dict, List, Optional, Tuple, Union, Any
+from typing import Callable, Dict, List, Optional, Tuple, Union, Any
 
 from ..config.settings import ConfigManager
 from ..core.utils.log_utils import get_logger
@@ -32,6 +32,11 @@ class OCRService:
         
         logger.info("OCRService初始化完成")
     
+    def close(self) -> None:
+        """关闭OCR服务，释放网络连接"""
+        self.ocr_processor.close()
+        logger.info("OCRService已关闭")
+    
     def get_unprocessed_images(self) -> List[str]:
         """
         获取待处理的图片列表
@@ -61,19 +66,60 @@ class OCRService:
         
         return result
     
-    def process_images_batch(self, batch_size: int = None, max_workers: int = None) -> Tuple[int, int]:
+    def process_images_batch(self, batch_size: int = None, max_workers: int = None,
+                             on_result: Optional[Callable[[str, Optional[str]], None]] = None) -> Tuple[int, int]:
         """
         批量处理图片
         
+        根据配置 [Performance] ocr_engine 选择线程池连续调度、asyncio并发或两阶段提交/轮询引擎
+        
         Args:
-            batch_size: 批处理大小
-            max_workers: 最大线程数
+            batch_size: 未配置在途上限时作为在途任务数（仅线程池引擎使用）
+            max_workers: 最大线程数，异步引擎下为最大在途请求数，两阶段引擎下为提交线程数
+            on_result: 每张图片完成时的回调，参数为(图片路径, 输出文件路径)，可用于显示进度
             
         Returns:
             (总处理数, 成功处理数)元组
         """
+        if self.ocr_processor.ocr_engine == 'async':
+            logger.info(f"OCRService开始异步批量处理图片, max_concurrency={max_workers}")
+            return self.ocr_processor.process_images_async(max_workers, on_result)
+        
+        if self.ocr_processor.ocr_engine == 'two_phase':
+            logger.info(f"OCRService开始两阶段批量处理图片, max_workers={max_workers}")
+            return self.ocr_processor.process_images_two_phase(max_workers, on_result)
+        
         logger.info(f"OCRService开始批量处理图片, batch_size={batch_size}, max_workers={max_workers}")
-        return self.ocr_processor.process_images_batch(batch_size, max_workers)
+        return self.ocr_processor.process_images_batch(batch_size, max_workers, on_result)
+    
+    def process_image_list(self, image_paths: List[str],
+                           on_result: Optional[Callable[[str, Optional[str]], None]] = None) -> Tuple[int, int]:
+        """
+        处理指定的图片列表
+        
+        Args:
+            image_paths: 图片文件路径列表
+            on_result: 每张图片完成时的回调，参数为(图片路径, 输出文件路径)
+            
+        Returns:
+            (总处理数, 成功处理数)元组
+        """
+        logger.info(f"OCRService开始处理 {len(image_paths)} 张图片")
+        return self.ocr_processor.process_image_list(image_paths, on_result=on_result)
+    
+    def get_unprocessed_files(self, image_paths: List[str]) -> List[str]:
+        """
+        从给定图片中筛选出未处理的图片
+        
+        Args:
+            image_paths: 图片文件路径列表
+            
+        Returns:
+            未处理的图片文件路径列表
+        """
+        if not self.ocr_processor.skip_existing:
+            return list(image_paths)
+        return self.ocr_processor.record_manager.get_unprocessed_files(image_paths)
     
     def validate_image(self, image_path: str) -> bool:
         """
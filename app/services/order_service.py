@@ -60,6 +60,44 @@ class OrderService:
             logger.info("OrderService开始处理最新Excel文件")
             return self.excel_processor.process_latest_file()
     
+    def get_pending_excels(self) -> List[str]:
+        """
+        获取还没有生成采购单的Excel文件
+        
+        Returns:
+            Excel文件路径列表
+        """
+        return self.excel_processor.get_pending_files()
+    
+    def process_excels(self, file_paths: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        批量处理Excel文件，生成采购单
+        
+        Args:
+            file_paths: Excel文件路径列表，如果为None则处理所有还没有采购单的文件
+            
+        Returns:
+            每个文件的结果摘要列表
+        """
+        if file_paths is None:
+            file_paths = self.get_pending_excels()
+        logger.info(f"OrderService开始批量处理 {len(file_paths)} 个Excel文件")
+        return self.excel_processor.process_files(file_paths)
+    
+    def process_ocr_result(self, image_path: str, ocr_result: Dict) -> Optional[str]:
+        """
+        直接用OCR结果中的表格结构生成采购单
+        
+        Args:
+            image_path: 原始图片路径
+            ocr_result: 含 tables_result 的OCR识别结果
+            
+        Returns:
+            输出采购单文件路径，如果处理失败则返回None
+        """
+        logger.info(f"OrderService开始处理OCR表格结构: {image_path}")
+        return self.excel_processor.process_ocr_result(image_path, ocr_result)
+    
     def get_purchase_orders(self) -> List[str]:
         """
         获取采购单文件列表
@@ -0,0 +1,124 @@
+"""
+目录监听服务模块
+-------------
+常驻监听输入目录，图片复制完成后立即依次执行OCR识别、Excel处理生成采购单，可选合并采购单。
+"""
+
+import threading
+from typing import List, Optional
+
+from ..config.settings import ConfigManager
+from ..core.utils.log_utils import get_logger
+from ..core.utils.folder_watcher import FolderWatcher
+from .ocr_service import OCRService
+from .order_service import OrderService
+
+logger = get_logger(__name__)
+
+class WatchService:
+    """
+    目录监听服务：新图片落地后自动走完 OCR → Excel → 采购单 流程
+    """
+
+    def __init__(self, config: Optional[ConfigManager] = None,
+                 ocr_service: Optional[OCRService] = None,
+                 order_service: Optional[OrderService] = None):
+        """
+        初始化目录监听服务
+
+        Args:
+            config: 配置管理器，如果为None则创建新的
+            ocr_service: OCR服务，如果为None则创建新的
+            order_service: 订单服务，如果为None则创建新的
+        """
+        logger.info("初始化WatchService")
+        self.config = config or ConfigManager()
+        self.ocr_service = ocr_service or OCRService(self.config)
+        self.order_service = order_service or OrderService(self.config)
+
+        self.merge_orders = self.config.getboolean('Watch', 'merge_orders', False)
+
+        processor = self.ocr_service.ocr_processor
+        self.watcher = FolderWatcher(
+            processor.input_folder,
+            processor.allowed_extensions,
+            poll_interval=self.config.getfloat('Watch', 'poll_interval', 2.0),
+            stable_seconds=self.config.getfloat('Watch', 'stable_seconds', 2.0),
+            use_watchdog=self.config.getboolean('Watch', 'use_watchdog', True)
+        )
+
+        # 识别结果带表格结构时直接生成采购单，不再读取中间Excel文件
+        processor.keep_tables = True
+
+        self._stop_event = threading.Event()
+
+    def handle_images(self, image_paths: List[str]) -> List[str]:
+        """
+        处理一组已就绪的图片，识别完成的图片立即生成采购单
+
+        Args:
+            image_paths: 图片文件路径列表
+
+        Returns:
+            生成的采购单文件路径列表
+        """
+        image_paths = self.ocr_service.get_unprocessed_files(image_paths)
+        if not image_paths:
+            return []
+
+        logger.info(f"检测到 {len(image_paths)} 张新图片")
+        purchase_orders = []
+
+        def on_result(image_path: str, excel_file: Optional[str]) -> None:
+            if excel_file is None:
+                return
+            processor = self.ocr_service.ocr_processor
+            purchase_order = None
+            try:
+                ocr_result = processor.pop_tables(image_path)
+                if ocr_result is not None:
+                    purchase_order = self.order_service.process_ocr_result(image_path, ocr_result)
+                else:
+                    purchase_order = self.order_service.process_excel(excel_file)
+            except Exception as e:
+                # 单张图片出错不影响其他图片和监听
+                logger.error(f"生成采购单时出错: {image_path}, 错误: {e}")
+            finally:
+                processor.complete_tables(image_path, bool(purchase_order))
+
+            if purchase_order:
+                logger.info(f"已生成采购单: {image_path} -> {purchase_order}")
+                purchase_orders.append(purchase_order)
+            else:
+                logger.error(f"生成采购单失败: {excel_file}")
+
+        self.ocr_service.process_image_list(image_paths, on_result)
+
+        if self.merge_orders and purchase_orders:
+            merged = self.order_service.merge_orders()
+            if merged:
+                logger.info(f"采购单已合并: {merged}")
+
+        return purchase_orders
+
+    def run(self) -> None:
+        """
+        持续监听输入目录，直到调用 stop 或收到键盘中断
+        """
+        self.watcher.start()
+        logger.info(f"开始监听输入目录: {self.watcher.directory}，按 Ctrl+C 停止")
+
+        try:
+            while not self._stop_event.is_set():
+                ready = self.watcher.get_ready(timeout=1.0)
+                if ready:
+                    self.handle_images(ready)
+        except KeyboardInterrupt:
+            logger.info("收到中断信号，停止监听")
+        finally:
+            self.watcher.stop()
+
+    def stop(self) -> None:
+        """停止监听"""
+        self._stop_event.set()
+        self.watcher.stop()
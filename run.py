@@ -13,9 +13,12 @@ import argparse
 from typing import List, Optional
 
 from app.config.settings import ConfigManager
+from app.core.excel import reader
+from app.core.utils.dir_index import DirectoryIndex
 from app.core.utils.log_utils import get_logger, close_logger
 from app.services.ocr_service import OCRService
 from app.services.order_service import OrderService
+from app.services.watch_service import WatchService
 
 logger = get_logger(__name__)
 
@@ -44,6 +47,7 @@ def create_parser() -> argparse.ArgumentParser:
     # Excel处理命令
     excel_parser = subparsers.add_parser('excel', help='Excel处理')
     excel_parser.add_argument('--input', type=str, help='输入Excel文件路径，如果不指定则处理最新的文件')
+    excel_parser.add_argument('--all', action='store_true', help='并行处理所有还没有生成采购单的Excel文件')
     
     # 订单合并命令
     merge_parser = subparsers.add_parser('merge', help='订单合并')
@@ -52,6 +56,16 @@ def create_parser() -> argparse.ArgumentParser:
     # 完整流程命令
     pipeline_parser = subparsers.add_parser('pipeline', help='完整流程')
     pipeline_parser.add_argument('--input', type=str, help='输入图片文件路径，如果不指定则处理所有图片')
+    pipeline_parser.add_argument('--all', action='store_true', help='Excel处理步骤并行处理所有还没有生成采购单的Excel文件，而不只是最新的文件')
+    
+    # 目录监听命令
+    watch_parser = subparsers.add_parser('watch', help='监听输入目录，新图片自动生成采购单')
+    watch_parser.add_argument('--merge', action='store_true', help='每批新采购单生成后自动合并')
+    
+    # Excel读取引擎性能比较命令
+    bench_parser = subparsers.add_parser('bench-excel', help='比较各Excel读取引擎的读取速度')
+    bench_parser.add_argument('--input', type=str, help='Excel文件路径列表，以逗号分隔，如果不指定则使用输出目录中的所有Excel文件')
+    bench_parser.add_argument('--repeat', type=int, default=3, help='每个文件重复读取的次数')
     
     return parser
 
@@ -108,6 +122,34 @@ def run_ocr(ocr_service: OCRService, args) -> bool:
         
         return True
 
+def run_excel_all(order_service: OrderService) -> bool:
+    """
+    并行处理所有还没有生成采购单的Excel文件，并输出每个文件的处理结果
+    
+    Args:
+        order_service: 订单服务
+        
+    Returns:
+        是否全部处理成功
+    """
+    file_paths = order_service.get_pending_excels()
+    if not file_paths:
+        logger.warning("没有需要处理的Excel文件")
+        return False
+    
+    results = order_service.process_excels(file_paths)
+    
+    for result in results:
+        name = os.path.basename(result['file'])
+        if result['success']:
+            logger.info(f"成功 {name} -> {os.path.basename(result['output'])} ({result['seconds']:.2f} 秒)")
+        else:
+            logger.error(f"失败 {name} ({result['seconds']:.2f} 秒)")
+    
+    success = sum(1 for result in results if result['success'])
+    logger.info(f"Excel批量处理完成，总计: {len(results)}，成功: {success}，失败: {len(results) - success}")
+    return success == len(results)
+
 def run_excel(order_service: OrderService, args) -> bool:
     """
     运行Excel处理
@@ -119,6 +161,9 @@ def run_excel(order_service: OrderService, args) -> bool:
     Returns:
         处理是否成功
     """
+    if args.all:
+        return run_excel_all(order_service)
+    
     if args.input:
         if not os.path.exists(args.input):
             logger.error(f"输入文件不存在: {args.input}")
@@ -231,19 +276,24 @@ def run_pipeline(ocr_service: OCRService, order_service: OrderService, args) ->
     # 2. Excel处理
     logger.info("=== 流程步骤 2: Excel处理 ===")
     
-    latest_file = order_service.get_latest_excel()
-    if not latest_file:
-        logger.warning("未找到可处理的Excel文件")
-        return False
-        
-    logger.info(f"处理最新的Excel文件: {latest_file}")
-    excel_result = order_service.process_excel(latest_file)
-    
-    if not excel_result:
-        logger.error("Excel处理失败")
-        return False
+    if args.all:
+        if not run_excel_all(order_service) and not order_service.get_purchase_orders():
+            logger.error("Excel处理失败")
+            return False
+    else:
+        latest_file = order_service.get_latest_excel()
+        if not latest_file:
+            logger.warning("未找到可处理的Excel文件")
+            return False
+            
+        logger.info(f"处理最新的Excel文件: {latest_file}")
+        excel_result = order_service.process_excel(latest_file)
         
-    logger.info(f"Excel处理成功，输出文件: {excel_result}")
+        if not excel_result:
+            logger.error("Excel处理失败")
+            return False
+            
+        logger.info(f"Excel处理成功，输出文件: {excel_result}")
     
     # 3. 订单合并
     logger.info("=== 流程步骤 3: 订单合并 ===")
@@ -276,6 +326,65 @@ def run_pipeline(ocr_service: OCRService, order_service: OrderService, args) ->
     logger.info("=== 完整流程处理成功 ===")
     return True
 
+def run_watch(config: ConfigManager, ocr_service: OCRService, order_service: OrderService, args) -> bool:
+    """
+    运行目录监听模式
+    
+    Args:
+        config: 配置管理器
+        ocr_service: OCR服务
+        order_service: 订单服务
+        args: 命令行参数
+        
+    Returns:
+        处理是否成功
+    """
+    if args.merge:
+        config.update('Watch', 'merge_orders', 'true')
+    
+    watch_service = WatchService(config, ocr_service, order_service)
+    watch_service.run()
+    return True
+
+def run_bench_excel(config: ConfigManager, args) -> bool:
+    """
+    比较各Excel读取引擎读取同一批文件的速度
+    
+    Args:
+        config: 配置管理器
+        args: 命令行参数
+        
+    Returns:
+        处理是否成功
+    """
+    if args.input:
+        file_paths = [path.strip() for path in args.input.split(',') if path.strip()]
+    else:
+        output_dir = config.get_path('Paths', 'output_folder', 'data/output')
+        file_paths = [entry.path for entry in DirectoryIndex(output_dir).entries(extensions=['.xlsx', '.xls'])]
+    
+    file_paths = [path for path in file_paths if os.path.exists(path)]
+    if not file_paths:
+        logger.warning("未找到用于比较的Excel文件")
+        return False
+    
+    logger.info(f"比较Excel读取引擎: {len(file_paths)} 个文件，每个文件读取 {args.repeat} 次")
+    results = reader.benchmark(file_paths, max(1, args.repeat))
+    
+    for engine, result in results.items():
+        if not result['files']:
+            logger.info(f"{engine:<10} 不可用或不支持这些文件")
+            continue
+        message = (f"{engine:<10} 文件 {result['files']:>4}  平均每个文件 {result['per_file_ms']:8.1f} 毫秒  "
+                   f"总耗时 {result['seconds']:.2f} 秒")
+        if result['skipped']:
+            message += f"  跳过 {result['skipped']} 个"
+        if result['mismatches']:
+            message += f"  结果与pandas不一致 {len(result['mismatches'])} 个"
+        logger.info(message)
+    
+    return True
+
 def main(args: Optional[List[str]] = None) -> int:
     """
     主函数
@@ -293,6 +402,7 @@ def main(args: Optional[List[str]] = None) -> int:
         parser.print_help()
         return 1
     
+    ocr_service = None
     try:
         # 创建配置管理器
         config = ConfigManager(parsed_args.config) if parsed_args.config else ConfigManager()
@@ -310,6 +420,10 @@ def main(args: Optional[List[str]] = None) -> int:
             success = run_merge(order_service, parsed_args)
         elif parsed_args.command == 'pipeline':
             success = run_pipeline(ocr_service, order_service, parsed_args)
+        elif parsed_args.command == 'watch':
+            success = run_watch(config, ocr_service, order_service, parsed_args)
+        elif parsed_args.command == 'bench-excel':
+            success = run_bench_excel(config, parsed_args)
         else:
             parser.print_help()
             return 1
@@ -323,6 +437,10 @@ def main(args: Optional[List[str]] = None) -> int:
         return 1
         
     finally:
+        # 释放OCR连接池
+        if ocr_service is not None:
+            ocr_service.close()
+        
         # 关闭日志
         close_logger(__name__)
 
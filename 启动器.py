@@ -230,8 +230,8 @@ def run_command_with_logging(command, log_widget, status_bar=None, on_complete=N
 
 def extract_progress_from_log(log_line):
     """从日志行中提取进度信息"""
-    # 尝试匹配"处理批次 x/y"格式的进度信息
-    batch_match = re.search(r'处理批次 (\d+)/(\d+)', log_line)
+    # 尝试匹配"处理批次 x/y"或"处理进度 x/y"格式的进度信息
+    batch_match = re.search(r'(?:处理批次|识别进度|处理进度) (\d+)/(\d+)', log_line)
     if batch_match:
         current = int(batch_match.group(1))
         total = int(batch_match.group(2))
@@ -919,15 +919,37 @@ def clean_cache(log_widget):
         # 清除OCR缓存文件
         cache_files = [
             os.path.join("data", "processed_files.json"),
+            os.path.join("data", "processed_files.db"),
+            os.path.join("data", "processed_files.db-wal"),
+            os.path.join("data", "processed_files.db-shm"),
+            os.path.join("data", "spec_memo.json"),
+            os.path.join("data", "merge_store.db"),
+            os.path.join("data", "merge_store.db-wal"),
+            os.path.join("data", "merge_store.db-shm"),
             os.path.join("data/output", "processed_files.json"),
             os.path.join("data/output", "merged_files.json")
         ]
         
+        # OCR结果缓存和识别任务日志的位置以配置为准，清除后所有图片重新识别
+        from app.config.settings import ConfigManager
+        config = ConfigManager()
+        journal_file = config.get('Paths', 'ocr_job_journal', 'data/ocr_jobs.jsonl')
+        cache_files.append(journal_file)
+        cache_dirs = [
+            config.get_path('Cache', 'ocr_cache_folder', 'data/ocr_cache'),
+            f"{os.path.splitext(journal_file)[0]}_spool"
+        ]
+        
         for cache_file in cache_files:
             if os.path.exists(cache_file):
                 os.remove(cache_file)
                 add_to_log(log_widget, f"已清除缓存文件: {cache_file}\n", "success")
         
+        for cache_dir in cache_dirs:
+            if os.path.isdir(cache_dir):
+                shutil.rmtree(cache_dir, ignore_errors=True)
+                add_to_log(log_widget, f"已清除缓存目录: {cache_dir}\n", "success")
+        
         # 清除临时文件夹中所有文件
         temp_dir = os.path.join("data/temp")
         if os.path.exists(temp_dir):